@@ -0,0 +1,6 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks.
+
+(c) DevPocket, 2024
+"""
@@ -0,0 +1,180 @@
+# vim: set fileencoding=utf-8
+"""
+Dashboards compression benchmark.
+
+Measures database size and transfer time of raw and compressed dashboards for generated layouts
+of realistic structure.
+
+Usage:
+    python -m benchmarks.bench_dashboard_compression [--users 20] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+import random
+import sqlite3
+import tempfile
+import time
+
+from custom_components.domika.dashboard import compression
+
+DOMAINS = ["light", "switch", "sensor", "binary_sensor", "climate", "cover", "lock", "camera"]
+WIDGET_TYPES = ["tile", "slider", "thermostat", "graph", "camera", "scene", "group"]
+# Link bandwidth in megabits per second: cloud relay, remote ui, local wifi.
+LINKS_MBIT = [1, 5, 50]
+
+
+def generate_dashboards(rnd: random.Random, widgets_count: int) -> str:
+    """Generate dashboards json similar to the ones created by the app."""
+    pages = []
+    widgets_left = widgets_count
+    page_index = 0
+    while widgets_left > 0:
+        page_widgets = []
+        for widget_index in range(min(widgets_left, rnd.randint(8, 40))):
+            domain = rnd.choice(DOMAINS)
+            page_widgets.append(
+                {
+                    "id": f"{page_index}-{widget_index}-{rnd.getrandbits(32):08x}",
+                    "type": rnd.choice(WIDGET_TYPES),
+                    "entity_id": f"{domain}.{domain}_{rnd.randint(1, 500)}",
+                    "title": f"{domain.replace('_', ' ').title()} {rnd.randint(1, 99)}",
+                    "position": {"x": rnd.randint(0, 3), "y": widget_index // 4},
+                    "size": {"w": rnd.choice([1, 2]), "h": rnd.choice([1, 2])},
+                    "style": {
+                        "color": f"#{rnd.getrandbits(24):06x}",
+                        "icon": f"mdi:{domain}",
+                        "show_state": rnd.choice([True, False]),
+                    },
+                    "related": {
+                        "temperature": f"sensor.temperature_{rnd.randint(1, 50)}",
+                        "humidity": f"sensor.humidity_{rnd.randint(1, 50)}",
+                    },
+                },
+            )
+        pages.append(
+            {
+                "id": page_index,
+                "name": f"Page {page_index}",
+                "area_id": f"area_{page_index}",
+                "widgets": page_widgets,
+            },
+        )
+        widgets_left -= len(page_widgets)
+        page_index += 1
+
+    return json.dumps({"version": 3, "dashboards": [{"name": "Home", "pages": pages}]})
+
+
+def _timeit(func, *args, repeat: int = 20) -> float:  # noqa: ANN001
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _db_size(rows: list[tuple[str, str, str]]) -> int:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "dashboards.db"
+        db = sqlite3.connect(db_path)
+        db.execute(
+            "CREATE TABLE dashboards (user_id VARCHAR PRIMARY KEY, dashboards VARCHAR, "
+            "hash VARCHAR)",
+        )
+        db.executemany("INSERT INTO dashboards VALUES (?, ?, ?)", rows)
+        db.commit()
+        db.execute("VACUUM")
+        db.close()
+        return db_path.stat().st_size
+
+
+def _result_payload(dashboards: str, hash_: str, encoding: str | None = None) -> bytes:
+    result = {"dashboards": dashboards, "hash": hash_}
+    if encoding:
+        result["encoding"] = encoding
+    return json.dumps({"id": 1, "type": "result", "success": True, "result": result}).encode()
+
+
+def run(users: int, seed: int) -> dict:
+    """Run benchmark."""
+    rnd = random.Random(seed)  # noqa: S311
+    layouts = {
+        "small": generate_dashboards(rnd, 60),
+        "medium": generate_dashboards(rnd, 300),
+        "large": generate_dashboards(rnd, 1000),
+    }
+
+    results: dict = {"layouts": {}, "database": {}}
+    for name, dashboards in layouts.items():
+        hash_ = hashlib.sha256(dashboards.encode()).hexdigest()
+        stored = compression.compress(dashboards)
+        assert compression.decompress(stored) == dashboards  # noqa: S101
+
+        raw_payload = _result_payload(dashboards, hash_)
+        zlib_payload = _result_payload(compression.get_zlib_base64(stored), hash_, "zlib")
+        # App decodes base64 and inflates dashboards, same as decompress does.
+        decompress_ms = _timeit(compression.decompress, stored)
+
+        results["layouts"][name] = {
+            "raw_bytes": len(dashboards),
+            "stored_bytes": len(stored),
+            "ratio": round(len(dashboards) / len(stored), 2),
+            "compress_ms": round(_timeit(compression.compress, dashboards), 3),
+            "decompress_ms": round(decompress_ms, 3),
+            "transfer_ms": {
+                f"{mbit}mbit": {
+                    "identity": round(len(raw_payload) * 8 / (mbit * 1000), 1),
+                    "zlib": round(len(zlib_payload) * 8 / (mbit * 1000) + decompress_ms, 1),
+                }
+                for mbit in LINKS_MBIT
+            },
+        }
+
+    rows = [(f"user{i}", layouts[rnd.choice(list(layouts))], f"hash{i}") for i in range(users)]
+    results["database"] = {
+        "users": users,
+        "raw_bytes": _db_size(rows),
+        "compressed_bytes": _db_size(
+            [(user_id, compression.compress(d), h) for user_id, d, h in rows],
+        ),
+    }
+    return results
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.users, args.seed)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    for name, layout in results["layouts"].items():
+        print(  # noqa: T201
+            f"{name:>6}: raw {layout['raw_bytes']:>8} B, stored {layout['stored_bytes']:>7} B "
+            f"(x{layout['ratio']}), compress {layout['compress_ms']} ms, "
+            f"decompress {layout['decompress_ms']} ms",
+        )
+        for link, transfer in layout["transfer_ms"].items():
+            print(  # noqa: T201
+                f"{'':>8}{link:>7}: identity {transfer['identity']:>8} ms, "
+                f"zlib {transfer['zlib']:>7} ms",
+            )
+    database = results["database"]
+    print(  # noqa: T201
+        f"database ({database['users']} users): raw {database['raw_bytes']} B, "
+        f"compressed {database['compressed_bytes']} B",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# vim: set fileencoding=utf-8
+"""
+Import time benchmark.
+
+Imports the integration in fresh interpreters with -X importtime, after the homeassistant modules
+which are always loaded before it, so only the modules pulled in by the integration are
+accounted. Reports median cumulative import time of the integration, modules with the largest
+cumulative import time, and lazily imported modules which are imported eagerly.
+
+Exits with non-zero status if a lazy module is imported or the import time exceeds --max-ms, to
+be used as a regression check.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--top 15] [--max-ms 0] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+INTEGRATION = "custom_components.domika"
+# Loaded by homeassistant before any integration is imported.
+BASELINE_MODULES = (
+    "homeassistant.core",
+    "homeassistant.components.http",
+    "homeassistant.components.websocket_api",
+    "homeassistant.helpers.config_validation",
+)
+# Heavy or optional integrations, imported on first use.
+LAZY_MODULES = (
+    "homeassistant.components.climate",
+    "homeassistant.components.cloud",
+    "homeassistant.components.cover",
+    "homeassistant.components.hassio",
+    "homeassistant.components.light",
+    "homeassistant.components.search",
+)
+
+_IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def parse_import_time(output: str, module: str) -> dict[str, tuple[int, int]]:
+    """Parse -X importtime output.
+
+    Modules are reported after the modules they import, with deeper indentation, once per
+    interpreter.
+
+    Returns:
+        self and cumulative import time in microseconds of the module and the modules first
+        imported by it.
+    """
+    lines = [match for line in output.splitlines() if (match := _IMPORT_TIME_RE.match(line))]
+    end = max(i for i, match in enumerate(lines) if match[4] == module)
+    depth = len(lines[end][3])
+    start = end
+    while start > 0 and len(lines[start - 1][3]) > depth:
+        start -= 1
+    return {match[4]: (int(match[1]), int(match[2])) for match in lines[start : end + 1]}
+
+
+def measure(module: str = INTEGRATION) -> dict[str, tuple[int, int]]:
+    """Import module in a fresh interpreter after the baseline modules.
+
+    Returns:
+        self and cumulative import time in microseconds of the modules imported by the module.
+    """
+    baseline = "; ".join(f"import {name}" for name in BASELINE_MODULES)
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"{baseline}; import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return parse_import_time(process.stderr, module)
+
+
+def run(runs: int, top: int) -> dict:
+    """Run benchmark."""
+    measures = [measure() for _ in range(runs)]
+    cumulative: dict[str, list[int]] = {}
+    for modules in measures:
+        for name, (_, total) in modules.items():
+            cumulative.setdefault(name, []).append(total)
+    medians = {name: statistics.median(values) for name, values in cumulative.items()}
+    return {
+        "runs": runs,
+        "modules": len(measures[-1]),
+        "import_ms": round(medians[INTEGRATION] / 1000, 1),
+        "top_ms": {
+            name: round(value / 1000, 1)
+            for name, value in sorted(medians.items(), key=lambda item: -item[1])[1 : top + 1]
+        },
+        "eager_lazy_modules": [name for name in LAZY_MODULES if name in medians],
+    }
+
+
+def main() -> None:
+    """Run benchmark, print results and check them."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=0, help="import time budget, 0 for none")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.top)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+    else:
+        print(  # noqa: T201
+            f"{INTEGRATION}: {results['import_ms']} ms, {results['modules']} modules, "
+            f"median of {results['runs']} runs",
+        )
+        for name, value in results["top_ms"].items():
+            print(f"{value:>10} ms  {name}")  # noqa: T201
+
+    if results["eager_lazy_modules"]:
+        sys.exit(f"Lazy modules are imported eagerly: {results['eager_lazy_modules']}")
+    if args.max_ms and results["import_ms"] > args.max_ms:
+        sys.exit(f"Import time {results['import_ms']} ms exceeds {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
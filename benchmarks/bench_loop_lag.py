@@ -0,0 +1,113 @@
+# vim: set fileencoding=utf-8
+"""
+Event loop lag benchmark.
+
+Encodes uncached full-state snapshots of generated entities, as resubscribe does for a newly
+connected app, on the event loop and in the executor. Meanwhile a ticker task measures how late
+the event loop wakes it up, which is the delay every other websocket client and automation
+sees.
+
+Usage:
+    python -m benchmarks.bench_loop_lag [--entities 2000] [--requests 10] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import types
+
+from homeassistant.core import State
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.domika.ha_entity.service import get_state_fragment
+
+from .bench_resubscribe_snapshot import generate_states
+
+TICK = 0.001
+
+
+def _encode_snapshot(states: list[State]) -> bytes:
+    # No fragments cache, so every state is serialized as for the first app.
+    hass = types.SimpleNamespace(data={})
+    return json_bytes({"entities": [get_state_fragment(hass, state) for state in states]})
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def _run_mode(states: list[State], requests: int, *, offload: bool) -> dict:
+    loop = asyncio.get_running_loop()
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK * 10)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        if offload:
+            await loop.run_in_executor(None, _encode_snapshot, states)
+        else:
+            _encode_snapshot(states)
+        # Let the ticker run between requests, as between websocket messages.
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "total_ms": round(elapsed * 1000, 1),
+        "max_lag_ms": round(lags[-1] * 1000, 2),
+        "p99_lag_ms": round(lags[int(len(lags) * 0.99)] * 1000, 2),
+        "mean_lag_ms": round(statistics.mean(lags) * 1000, 3),
+    }
+
+
+def run(entities: int, seed: int, requests: int) -> dict:
+    """Run benchmark."""
+    states = list(generate_states(random.Random(seed), entities).values())  # noqa: S311
+    payload_size = len(_encode_snapshot(states))
+    return {
+        "entities": entities,
+        "payload_bytes": payload_size,
+        "loop": asyncio.run(_run_mode(states, requests, offload=False)),
+        "executor": asyncio.run(_run_mode(states, requests, offload=True)),
+    }
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.entities, args.seed, args.requests)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    print(  # noqa: T201
+        f"{results['entities']} entities, {results['payload_bytes']} B per snapshot",
+    )
+    for mode in ("loop", "executor"):
+        result = results[mode]
+        print(  # noqa: T201
+            f"{mode:>8}: total {result['total_ms']:>8} ms, lag max {result['max_lag_ms']:>7} ms, "
+            f"p99 {result['p99_lag_ms']:>7} ms, mean {result['mean_lag_ms']:>7} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# vim: set fileencoding=utf-8
+"""
+Register event benchmark.
+
+Generates a storm of state changes on a bare homeassistant core with a local SQLite database,
+N entities with K attributes each, subscribed by M app sessions, and registers every
+state_changed event as the integration does. Measures events throughput, latency from the state
+change to the stored event, per stage latency and database growth. With --push the registered
+events are then pushed by event pusher sweeps to the local push server stub.
+
+Stage percentiles are interpolated in the metrics histogram buckets, event latency percentiles
+are exact.
+
+Usage:
+    python -m benchmarks.bench_register_event [--entities 200] [--app-sessions 5] \
+        [--attributes 3] [--events 2000] [--rate 0] [--no-index] [--push] \
+        [--push-latency 0.01] [--push-error-rate 0] [--push-max-rps 0] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import json
+import logging
+from pathlib import Path
+import random
+import tempfile
+import time
+import uuid
+
+import aiohttp
+import domika_ha_framework
+from domika_ha_framework import config
+import domika_ha_framework.database.core as database_core
+import domika_ha_framework.device.flow as device_flow
+from domika_ha_framework.device.models import DomikaDeviceUpdate
+import domika_ha_framework.device.service as device_service
+from domika_ha_framework.errors import DomikaFrameworkBaseError
+from domika_ha_framework.push_data.models import PushData
+import domika_ha_framework.subscription.flow as subscription_flow
+import sqlalchemy
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant
+
+from custom_components.domika.const import DB_DIALECT, DB_DRIVER, DB_NAME, DOMAIN, LOGGER
+from custom_components.domika.ha_event import flow as ha_event_flow
+from custom_components.domika.ha_event.pending import PendingPushData
+from custom_components.domika.metrics import service as metrics_service
+from custom_components.domika.metrics.registry import MetricsRegistry
+from custom_components.domika.subscription import service as subscription_service
+from custom_components.domika.subscription.index import SubscriptionIndex
+from custom_components.domika.subscription.matcher import SubscriptionMatcher
+
+from .push_server_stub import StubConfig, StubPushServer, start as start_push_server
+
+STAGES = ("diff", "lookup", "db", "push")
+# Events are pushed after the delay of their domain, in sweeps.
+MAX_SWEEPS = 5
+
+
+def _get_entity_ids(entities: int) -> list[str]:
+    return [f"sensor.bench_{i}" for i in range(entities)]
+
+
+@asynccontextmanager
+async def pipeline(
+    config_dir: str,
+    stub_config: StubConfig,
+) -> AsyncIterator[tuple[HomeAssistant, StubPushServer]]:
+    """Run bare homeassistant core with Domika events pipeline and push server stub.
+
+    Scratch database is created in the config dir.
+    """
+    server = StubPushServer(stub_config)
+    runner, push_server_url = await start_push_server(server)
+    http_session = aiohttp.ClientSession()
+    await domika_ha_framework.init(
+        config.Config(
+            database_url=f"{DB_DIALECT}+{DB_DRIVER}:///{Path(config_dir, DB_NAME)}",
+            push_server_url=push_server_url,
+        ),
+    )
+    hass = HomeAssistant(config_dir)
+    hass.data[DOMAIN] = {
+        "critical_entities": None,
+        "metrics": metrics_service.create_registry(),
+        "pending_push_data": PendingPushData(),
+        "push_server_session": http_session,
+        "subscription_index": SubscriptionIndex(),
+        "subscription_matcher": SubscriptionMatcher(),
+    }
+    try:
+        yield hass, server
+    finally:
+        await hass.async_stop(force=True)
+        await domika_ha_framework.dispose()
+        await http_session.close()
+        await runner.cleanup()
+
+
+async def subscribe(
+    hass: HomeAssistant,
+    subscriptions: dict[str, dict[str, int]],
+    app_sessions: int,
+    *,
+    push: bool,
+    index: bool,
+) -> None:
+    """Create app sessions with the same subscriptions, and push sessions if push is needed."""
+    async with database_core.get_session() as session:
+        for i in range(app_sessions):
+            app_session_id, _ = await device_flow.update_app_session_id(
+                session,
+                None,
+                f"user_{i}",
+                "",
+            )
+            await subscription_flow.resubscribe(session, app_session_id, subscriptions)
+            if push and (device := await device_service.get(session, app_session_id)):
+                await device_service.update(
+                    session,
+                    device,
+                    DomikaDeviceUpdate(push_session_id=uuid.uuid4()),
+                )
+
+    if index:
+        await subscription_service.load_index(hass)
+
+
+async def count_push_data() -> int:
+    """Count push data rows waiting for the push."""
+    async with database_core.get_session() as session:
+        stmt = sqlalchemy.select(sqlalchemy.func.count()).select_from(PushData)
+        return (await session.scalar(stmt)) or 0
+
+
+async def _storm(hass: HomeAssistant, args: argparse.Namespace) -> tuple[float, list[float]]:
+    """Change states, and wait until all events are registered.
+
+    Returns:
+        elapsed time and latencies of registered events.
+    """
+    rnd = random.Random(args.seed)  # noqa: S311
+    entity_ids = _get_entity_ids(args.entities)
+    latencies: list[float] = []
+
+    async def on_state_changed(event: Event[EventStateChangedData]) -> None:
+        await ha_event_flow.register_event(hass, event)
+        latencies.append(time.time() - event.time_fired.timestamp())
+
+    cancel = hass.bus.async_listen(EVENT_STATE_CHANGED, on_state_changed)
+    start = time.perf_counter()
+    for i in range(args.events):
+        entity_id = rnd.choice(entity_ids)
+        state = hass.states.get(entity_id)
+        attributes = dict(state.attributes) if state else {}
+        attributes[f"attr_{rnd.randrange(args.attributes)}"] = i + 1
+        hass.states.async_set(entity_id, str(i + 1), attributes)
+
+        if args.rate:
+            await asyncio.sleep(max(start + (i + 1) / args.rate - time.perf_counter(), 0))
+        else:
+            # Let registrations run between changes, as between incoming events.
+            await asyncio.sleep(0)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+    cancel()
+    return elapsed, latencies
+
+
+async def push_all(hass: HomeAssistant, server: StubPushServer) -> dict:
+    """Push registered events in sweeps, until all are pushed."""
+    durations: list[float] = []
+    errors: list[str] = []
+    while len(durations) < MAX_SWEEPS and await count_push_data():
+        start = time.perf_counter()
+        try:
+            await ha_event_flow.push_registered_events(hass)
+        except DomikaFrameworkBaseError as e:
+            errors.append(type(e).__name__)
+        durations.append(time.perf_counter() - start)
+
+    stats = server.get_stats()
+    elapsed = sum(durations)
+    return {
+        "sweeps": len(durations),
+        "sweep_ms": [to_ms(duration) for duration in durations],
+        "pushes_per_s": round(stats["pushes"] / elapsed, 1) if elapsed else None,
+        "errors": errors,
+        "left_push_data_rows": await count_push_data(),
+        "server": stats,
+    }
+
+
+def _get_percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def get_size(path: Path) -> int:
+    """Get file size."""
+    return path.stat().st_size
+
+
+def to_ms(value: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    return None if value is None else round(value * 1000, 3)
+
+
+def get_pipeline_results(
+    hass: HomeAssistant,
+    events: int,
+    elapsed: float,
+    latencies: list[float],
+) -> dict:
+    """Get throughput, latencies and registration results of the events fed to the pipeline."""
+    registry: MetricsRegistry = hass.data[DOMAIN]["metrics"]
+    results = registry.counters[metrics_service.EVENTS]
+    stage_duration = registry.histograms[metrics_service.REGISTER_EVENT_STAGE_DURATION]
+    return {
+        "events": {labels[0]: value for labels, value in results.get_values().items()},
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(events / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": to_ms(_get_percentile(latencies, 0.5)),
+            "p99": to_ms(_get_percentile(latencies, 0.99)),
+            "max": to_ms(max(latencies, default=None)),
+        },
+        "stages_ms": {
+            stage: {
+                "count": stage_duration.get_count((stage,)),
+                "p50": to_ms(stage_duration.quantile(0.5, (stage,))),
+                "p99": to_ms(stage_duration.quantile(0.99, (stage,))),
+            }
+            for stage in STAGES
+            if stage_duration.get_count((stage,))
+        },
+    }
+
+
+async def _run(args: argparse.Namespace, config_dir: str) -> dict:
+    db_path = Path(config_dir, DB_NAME)
+    async with pipeline(config_dir, create_stub_config(args)) as (hass, server):
+        entity_ids = _get_entity_ids(args.entities)
+        for entity_id in entity_ids:
+            attributes = {f"attr_{i}": 0 for i in range(args.attributes)}
+            hass.states.async_set(entity_id, "0", attributes)
+        await subscribe(
+            hass,
+            {
+                entity_id: {f"a.attr_{i}": 1 for i in range(args.attributes)}
+                for entity_id in entity_ids
+            },
+            args.app_sessions,
+            push=args.push,
+            index=not args.no_index,
+        )
+        db_size = await hass.async_add_executor_job(get_size, db_path)
+        elapsed, latencies = await _storm(hass, args)
+
+        results = {
+            "entities": args.entities,
+            "app_sessions": args.app_sessions,
+            "attributes": args.attributes,
+            "rate": args.rate,
+            "index": not args.no_index,
+            **get_pipeline_results(hass, args.events, elapsed, latencies),
+            "db": {
+                "push_data_rows": await count_push_data(),
+                "size_before_bytes": db_size,
+                "size_after_bytes": await hass.async_add_executor_job(get_size, db_path),
+            },
+        }
+        if args.push:
+            results["push"] = await push_all(hass, server)
+        return results
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run benchmark."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        return asyncio.run(_run(args, config_dir))
+
+
+def add_push_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add push server stub arguments."""
+    parser.add_argument("--push", action="store_true", help="push events to the server stub")
+    parser.add_argument("--push-latency", type=float, default=0.01, help="seconds")
+    parser.add_argument("--push-error-rate", type=float, default=0.0)
+    parser.add_argument("--push-max-rps", type=float, default=0.0, help="0 for no limit")
+
+
+def create_stub_config(args: argparse.Namespace) -> StubConfig:
+    """Create push server stub config from the arguments."""
+    return StubConfig(
+        latency=args.push_latency,
+        error_rate=args.push_error_rate,
+        max_rps=args.push_max_rps,
+        seed=args.seed,
+    )
+
+
+def print_pipeline_results(results: dict) -> None:
+    """Print pipeline results in human-readable form."""
+    print(  # noqa: T201
+        f"{results['events_per_s']} events/s, events {results['events']}, latency ms "
+        f"p50 {results['latency_ms']['p50']} p99 {results['latency_ms']['p99']} "
+        f"max {results['latency_ms']['max']}",
+    )
+    for stage, result in results["stages_ms"].items():
+        print(  # noqa: T201
+            f"{stage:>8}: {result['count']:>6} runs, p50 {result['p50']} ms, "
+            f"p99 {result['p99']} ms",
+        )
+    db = results["db"]
+    print(  # noqa: T201
+        f"db: {db['push_data_rows']} push data rows, "
+        f"{db['size_before_bytes']} -> {db['size_after_bytes']} B",
+    )
+    if push := results.get("push"):
+        print(  # noqa: T201
+            f"push: {push['sweeps']} sweeps {push['sweep_ms']} ms, "
+            f"{push['pushes_per_s']} pushes/s, errors {push['errors']}, "
+            f"{push['left_push_data_rows']} rows left, server {push['server']}",
+        )
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=200)
+    parser.add_argument("--app-sessions", type=int, default=5)
+    parser.add_argument("--attributes", type=int, default=3, help="subscribed per entity")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0, help="changes per second, 0 for max")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="look up subscriptions in the database, as before the index is loaded",
+    )
+    add_push_arguments(parser)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    # Dropped events are counted in results, not logged with tracebacks.
+    LOGGER.setLevel(logging.CRITICAL)
+    results = run(args)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    print(  # noqa: T201
+        f"{results['entities']} entities, {results['app_sessions']} app sessions, "
+        f"{results['attributes']} attributes, index {results['index']}",
+    )
+    print_pipeline_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# vim: set fileencoding=utf-8
+"""
+Resubscribe snapshot benchmark.
+
+Measures response size and build plus encode time of the resubscribe result with full and
+attribute-filtered entities states, for generated states of realistic structure.
+
+Usage:
+    python -m benchmarks.bench_resubscribe_snapshot [--entities 300] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import json
+import random
+import time
+
+from homeassistant.core import State
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.domika.ha_entity.service import get_flat_state
+
+# Attributes typically subscribed by the app widgets.
+SUBSCRIBED_ATTRIBUTES = {
+    "light": ["s", "a.brightness", "a.rgb_color", "a.friendly_name"],
+    "media_player": ["s", "a.volume_level", "a.media_title", "a.media_artist", "a.friendly_name"],
+    "weather": ["s", "a.temperature", "a.humidity", "a.friendly_name"],
+    "climate": ["s", "a.current_temperature", "a.temperature", "a.hvac_action"],
+    "sensor": ["s", "a.unit_of_measurement", "a.friendly_name"],
+}
+
+
+def _light(rnd: random.Random, index: int) -> State:
+    return State(
+        f"light.light_{index}",
+        rnd.choice(["on", "off"]),
+        {
+            "supported_color_modes": ["color_temp", "hs", "xy"],
+            "color_mode": "hs",
+            "brightness": rnd.randint(0, 255),
+            "hs_color": [rnd.uniform(0, 360), rnd.uniform(0, 100)],
+            "rgb_color": [rnd.randint(0, 255) for _ in range(3)],
+            "xy_color": [rnd.random(), rnd.random()],
+            "color_temp_kelvin": rnd.randint(2000, 6500),
+            "min_color_temp_kelvin": 2000,
+            "max_color_temp_kelvin": 6500,
+            "effect_list": [f"effect_{i}" for i in range(20)],
+            "friendly_name": f"Light {index}",
+            "supported_features": 44,
+        },
+    )
+
+
+def _media_player(rnd: random.Random, index: int) -> State:
+    return State(
+        f"media_player.player_{index}",
+        rnd.choice(["playing", "paused", "idle"]),
+        {
+            "volume_level": rnd.random(),
+            "is_volume_muted": False,
+            "media_content_id": f"spotify:track:{rnd.getrandbits(64):016x}",
+            "media_content_type": "music",
+            "media_duration": rnd.randint(100, 400),
+            "media_position": rnd.randint(0, 100),
+            "media_title": f"Track {rnd.randint(1, 1000)}",
+            "media_artist": f"Artist {rnd.randint(1, 100)}",
+            "media_album_name": f"Album {rnd.randint(1, 100)}",
+            "source_list": [f"Source {i}" for i in range(40)],
+            "sound_mode_list": [f"Mode {i}" for i in range(15)],
+            "group_members": [f"media_player.player_{i}" for i in range(5)],
+            "entity_picture": (
+                f"/api/media_player_proxy/player_{index}?token={rnd.getrandbits(128):032x}"
+            ),
+            "friendly_name": f"Player {index}",
+            "supported_features": 4127295,
+        },
+    )
+
+
+def _weather(rnd: random.Random, index: int) -> State:
+    return State(
+        f"weather.home_{index}",
+        rnd.choice(["sunny", "cloudy", "rainy"]),
+        {
+            "temperature": rnd.uniform(-10, 30),
+            "humidity": rnd.randint(20, 100),
+            "pressure": rnd.uniform(990, 1030),
+            "wind_speed": rnd.uniform(0, 20),
+            "wind_bearing": rnd.uniform(0, 360),
+            "forecast": [
+                {
+                    "datetime": f"2024-08-01T{hour:02d}:00:00+00:00",
+                    "condition": rnd.choice(["sunny", "cloudy", "rainy"]),
+                    "temperature": rnd.uniform(-10, 30),
+                    "precipitation": rnd.random(),
+                    "wind_speed": rnd.uniform(0, 20),
+                }
+                for hour in range(48)
+            ],
+            "attribution": "Weather forecast from met.no",
+            "friendly_name": f"Home {index}",
+        },
+    )
+
+
+def _climate(rnd: random.Random, index: int) -> State:
+    return State(
+        f"climate.room_{index}",
+        rnd.choice(["heat", "cool", "off"]),
+        {
+            "hvac_modes": ["off", "heat", "cool", "auto", "dry", "fan_only"],
+            "min_temp": 7,
+            "max_temp": 35,
+            "fan_modes": ["auto", "low", "medium", "high"],
+            "preset_modes": ["none", "eco", "away", "boost", "comfort"],
+            "current_temperature": rnd.uniform(15, 28),
+            "temperature": rnd.uniform(18, 24),
+            "hvac_action": rnd.choice(["heating", "idle"]),
+            "fan_mode": "auto",
+            "preset_mode": "none",
+            "friendly_name": f"Room {index}",
+            "supported_features": 401,
+        },
+    )
+
+
+def _sensor(rnd: random.Random, index: int) -> State:
+    return State(
+        f"sensor.sensor_{index}",
+        str(round(rnd.uniform(0, 100), 2)),
+        {
+            "state_class": "measurement",
+            "unit_of_measurement": rnd.choice(["°C", "%", "W", "lx"]),
+            "device_class": rnd.choice(["temperature", "humidity", "power", "illuminance"]),
+            "friendly_name": f"Sensor {index}",
+        },
+    )
+
+
+FACTORIES = {
+    "light": (_light, 0.3),
+    "media_player": (_media_player, 0.05),
+    "weather": (_weather, 0.02),
+    "climate": (_climate, 0.08),
+    "sensor": (_sensor, 0.55),
+}
+
+
+def generate_states(rnd: random.Random, entities_count: int) -> dict[str, State]:
+    """Generate entities states with realistic domains ratio."""
+    domains = rnd.choices(
+        list(FACTORIES),
+        weights=[weight for _, weight in FACTORIES.values()],
+        k=entities_count,
+    )
+    states = [FACTORIES[domain][0](rnd, index) for index, domain in enumerate(domains)]
+    return {state.entity_id: state for state in states}
+
+
+def _build_result(states: dict[str, State], subscriptions: dict, *, filtered: bool) -> bytes:
+    return json_bytes(
+        {
+            "entities": [
+                {
+                    "entity_id": entity_id,
+                    "time_updated": max(state.last_changed, state.last_updated),
+                    "attributes": get_flat_state(state, attributes if filtered else None),
+                }
+                for entity_id, attributes in subscriptions.items()
+                if (state := states[entity_id])
+            ],
+            "version": 1,
+        },
+    )
+
+
+def _timeit(func, *args, repeat: int, **kwargs) -> float:  # noqa: ANN001
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(entities: int, seed: int, repeat: int) -> dict:
+    """Run benchmark."""
+    rnd = random.Random(seed)  # noqa: S311
+    states = generate_states(rnd, entities)
+    subscriptions = {
+        entity_id: dict.fromkeys(SUBSCRIBED_ATTRIBUTES[state.domain], 0)
+        for entity_id, state in states.items()
+    }
+
+    results: dict = {"entities": entities}
+    for mode, filtered in (("full", False), ("filtered", True)):
+        results[mode] = {
+            "bytes": len(_build_result(states, subscriptions, filtered=filtered)),
+            "ms": round(
+                _timeit(_build_result, states, subscriptions, repeat=repeat, filtered=filtered),
+                3,
+            ),
+        }
+    results["size_reduction"] = round(results["full"]["bytes"] / results["filtered"]["bytes"], 2)
+    results["time_reduction"] = round(results["full"]["ms"] / results["filtered"]["ms"], 2)
+    return results
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.entities, args.seed, args.repeat)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    for mode in ("full", "filtered"):
+        print(  # noqa: T201
+            f"{mode:>8}: {results[mode]['bytes']:>9} B, {results[mode]['ms']:>8} ms",
+        )
+    print(  # noqa: T201
+        f"{results['entities']} entities: size x{results['size_reduction']}, "
+        f"time x{results['time_reduction']}",
+    )
+
+
+if __name__ == "__main__":
+    main()
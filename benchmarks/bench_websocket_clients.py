@@ -0,0 +1,462 @@
+# vim: set fileencoding=utf-8
+"""
+Websocket clients load benchmark.
+
+Simulates concurrent app connections to a bare homeassistant core with Domika websocket
+commands, a scratch database and generated entities. Every client connects as the app does,
+with update_app_session, resubscribe, entity_list and get_dashboards, then sends confirm_event,
+resubscribe, entity_list, get_dashboards and update_app_session in the configured ratios with
+random think time. With --storms, all clients drop their connections and reconnect at once at
+evenly spaced moments, as after homeassistant restart or network outage.
+
+Messages are dispatched by real websocket connections, so schemas are validated and results are
+serialized as for the app. Confirmed event ids are random, so confirm_event deletes nothing.
+Reports exact per command latency percentiles, reconnect duration and event loop lag measured by
+the integration watchdog, with the stalls attributed to the commands.
+
+Usage:
+    python -m benchmarks.bench_websocket_clients [--clients 200] [--duration 10] [--think 1] \
+        [--entities 300] [--subscribed 50] [--dashboards-size 50000] [--storms 1] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import json
+import logging
+import random
+import re
+import tempfile
+import time
+import types
+from typing import Any
+import uuid
+
+import domika_ha_framework.database.core as database_core
+
+from homeassistant.auth.models import RefreshToken, User
+from homeassistant.components import websocket_api
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    label_registry as lr,
+)
+
+from custom_components.domika.const import (
+    DASHBOARD_CACHE_MAX_SIZE,
+    DASHBOARD_PATCH_HISTORY_LENGTH,
+    DOMAIN,
+    LOGGER,
+    STATE_FRAGMENT_CACHE_MAX_SIZE,
+)
+from custom_components.domika.dashboard import (
+    router as dashboard_router,
+    service as dashboard_service,
+)
+from custom_components.domika.dashboard.cache import DashboardCache, DashboardPatchHistory
+from custom_components.domika.device import router as device_router
+from custom_components.domika.device.cache import DeviceCache
+from custom_components.domika.entity import router as entity_router
+from custom_components.domika.ha_entity.cache import StateFragmentCache
+from custom_components.domika.ha_event import router as ha_event_router
+from custom_components.domika.metrics import service as metrics_service
+from custom_components.domika.metrics.registry import MetricsRegistry
+from custom_components.domika.metrics.watchdog import LoopWatchdog
+from custom_components.domika.subscription import router as subscription_router
+
+from .bench_register_event import pipeline, to_ms
+from .bench_resubscribe_snapshot import SUBSCRIBED_ATTRIBUTES, generate_states
+from .push_server_stub import StubConfig
+
+COMMANDS = (
+    device_router.websocket_domika_update_app_session,
+    subscription_router.websocket_domika_resubscribe,
+    ha_event_router.websocket_domika_confirm_events,
+    entity_router.websocket_domika_entity_list,
+    dashboard_router.websocket_domika_get_dashboards,
+)
+# Steady state commands weights, most of the app traffic is events confirmation.
+WEIGHTS = {
+    "confirm_event": 60,
+    "resubscribe": 10,
+    "entity_list": 10,
+    "get_dashboards": 15,
+    "update_app_session": 5,
+}
+ENTITY_LIST_DOMAINS = ["light", "climate", "sensor"]
+CONFIRMED_EVENTS = 5
+# Result and error messages are serialized, id and success are the first keys.
+_RESULT_RE = re.compile(rb'^\{"id":(\d+),"type":"result","success":(true|false)')
+
+
+type Message = bytes | str | dict[str, Any]
+
+
+def _get_response(message: Message) -> tuple[int, bool] | None:
+    if isinstance(message, dict):
+        return message["id"], message.get("success", False)
+    if (
+        match := _RESULT_RE.match(message.encode() if isinstance(message, str) else message)
+    ) is None:
+        return None
+    return int(match[1]), match[2] == b"true"
+
+
+class _Storms:
+    """Reconnect storms, clients reconnect when the generation is changed."""
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self.event = asyncio.Event()
+
+    def start(self) -> None:
+        """Start reconnect storm."""
+        self.generation += 1
+        self.event.set()
+        self.event = asyncio.Event()
+
+
+class _Client:
+    """Simulated app, with one user and app session, reconnecting with the same ones."""
+
+    def __init__(self, hass: HomeAssistant, index: int, subscriptions: dict) -> None:
+        self.hass = hass
+        self.user = User(name=f"bench_{index}", perm_lookup=None, is_active=True)  # type: ignore[arg-type]
+        self.subscriptions = subscriptions
+        self.app_session_id: str | None = None
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._connection: ActiveConnection | None = None
+        self._futures: dict[int, asyncio.Future[tuple[Message, bool]]] = {}
+        self._last_id = 0
+
+    def _send_message(self, message: Message) -> None:
+        if (response := _get_response(message)) is None:
+            return
+        msg_id, success = response
+        if (future := self._futures.pop(msg_id, None)) is not None:
+            future.set_result((message, success))
+
+    def connect(self) -> None:
+        """Open new websocket connection."""
+        self._connection = ActiveConnection(
+            LOGGER,  # type: ignore[arg-type]
+            self.hass,
+            self._send_message,
+            self.user,
+            RefreshToken(self.user, None, timedelta(minutes=30)),
+        )
+        self._last_id = 0
+
+    async def request(self, command: str, **data: Any) -> Message | None:
+        """Send command and wait for its result.
+
+        Returns:
+            result message, None if it's an error.
+        """
+        if self._connection is None:
+            self.connect()
+        self._last_id += 1
+        msg_id = self._last_id
+        future = asyncio.get_running_loop().create_future()
+        self._futures[msg_id] = future
+
+        start = time.perf_counter()
+        self._connection.async_handle({"id": msg_id, "type": f"domika/{command}", **data})  # type: ignore[union-attr]
+        message, success = await future
+        self.latencies.setdefault(command, []).append(time.perf_counter() - start)
+        if not success:
+            self.errors[command] = self.errors.get(command, 0) + 1
+            return None
+        return message
+
+    async def send(self, command: str) -> None:
+        """Send command with the app-like data.
+
+        App session commands are replaced with update_app_session until the session is created.
+        """
+        if self.app_session_id is None and command in ("resubscribe", "confirm_event"):
+            command = "update_app_session"
+
+        if command == "update_app_session":
+            data: dict[str, Any] = {
+                "os_platform": "ios",
+                "os_version": "17.5",
+                "app_id": "com.devpocket.domika",
+                "app_version": "1.0",
+            }
+            if self.app_session_id:
+                data["app_session_id"] = self.app_session_id
+            if (message := await self.request(command, **data)) is None:
+                return
+            result = (
+                message["result"] if isinstance(message, dict) else json.loads(message)["result"]
+            )
+            # Result of the failed update has no valid app session id.
+            try:
+                self.app_session_id = str(uuid.UUID(result["app_session_id"]))
+            except ValueError:
+                self.errors[command] = self.errors.get(command, 0) + 1
+        elif command == "resubscribe":
+            await self.request(
+                command,
+                app_session_id=self.app_session_id,
+                subscriptions=self.subscriptions,
+            )
+        elif command == "confirm_event":
+            await self.request(
+                command,
+                app_session_id=self.app_session_id,
+                event_ids=[str(uuid.uuid4()) for _ in range(CONFIRMED_EVENTS)],
+            )
+        elif command == "entity_list":
+            await self.request(command, domains=ENTITY_LIST_DOMAINS)
+        else:
+            await self.request(command)
+
+    async def reconnect(self) -> float:
+        """Connect as the app does.
+
+        Returns:
+            connection setup duration.
+        """
+        start = time.perf_counter()
+        self.connect()
+        for command in ("update_app_session", "resubscribe", "entity_list", "get_dashboards"):
+            await self.send(command)
+        return time.perf_counter() - start
+
+
+async def _setup(hass: HomeAssistant, args: argparse.Namespace, rnd: random.Random) -> list:
+    """Add Domika domain data, websocket commands, entities and users dashboards."""
+    hass.data[DOMAIN].update(
+        {
+            "loop_watchdog": metrics_service.create_watchdog(),
+            "dashboard_cache": DashboardCache(DASHBOARD_CACHE_MAX_SIZE),
+            "dashboard_patches": DashboardPatchHistory(DASHBOARD_PATCH_HISTORY_LENGTH),
+            "device_cache": DeviceCache(),
+            "state_fragment_cache": StateFragmentCache(STATE_FRAGMENT_CACHE_MAX_SIZE),
+        },
+    )
+    # Network properties are computed without the http server.
+    hass.http = types.SimpleNamespace(server_port=8123)  # type: ignore[assignment]
+    for command in COMMANDS:
+        websocket_api.async_register_command(hass, command)
+    # Entity list searches related entities in the registries.
+    for registry in (lr, fr, ar, dr, er):
+        await registry.async_load(hass)
+
+    states = generate_states(rnd, args.entities)
+    for state in states.values():
+        hass.states.async_set(state.entity_id, state.state, state.attributes)
+
+    clients: list[_Client] = []
+    dashboards = json.dumps(
+        {"views": [{"title": "View", "cards": ["x" * 100] * (args.dashboards_size // 100)}]},
+    )
+    async with database_core.get_session() as session:
+        for i in range(args.clients):
+            entity_ids = rnd.sample(list(states), min(args.subscribed, len(states)))
+            client = _Client(
+                hass,
+                i,
+                {
+                    entity_id: dict.fromkeys(SUBSCRIBED_ATTRIBUTES[states[entity_id].domain], 1)
+                    for entity_id in entity_ids
+                },
+            )
+            await dashboard_service.create_or_update(
+                hass,
+                session,
+                dashboards,
+                f"hash_{i}",
+                client.user.id,
+            )
+            clients.append(client)
+    return clients
+
+
+async def _run_client(
+    client: _Client,
+    rnd: random.Random,
+    args: argparse.Namespace,
+    *,
+    deadline: float,
+    reconnects: list[float],
+    storms: _Storms,
+) -> None:
+    reconnects.append(await client.reconnect())
+    generation = storms.generation
+    commands = list(WEIGHTS)
+    weights = list(WEIGHTS.values())
+    while time.perf_counter() < deadline:
+        # Clients busy with a request when the storm starts reconnect after it's answered.
+        if generation != storms.generation:
+            generation = storms.generation
+            reconnects.append(await client.reconnect())
+            continue
+        try:
+            await asyncio.wait_for(storms.event.wait(), rnd.expovariate(1 / args.think))
+        except TimeoutError:
+            await client.send(rnd.choices(commands, weights)[0])
+
+
+async def _run_storms(storms: _Storms, args: argparse.Namespace, start: float) -> list[float]:
+    """Make all clients reconnect at evenly spaced moments.
+
+    Returns:
+        storms start, seconds since the benchmark start.
+    """
+    moments: list[float] = []
+    for i in range(args.storms):
+        at = start + args.duration * (i + 1) / (args.storms + 1)
+        await asyncio.sleep(max(at - time.perf_counter(), 0))
+        moments.append(round(time.perf_counter() - start, 3))
+        storms.start()
+    return moments
+
+
+def _get_distribution(values: list[float]) -> dict:
+    values = sorted(values)
+
+    def get(q: float) -> float | None:
+        return to_ms(values[min(int(len(values) * q), len(values) - 1)]) if values else None
+
+    return {
+        "count": len(values),
+        "p50": get(0.5),
+        "p90": get(0.9),
+        "p99": get(0.99),
+        "max": to_ms(values[-1] if values else None),
+    }
+
+
+def _get_loop_results(hass: HomeAssistant) -> dict:
+    registry: MetricsRegistry = hass.data[DOMAIN]["metrics"]
+    watchdog: LoopWatchdog = hass.data[DOMAIN]["loop_watchdog"]
+    lag = registry.histograms[metrics_service.LOOP_LAG]
+    stalls = registry.counters[metrics_service.LOOP_STALLS]
+    return {
+        "interval_ms": to_ms(watchdog.interval),
+        "lag_ms": {
+            "count": lag.get_count(()),
+            "p50": to_ms(lag.quantile(0.5, ())),
+            "p99": to_ms(lag.quantile(0.99, ())),
+            "max": to_ms(watchdog.max_lag),
+        },
+        "stalls": {labels[0]: value for labels, value in stalls.get_values().items()},
+    }
+
+
+async def _run(args: argparse.Namespace, config_dir: str) -> dict:
+    rnd = random.Random(args.seed)  # noqa: S311
+    async with pipeline(config_dir, StubConfig()) as (hass, _):
+        clients = await _setup(hass, args, rnd)
+        watchdog = hass.async_create_background_task(
+            metrics_service.run_watchdog(hass),
+            "loop_watchdog",
+        )
+
+        reconnects: list[float] = []
+        storms = _Storms()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        tasks = [
+            _run_client(
+                client,
+                random.Random(rnd.random()),  # noqa: S311
+                args,
+                deadline=deadline,
+                reconnects=reconnects,
+                storms=storms,
+            )
+            for client in clients
+        ]
+        storm_moments, *_ = await asyncio.gather(_run_storms(storms, args, start), *tasks)
+        elapsed = time.perf_counter() - start
+        watchdog.cancel()
+        # Handlers write to the database after the result is sent.
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        latencies: dict[str, list[float]] = {}
+        errors: dict[str, int] = {}
+        for client in clients:
+            for command, values in client.latencies.items():
+                latencies.setdefault(command, []).extend(values)
+            for command, value in client.errors.items():
+                errors[command] = errors.get(command, 0) + value
+        requests = sum(len(values) for values in latencies.values())
+        return {
+            "clients": args.clients,
+            "entities": args.entities,
+            "subscribed": args.subscribed,
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(requests / elapsed, 1),
+            "storms_s": storm_moments,
+            "commands_ms": {
+                command: _get_distribution(values) for command, values in sorted(latencies.items())
+            },
+            "errors": errors,
+            "reconnect_ms": _get_distribution(reconnects),
+            "loop": _get_loop_results(hass),
+        }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run benchmark."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        return asyncio.run(_run(args, config_dir))
+
+
+def _print_distribution(name: str, result: dict) -> None:
+    print(  # noqa: T201
+        f"{name:>18}: {result['count']:>6} runs, p50 {result['p50']} ms, "
+        f"p90 {result['p90']} ms, p99 {result['p99']} ms, max {result['max']} ms",
+    )
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between commands")
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--subscribed", type=int, default=50, help="entities per client")
+    parser.add_argument("--dashboards-size", type=int, default=50000, help="bytes per user")
+    parser.add_argument("--storms", type=int, default=1, help="reconnect storms during the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    # Handlers errors are counted in results, not logged with tracebacks.
+    LOGGER.setLevel(logging.CRITICAL)
+    results = run(args)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    print(  # noqa: T201
+        f"{results['clients']} clients, {results['entities']} entities, "
+        f"{results['subscribed']} subscribed per client, {results['requests_per_s']} requests/s, "
+        f"storms at {results['storms_s']} s, errors {results['errors']}",
+    )
+    for command, result in results["commands_ms"].items():
+        _print_distribution(command, result)
+    _print_distribution("reconnect", results["reconnect_ms"])
+    loop = results["loop"]
+    print(  # noqa: T201
+        f"loop lag every {loop['interval_ms']} ms: p50 {loop['lag_ms']['p50']} ms, "
+        f"p99 {loop['lag_ms']['p99']} ms, max {loop['lag_ms']['max']} ms, "
+        f"stalls {loop['stalls']}",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# vim: set fileencoding=utf-8
+"""
+Wire format benchmark.
+
+Measures payload size, encode and decode time of the resubscribe result in every available wire
+format, for generated states of realistic structure. Websocket size includes base64 framing of
+binary formats.
+
+Usage:
+    python -m benchmarks.bench_wire_format [--entities 300] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import base64
+import json
+import random
+import time
+
+from custom_components.domika.ha_entity.service import get_flat_state
+from custom_components.domika.wire_format import service as wire_format_service
+
+from .bench_resubscribe_snapshot import generate_states
+
+
+def _timeit(func, *args, repeat: int) -> float:  # noqa: ANN001
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(entities: int, seed: int, repeat: int) -> dict:
+    """Run benchmark."""
+    rnd = random.Random(seed)  # noqa: S311
+    states = generate_states(rnd, entities)
+    result = {
+        "entities": [
+            {
+                "entity_id": entity_id,
+                "time_updated": max(state.last_changed, state.last_updated),
+                "attributes": get_flat_state(state),
+            }
+            for entity_id, state in states.items()
+        ],
+        "version": 1,
+    }
+
+    results: dict = {"entities": entities, "formats": {}}
+    for wire_format in wire_format_service.FORMATS:
+        if wire_format not in wire_format_service.get_available_formats():
+            results["formats"][wire_format] = None
+            continue
+
+        payload = wire_format_service.encode(result, wire_format)
+        websocket_bytes = (
+            len(payload)
+            if wire_format == wire_format_service.FORMAT_JSON
+            else len(base64.b64encode(payload))
+        )
+        results["formats"][wire_format] = {
+            "bytes": len(payload),
+            "websocket_bytes": websocket_bytes,
+            "encode_ms": round(
+                _timeit(wire_format_service.encode, result, wire_format, repeat=repeat),
+                3,
+            ),
+            "decode_ms": round(
+                _timeit(wire_format_service.decode, payload, wire_format, repeat=repeat),
+                3,
+            ),
+        }
+    return results
+
+
+def main() -> None:
+    """Run benchmark and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.entities, args.seed, args.repeat)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    print(f"{results['entities']} entities")  # noqa: T201
+    for wire_format, result in results["formats"].items():
+        if result is None:
+            print(f"{wire_format:>8}: not installed")  # noqa: T201
+            continue
+        print(  # noqa: T201
+            f"{wire_format:>8}: {result['bytes']:>9} B "
+            f"(websocket {result['websocket_bytes']:>9} B), "
+            f"encode {result['encode_ms']:>8} ms, decode {result['decode_ms']:>8} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# vim: set fileencoding=utf-8
+"""
+Push server stub.
+
+Local aiohttp server implementing the push server api used by the framework, with configurable
+response latency, error rate and throughput limit, for offline load and failure testing. Point
+the integration to it with DOMIKA_PUSH_SERVER_URL=http://<host>:<port>/api/v1.
+
+Requests over the throughput limit are rejected with 429, failed requests are answered with the
+error status. Received requests are counted by path and status, see GET /stats.
+
+Usage:
+    python -m benchmarks.push_server_stub [--port 8765] [--latency 0.05] [--error-rate 0.1] \
+        [--max-rps 100]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+API_PREFIX = "/api/v1"
+
+type Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+@dataclass(kw_only=True)
+class StubConfig:
+    """Push server stub behaviour."""
+
+    # Seconds, response delay is uniformly distributed in latency +- jitter.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Part of requests failed with the error status.
+    error_rate: float = 0.0
+    error_status: int = web.HTTPInternalServerError.status_code
+    # Requests per second, 0 for no limit.
+    max_rps: float = 0.0
+    seed: int | None = None
+
+
+class StubPushServer:
+    """Push server stub state."""
+
+    def __init__(self, config: StubConfig) -> None:
+        self.config = config
+        self.requests: Counter[tuple[str, int]] = Counter()
+        # Pushed events by push session id.
+        self.pushes: Counter[str] = Counter()
+        self._random = random.Random(config.seed)  # noqa: S311
+        self._tokens = config.max_rps
+        self._tokens_time = time.monotonic()
+
+    def _take_token(self) -> bool:
+        if not self.config.max_rps:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.config.max_rps,
+            self._tokens + (now - self._tokens_time) * self.config.max_rps,
+        )
+        self._tokens_time = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        """Apply throughput limit, latency and errors to api requests."""
+        path = request.path.removeprefix(API_PREFIX)
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+
+        if not self._take_token():
+            response: web.StreamResponse = web.Response(status=web.HTTPTooManyRequests.status_code)
+        else:
+            if delay := self.config.latency + self._random.uniform(
+                -self.config.jitter,
+                self.config.jitter,
+            ):
+                await asyncio.sleep(max(delay, 0))
+            if self._random.random() < self.config.error_rate:
+                response = web.Response(status=self.config.error_status)
+            else:
+                response = await handler(request)
+
+        self.requests[path, response.status] += 1
+        return response
+
+    async def push(self, request: web.Request) -> web.Response:
+        """Accept push of the events."""
+        await request.json()
+        self.pushes[request.headers.get("x-session-id", "")] += 1
+        return web.Response(status=web.HTTPNoContent.status_code)
+
+    async def create_push_session(self, request: web.Request) -> web.Response:
+        """Accept push session creation, verification key is not sent anywhere."""
+        await request.json()
+        return web.Response(status=web.HTTPAccepted.status_code)
+
+    async def verify_push_session(self, request: web.Request) -> web.Response:
+        """Create push session for any verification key."""
+        await request.json()
+        return web.json_response(
+            {"push_session_id": str(uuid.uuid4())},
+            status=web.HTTPCreated.status_code,
+        )
+
+    async def remove_push_session(self, _request: web.Request) -> web.Response:
+        """Remove push session."""
+        return web.Response(status=web.HTTPNoContent.status_code)
+
+    async def stats(self, _request: web.Request) -> web.Response:
+        """Get received requests stats."""
+        return web.json_response(self.get_stats())
+
+    def get_stats(self) -> dict:
+        """Get received requests by path and status, and pushes count."""
+        requests: dict[str, dict[str, int]] = {}
+        for (path, status), count in sorted(self.requests.items()):
+            requests.setdefault(path, {})[str(status)] = count
+        return {
+            "requests": requests,
+            "pushes": sum(self.pushes.values()),
+            "push_sessions": len(self.pushes),
+        }
+
+
+def create_app(server: StubPushServer) -> web.Application:
+    """Create push server stub application."""
+    app = web.Application(middlewares=[server.middleware])
+    app.router.add_post(f"{API_PREFIX}/notification/push", server.push)
+    app.router.add_post(f"{API_PREFIX}/notification/critical_push", server.push)
+    app.router.add_post(f"{API_PREFIX}/push_session/create", server.create_push_session)
+    app.router.add_post(f"{API_PREFIX}/push_session/verify", server.verify_push_session)
+    app.router.add_delete(f"{API_PREFIX}/push_session", server.remove_push_session)
+    app.router.add_get("/stats", server.stats)
+    return app
+
+
+async def start(
+    server: StubPushServer,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[web.AppRunner, str]:
+    """Start push server stub in the running loop.
+
+    Returns:
+        runner, to be cleaned up when done, and push server url.
+    """
+    runner = web.AppRunner(create_app(server), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}{API_PREFIX}"
+
+
+def main() -> None:
+    """Run push server stub until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--max-rps", type=float, default=0.0, help="0 for no limit")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = StubPushServer(
+        StubConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            max_rps=args.max_rps,
+            seed=args.seed,
+        ),
+    )
+    print(f"Push server url: http://{args.host}:{args.port}{API_PREFIX}")  # noqa: T201
+    web.run_app(create_app(server), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
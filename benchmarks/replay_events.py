@@ -0,0 +1,213 @@
+# vim: set fileencoding=utf-8
+"""
+Recorded events replay.
+
+Feeds state changed events recorded with DOMIKA_RECORD_EVENTS=1 through the events pipeline of
+a bare homeassistant core, with a scratch database and the push server stub, at the original or
+accelerated speed. Every recorded entity attribute is subscribed by the app sessions, as the
+subscriptions are not recorded. Reports throughput, latency from the scheduled event time to the
+stored event, per stage latency and, with --push, push throughput.
+
+Usage:
+    python -m benchmarks.replay_events <recordings dir or files...> [--speed 1] \
+        [--app-sessions 1] [--limit 0] [--no-index] [--push] [--json]
+
+(c) DevPocket, 2024
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+import tempfile
+import time
+from typing import Any
+
+from domika_ha_framework.utils import flatten_json
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, HomeAssistant, State
+from homeassistant.util import dt as dt_util
+
+from custom_components.domika.const import DB_NAME, LOGGER
+from custom_components.domika.event_recorder.recorder import get_files, read_records
+from custom_components.domika.ha_event import flow as ha_event_flow
+
+from .bench_register_event import (
+    add_push_arguments,
+    count_push_data,
+    create_stub_config,
+    get_pipeline_results,
+    get_size,
+    pipeline,
+    print_pipeline_results,
+    push_all,
+    subscribe,
+)
+
+
+def _read(paths: list[Path], limit: int) -> list[dict[str, Any]]:
+    files: list[Path] = []
+    for path in paths:
+        files.extend(get_files(path) if path.is_dir() else [path])
+
+    records: list[dict[str, Any]] = []
+    for record in read_records(files):
+        records.append(record)
+        if len(records) == limit:
+            break
+    return records
+
+
+def _get_subscriptions(records: list[dict[str, Any]]) -> dict[str, dict[str, int]]:
+    subscriptions: dict[str, dict[str, int]] = {}
+    for record in records:
+        attributes = subscriptions.setdefault(record["e"], {})
+        for state in (record["o"], record["n"]):
+            for attribute in flatten_json(state or {}, exclude={"c", "lc", "lu"}) or {}:
+                attributes[attribute] = 1
+    return subscriptions
+
+
+def _to_state(entity_id: str, compressed_state: dict[str, Any] | None) -> State | None:
+    if compressed_state is None:
+        return None
+
+    context = compressed_state.get("c")
+    last_changed = dt_util.utc_from_timestamp(compressed_state["lc"])
+    return State(
+        entity_id,
+        compressed_state["s"],
+        compressed_state.get("a"),
+        last_changed=last_changed,
+        last_updated=(
+            dt_util.utc_from_timestamp(compressed_state["lu"])
+            if "lu" in compressed_state
+            else last_changed
+        ),
+        context=Context(id=context if isinstance(context, str) else context.get("id")),
+        validate_entity_id=False,
+    )
+
+
+def _to_event(record: dict[str, Any]) -> Event:
+    return Event(
+        EVENT_STATE_CHANGED,
+        {
+            "entity_id": record["e"],
+            "old_state": _to_state(record["e"], record["o"]),
+            "new_state": _to_state(record["e"], record["n"]),
+        },
+        time_fired_timestamp=record["t"],
+        context=Context(id=record["c"]),
+    )
+
+
+async def _replay(
+    hass: HomeAssistant,
+    records: list[dict[str, Any]],
+    speed: float,
+) -> tuple[float, list[float]]:
+    """Feed recorded events, and wait until all are registered.
+
+    Returns:
+        elapsed time and latencies of registered events.
+    """
+    latencies: list[float] = []
+
+    async def register(event: Event, scheduled: float) -> None:
+        await ha_event_flow.register_event(hass, event)
+        latencies.append(time.perf_counter() - scheduled)
+
+    events = [_to_event(record) for record in records]
+    first_fired = records[0]["t"] if records else 0
+    start = time.perf_counter()
+    for event, record in zip(events, records, strict=True):
+        scheduled = start + (record["t"] - first_fired) / speed if speed else time.perf_counter()
+        if (delay := scheduled - time.perf_counter()) > 0:
+            await asyncio.sleep(delay)
+        else:
+            # Let registrations run between events, as between incoming events.
+            await asyncio.sleep(0)
+        hass.async_create_task(register(event, scheduled))
+    await hass.async_block_till_done()
+    return time.perf_counter() - start, latencies
+
+
+async def _run(args: argparse.Namespace, config_dir: str) -> dict:
+    records = await asyncio.to_thread(_read, args.paths, args.limit)
+    db_path = Path(config_dir, DB_NAME)
+    async with pipeline(config_dir, create_stub_config(args)) as (hass, server):
+        await subscribe(
+            hass,
+            _get_subscriptions(records),
+            args.app_sessions,
+            push=args.push,
+            index=not args.no_index,
+        )
+        db_size = await hass.async_add_executor_job(get_size, db_path)
+        elapsed, latencies = await _replay(hass, records, args.speed)
+
+        results = {
+            "records": len(records),
+            "recorded_s": round(records[-1]["t"] - records[0]["t"], 3) if records else 0,
+            "speed": args.speed,
+            "app_sessions": args.app_sessions,
+            "index": not args.no_index,
+            **get_pipeline_results(hass, len(records), elapsed, latencies),
+            "db": {
+                "push_data_rows": await count_push_data(),
+                "size_before_bytes": db_size,
+                "size_after_bytes": await hass.async_add_executor_job(get_size, db_path),
+            },
+        }
+        if args.push:
+            results["push"] = await push_all(hass, server)
+        return results
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run replay."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        return asyncio.run(_run(args, config_dir))
+
+
+def main() -> None:
+    """Run replay and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", type=Path, nargs="+", help="recordings dir or files")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="1 for the original speed, 0 to feed events as fast as possible",
+    )
+    parser.add_argument("--app-sessions", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=0, help="max number of events, 0 for all")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="look up subscriptions in the database, as before the index is loaded",
+    )
+    add_push_arguments(parser)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    # Dropped events are counted in results, not logged with tracebacks.
+    LOGGER.setLevel(logging.CRITICAL)
+    results = run(args)
+    if args.json:
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    print(  # noqa: T201
+        f"{results['records']} events recorded in {results['recorded_s']} s, "
+        f"speed {results['speed']}, {results['app_sessions']} app sessions",
+    )
+    print_pipeline_results(results)
+
+
+if __name__ == "__main__":
+    main()
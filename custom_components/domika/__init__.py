@@ -9,37 +9,59 @@ import os
 from aiohttp import ClientTimeout
 import domika_ha_framework
 from domika_ha_framework import config
+from domika_ha_framework.errors import DomikaFrameworkBaseError
 
 from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.const import EVENT_STATE_CHANGED, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.typing import ConfigType
 
+from .api.compression import CompressionMetrics
 from .api.domain_services_view import DomikaAPIDomainServicesView
+from .api.metrics_view import DomikaAPIMetrics
 from .api.push_resubscribe import DomikaAPIPushResubscribe
 from .api.push_states_with_delay import DomikaAPIPushStatesWithDelay
 from .const import (
+    DASHBOARD_CACHE_MAX_SIZE,
+    DASHBOARD_PATCH_HISTORY_LENGTH,
     DB_DIALECT,
     DB_DRIVER,
     DB_NAME,
+    DEVICE_WORKER_QUEUE_SIZE,
+    DEVICE_WORKERS,
     DOMAIN,
     LOGGER,
     PUSH_INTERVAL,
     PUSH_SERVER_TIMEOUT,
     PUSH_SERVER_URL,
+    STATE_FRAGMENT_CACHE_MAX_SIZE,
 )
 from .critical_sensor import router as critical_sensor_router
-from .dashboard import router as dashboard_router
+from .dashboard import flow as dashboard_flow, router as dashboard_router
+from .dashboard.cache import DashboardCache, DashboardPatchHistory
 from .device import router as device_router
+from .device.cache import DeviceCache
+from .device.worker_pool import WorkerPool
 from .entity import router as entity_router
+from .event_recorder import service as event_recorder_service
+from .ha_entity.cache import StateFragmentCache
 from .ha_event import flow as ha_event_flow, router as ha_event_router
-from .subscription import router as subscription_router
+from .ha_event.pending import PendingPushData
+from .ha_network import service as ha_network_service
+from .metrics import router as metrics_router, service as metrics_service
+from .profiler import router as profiler_router
+from .subscription import router as subscription_router, service as subscription_service
+from .subscription.index import SubscriptionIndex
+from .subscription.matcher import SubscriptionMatcher
+from .tracing import router as tracing_router, service as tracing_service
 
 CONFIG_SCHEMA = cv.empty_config_schema(DOMAIN)
 
+PLATFORMS = [Platform.SENSOR]
+
 
 async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
     """Set up component."""
@@ -49,12 +71,13 @@ async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
     hass.http.register_view(DomikaAPIDomainServicesView)
     hass.http.register_view(DomikaAPIPushStatesWithDelay)
     hass.http.register_view(DomikaAPIPushResubscribe)
+    hass.http.register_view(DomikaAPIMetrics)
 
     LOGGER.debug("Component loaded")
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:  # noqa: PLR0915
     """Set up a config entry."""
     LOGGER.debug("Entry loading")
 
@@ -76,6 +99,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN] = {}
     hass.data[DOMAIN]["critical_entities"] = entry.options.get("critical_entities")
     hass.data[DOMAIN]["entry"] = entry
+    hass.data[DOMAIN]["metrics"] = metrics_service.create_registry()
+    hass.data[DOMAIN]["loop_watchdog"] = metrics_service.create_watchdog()
+    hass.data[DOMAIN]["tracer"] = tracing_service.create_tracer()
+    hass.data[DOMAIN]["event_recorder"] = event_recorder_service.create_recorder(hass)
+    hass.data[DOMAIN]["push_server_session"] = metrics_service.create_push_server_session(hass)
+    hass.data[DOMAIN]["api_compression_metrics"] = CompressionMetrics()
+    hass.data[DOMAIN]["dashboard_cache"] = DashboardCache(DASHBOARD_CACHE_MAX_SIZE)
+    hass.data[DOMAIN]["dashboard_patches"] = DashboardPatchHistory(DASHBOARD_PATCH_HISTORY_LENGTH)
+    hass.data[DOMAIN]["device_cache"] = DeviceCache()
+    hass.data[DOMAIN]["pending_push_data"] = PendingPushData()
+    hass.data[DOMAIN]["state_fragment_cache"] = StateFragmentCache(STATE_FRAGMENT_CACHE_MAX_SIZE)
+    hass.data[DOMAIN]["subscription_index"] = SubscriptionIndex()
+    hass.data[DOMAIN]["subscription_matcher"] = SubscriptionMatcher()
+    hass.data[DOMAIN]["device_worker_pool"] = WorkerPool(
+        hass,
+        entry,
+        DEVICE_WORKERS,
+        DEVICE_WORKER_QUEUE_SIZE,
+    )
 
     # Register Domika WebSocket commands.
     websocket_api.async_register_command(
@@ -106,6 +148,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass,
         subscription_router.websocket_domika_resubscribe,
     )
+    websocket_api.async_register_command(
+        hass,
+        subscription_router.websocket_domika_update_subscriptions,
+    )
+    websocket_api.async_register_command(
+        hass,
+        subscription_router.websocket_domika_subscribe_patterns,
+    )
     websocket_api.async_register_command(
         hass,
         ha_event_router.websocket_domika_confirm_events,
@@ -126,6 +176,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass,
         dashboard_router.websocket_domika_get_dashboards_hash,
     )
+    websocket_api.async_register_command(
+        hass,
+        dashboard_router.websocket_domika_patch_dashboards,
+    )
+    websocket_api.async_register_command(
+        hass,
+        dashboard_router.websocket_domika_get_dashboards_patch,
+    )
     websocket_api.async_register_command(
         hass,
         entity_router.websocket_domika_entity_list,
@@ -138,6 +196,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass,
         entity_router.websocket_domika_entity_state,
     )
+    websocket_api.async_register_command(
+        hass,
+        metrics_router.websocket_domika_metrics,
+    )
+    websocket_api.async_register_command(
+        hass,
+        profiler_router.websocket_domika_profile,
+    )
+    websocket_api.async_register_command(
+        hass,
+        tracing_router.websocket_domika_get_trace,
+    )
+
+    # Load pattern subscriptions, they are recompiled on registries changes.
+    await subscription_service.setup_patterns(hass, entry)
+
+    # Invalidate cached network properties on homeassistant network related changes.
+    ha_network_service.setup_invalidation(hass, entry)
+
+    # Measure event loop lag, stalls are attributed to running Domika handlers.
+    entry.async_create_background_task(
+        hass,
+        metrics_service.run_watchdog(hass),
+        "loop_watchdog",
+    )
+
+    # Write recorded events, if recording is enabled.
+    entry.async_create_background_task(
+        hass,
+        event_recorder_service.run_recorder(hass),
+        "event_recorder",
+    )
+
+    # Setup diagnostic sensors.
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # Register config update callback.
     entry.async_on_unload(entry.add_update_listener(config_update_listener))
@@ -155,9 +248,12 @@ async def config_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
     await hass.config_entries.async_reload(entry.entry_id)
 
 
-async def async_unload_entry(hass: HomeAssistant, _entry: ConfigEntry) -> bool:
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     LOGGER.debug("Entry unloading")
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+
     # Unregister Domika WebSocket commands.
     websocket_api_handlers: dict = hass.data.get(websocket_api.DOMAIN, {})
     websocket_api_handlers.pop("domika/update_app_session")
@@ -167,22 +263,38 @@ async def async_unload_entry(hass: HomeAssistant, _entry: ConfigEntry) -> bool:
     websocket_api_handlers.pop("domika/verify_push_session")
     websocket_api_handlers.pop("domika/remove_push_session")
     websocket_api_handlers.pop("domika/resubscribe")
+    websocket_api_handlers.pop("domika/update_subscriptions")
+    websocket_api_handlers.pop("domika/subscribe_patterns")
     websocket_api_handlers.pop("domika/confirm_event")
     websocket_api_handlers.pop("domika/critical_sensors")
     websocket_api_handlers.pop("domika/update_dashboards")
     websocket_api_handlers.pop("domika/get_dashboards")
     websocket_api_handlers.pop("domika/get_dashboards_hash")
+    websocket_api_handlers.pop("domika/patch_dashboards")
+    websocket_api_handlers.pop("domika/get_dashboards_patch")
     websocket_api_handlers.pop("domika/entity_list")
     websocket_api_handlers.pop("domika/entity_info")
     websocket_api_handlers.pop("domika/entity_state")
+    websocket_api_handlers.pop("domika/metrics")
+    websocket_api_handlers.pop("domika/profile")
+    websocket_api_handlers.pop("domika/get_trace")
 
     # Unsubscribe from events.
     if cancel_registrator_cb := hass.data[DOMAIN].get("cancel_registrator_cb", None):
         cancel_registrator_cb()
         hass.data[DOMAIN]["cancel_registrator_cb"] = None
 
+    # Drop not yet started device operations.
+    hass.data[DOMAIN]["device_worker_pool"].close()
+
+    # Drop not yet sent dashboard updates.
+    dashboard_flow.cancel_dashboard_updates(hass)
+
     await asyncio.sleep(0)
 
+    # Write events recorded since the last flush.
+    await event_recorder_service.flush(hass)
+
     # Dispose framework library.
     await domika_ha_framework.dispose()
 
@@ -215,15 +327,37 @@ async def _event_pusher(hass: HomeAssistant) -> None:
     try:
         while True:
             await asyncio.sleep(PUSH_INTERVAL.seconds)
+            result = "success"
             try:
-                await ha_event_flow.push_registered_events(hass)
+                with metrics_service.measure(hass, metrics_service.EVENT_PUSHER_SWEEP_DURATION):
+                    await ha_event_flow.push_registered_events(hass)
             except Exception:  # noqa: BLE001
+                result = "error"
                 LOGGER.exception("Event pusher error")
+            metrics_service.inc(hass, metrics_service.EVENT_PUSHER_SWEEPS, result)
     except asyncio.CancelledError as e:
         LOGGER.debug("Event pusher stopped. %s", e)
         raise
 
 
+async def _load_subscription_index(hass: HomeAssistant) -> None:
+    try:
+        await subscription_service.load_index(hass)
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error("Can't load subscriptions index. Framework error. %s", e)
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Can't load subscriptions index. Unhandled error")
+
+
+async def _count_pending_push_data(hass: HomeAssistant) -> None:
+    try:
+        await ha_event_flow.count_pending_push_data(hass)
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error("Can't count pending push data. Framework error. %s", e)
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Can't count pending push data. Unhandled error")
+
+
 async def _on_homeassistant_started(hass: HomeAssistant) -> None:
     """Start listen events and push data after homeassistant fully started."""
     # Setup event pusher.
@@ -234,6 +368,27 @@ async def _on_homeassistant_started(hass: HomeAssistant) -> None:
         "event_pusher",
     )
 
+    # Warm up network properties cache for update_app_session requests.
+    entry.async_create_background_task(
+        hass,
+        ha_network_service.warm_up(hass),
+        "warm_up_network_properties",
+    )
+
+    # Load subscriptions index, events are looked up in the database until it's loaded.
+    entry.async_create_background_task(
+        hass,
+        _load_subscription_index(hass),
+        "load_subscription_index",
+    )
+
+    # Count push data left since the last run, it's tracked in memory after that.
+    entry.async_create_background_task(
+        hass,
+        _count_pending_push_data(hass),
+        "count_pending_push_data",
+    )
+
     # Setup Domika event registrator.
     hass.data[DOMAIN]["cancel_registrator_cb"] = hass.bus.async_listen(
         EVENT_STATE_CHANGED,
@@ -0,0 +1,196 @@
+"""Integration api responses compression."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import gzip
+import time
+from typing import Any
+import zlib
+
+from aiohttp import hdrs, web
+
+from homeassistant.core import HomeAssistant
+
+from ..const import (
+    API_COMPRESSION_BROTLI_QUALITY,
+    API_COMPRESSION_LEVEL,
+    API_COMPRESSION_MIN_SIZE,
+    DOMAIN,
+    EXECUTOR_ENCODING_MIN_SIZE,
+    LOGGER,
+)
+from ..wire_format import service as wire_format_service
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+ENCODING_DEFLATE = "deflate"
+
+
+def _get_compressors() -> dict[str, Callable[[bytes], bytes]]:
+    # In order of preference for equally accepted encodings.
+    compressors: dict[str, Callable[[bytes], bytes]] = {}
+    if brotli is not None:
+        compressors[ENCODING_BROTLI] = lambda data: brotli.compress(
+            data,
+            quality=API_COMPRESSION_BROTLI_QUALITY,
+        )
+    compressors[ENCODING_GZIP] = lambda data: gzip.compress(
+        data,
+        API_COMPRESSION_LEVEL,
+        mtime=0,
+    )
+    compressors[ENCODING_DEFLATE] = lambda data: zlib.compress(data, API_COMPRESSION_LEVEL)
+    return compressors
+
+
+_COMPRESSORS = _get_compressors()
+
+
+@dataclass
+class _EncodingMetrics:
+    responses: int = 0
+    original_bytes: int = 0
+    compressed_bytes: int = 0
+    cpu_time: float = 0.0
+
+
+class CompressionMetrics:
+    """Compression ratio and cpu time of api responses by encoding."""
+
+    def __init__(self) -> None:
+        self._encodings: dict[str, _EncodingMetrics] = {}
+        # Responses sent uncompressed because they are too small or the app does not accept
+        # any supported encoding.
+        self.skipped = 0
+
+    def add(self, encoding: str, original_size: int, compressed_size: int, cpu_time: float) -> None:
+        """Account compressed response."""
+        metrics = self._encodings.setdefault(encoding, _EncodingMetrics())
+        metrics.responses += 1
+        metrics.original_bytes += original_size
+        metrics.compressed_bytes += compressed_size
+        metrics.cpu_time += cpu_time
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get metrics snapshot."""
+        return {
+            "skipped": self.skipped,
+            "encodings": {
+                encoding: {
+                    "responses": metrics.responses,
+                    "original_bytes": metrics.original_bytes,
+                    "compressed_bytes": metrics.compressed_bytes,
+                    "ratio": (
+                        round(metrics.original_bytes / metrics.compressed_bytes, 3)
+                        if metrics.compressed_bytes
+                        else None
+                    ),
+                    "cpu_time_ms": round(metrics.cpu_time * 1000, 3),
+                }
+                for encoding, metrics in self._encodings.items()
+            },
+        }
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Choose the encoding for the http Accept-Encoding header.
+
+    Supported encoding with the highest quality is chosen, on equal quality brotli is preferred
+    over gzip, and gzip over deflate.
+
+    Returns:
+        encoding, or None if the app does not accept any supported encoding.
+
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == "*":
+            for encoding in _COMPRESSORS:
+                qualities.setdefault(encoding, quality)
+        elif name in _COMPRESSORS:
+            qualities[name] = quality
+
+    best_encoding: str | None = None
+    best_quality = 0.0
+    for encoding in _COMPRESSORS:
+        if qualities.get(encoding, 0.0) > best_quality:
+            best_encoding, best_quality = encoding, qualities[encoding]
+    return best_encoding
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data with the encoding."""
+    return _COMPRESSORS[encoding](data)
+
+
+def _compress_timed(data: bytes, encoding: str) -> tuple[bytes, float]:
+    """Compress data and measure cpu time of the compressing thread."""
+    start = time.thread_time()
+    compressed = compress(data, encoding)
+    return compressed, time.thread_time() - start
+
+
+async def compress_response(
+    hass: HomeAssistant,
+    request: web.Request,
+    response: web.Response,
+) -> web.Response:
+    """Compress response body with the encoding negotiated by Accept-Encoding header.
+
+    Responses smaller than API_COMPRESSION_MIN_SIZE are left as is, large ones are compressed
+    in the executor.
+    """
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    metrics: CompressionMetrics | None = domain_data.get("api_compression_metrics")
+
+    body = response.body
+    encoding = negotiate(request.headers.get(hdrs.ACCEPT_ENCODING))
+    response.headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+    if (
+        encoding is None
+        or not isinstance(body, bytes)
+        or len(body) < API_COMPRESSION_MIN_SIZE
+        or hdrs.CONTENT_ENCODING in response.headers
+    ):
+        if metrics is not None:
+            metrics.skipped += 1
+        return response
+
+    compressed, cpu_time = await wire_format_service.async_run_encoding(
+        hass,
+        _compress_timed,
+        body,
+        encoding,
+        offload=len(body) >= EXECUTOR_ENCODING_MIN_SIZE,
+    )
+
+    response.body = compressed
+    response.headers[hdrs.CONTENT_ENCODING] = encoding
+    if metrics is not None:
+        metrics.add(encoding, len(body), len(compressed), cpu_time)
+    LOGGER.debug(
+        "Api response compressed with %s: %s -> %s bytes in %.3f ms",
+        encoding,
+        len(body),
+        len(compressed),
+        cpu_time * 1000,
+    )
+    return response
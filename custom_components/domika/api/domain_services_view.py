@@ -11,10 +11,12 @@ import domika_ha_framework.push_data.service as push_data_service
 
 from homeassistant.components.api import APIDomainServicesView
 from homeassistant.core import async_get_hass
-from homeassistant.helpers.json import json_bytes
 
 from ..const import DOMAIN, LOGGER
 from ..ha_entity import service as ha_entity_service
+from ..metrics import service as metrics_service
+from ..wire_format import service as wire_format_service
+from . import compression
 
 
 class DomikaAPIDomainServicesView(APIDomainServicesView):
@@ -23,6 +25,7 @@ class DomikaAPIDomainServicesView(APIDomainServicesView):
     url = "/domika/services/{domain}/{service}"
     name = "domika:domain-services"
 
+    @metrics_service.instrument_view
     async def post(
         self, request: web.Request, domain: str, service: str
     ) -> web.Response:
@@ -75,6 +78,7 @@ class DomikaAPIDomainServicesView(APIDomainServicesView):
             )
 
         LOGGER.debug("DomikaAPIDomainServicesView data: %s", {"entities": result})
-        data = json_bytes({"entities": result})
-        response.body = data
-        return response
+        wire_format = wire_format_service.negotiate(request.headers.get("Accept"))
+        response.body = wire_format_service.encode({"entities": result}, wire_format)
+        response.content_type = wire_format_service.CONTENT_TYPES[wire_format]
+        return await compression.compress_response(hass, request, response)
@@ -0,0 +1,39 @@
+"""Integration metrics api."""
+
+from http import HTTPStatus
+
+from aiohttp import web
+
+from homeassistant.core import async_get_hass
+from homeassistant.helpers.http import HomeAssistantView
+
+from ..const import DOMAIN
+from ..metrics import service as metrics_service
+from . import compression
+
+
+class DomikaAPIMetrics(HomeAssistantView):
+    """Domika metrics in Prometheus text exposition format, for admins only."""
+
+    url = "/domika/metrics"
+    name = "domika:metrics"
+
+    @metrics_service.instrument_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Get method."""
+        if not request["hass_user"].is_admin:
+            return self.json_message("Unauthorized.", HTTPStatus.UNAUTHORIZED)
+
+        # Check that integration still loaded.
+        hass = async_get_hass()
+        if not hass.data.get(DOMAIN):
+            return self.json_message("Route not found.", HTTPStatus.NOT_FOUND)
+
+        return await compression.compress_response(
+            hass,
+            request,
+            web.Response(
+                text=metrics_service.to_prometheus(hass),
+                content_type="text/plain",
+            ),
+        )
@@ -7,12 +7,15 @@ import uuid
 from aiohttp import web
 import domika_ha_framework.database.core as database_core
 from domika_ha_framework.errors import DomikaFrameworkBaseError
-import domika_ha_framework.subscription.flow as subscription_flow
 
 from homeassistant.core import async_get_hass
 from homeassistant.helpers.http import HomeAssistantView
 
 from ..const import DOMAIN, LOGGER
+from ..metrics import service as metrics_service
+from ..subscription import service as subscription_service
+from ..wire_format import service as wire_format_service
+from . import compression
 
 
 class DomikaAPIPushResubscribe(HomeAssistantView):
@@ -21,6 +24,7 @@ class DomikaAPIPushResubscribe(HomeAssistantView):
     url = "/domika/push_resubscribe"
     name = "domika:push-resubscribe"
 
+    @metrics_service.instrument_view
     async def post(self, request: web.Request) -> web.Response:
         """Post method."""
         # Check that integration still loaded.
@@ -53,8 +57,8 @@ class DomikaAPIPushResubscribe(HomeAssistantView):
 
         try:
             async with database_core.get_session() as session:
-                await subscription_flow.resubscribe_push(
-                    session, app_session_id, subscriptions
+                await subscription_service.resubscribe_push(
+                    hass, session, app_session_id, subscriptions
                 )
         except DomikaFrameworkBaseError as e:
             LOGGER.error(
@@ -73,4 +77,8 @@ class DomikaAPIPushResubscribe(HomeAssistantView):
 
         data = {"result": "success"}
         LOGGER.debug("DomikaAPIPushResubscribe data: %s", data)
-        return self.json(data, HTTPStatus.OK)
+        return await compression.compress_response(
+            hass,
+            request,
+            wire_format_service.make_response(request, data, HTTPStatus.OK),
+        )
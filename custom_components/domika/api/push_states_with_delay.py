@@ -15,6 +15,9 @@ from homeassistant.helpers.http import HomeAssistantView
 
 from ..const import DOMAIN, LOGGER
 from ..ha_entity import service as ha_entity_service
+from ..metrics import service as metrics_service
+from ..wire_format import service as wire_format_service
+from . import compression
 
 
 class DomikaAPIPushStatesWithDelay(HomeAssistantView):
@@ -23,6 +26,7 @@ class DomikaAPIPushStatesWithDelay(HomeAssistantView):
     url = "/domika/push_states_with_delay"
     name = "domika:push-states-with-delay"
 
+    @metrics_service.instrument_view
     async def post(self, request: web.Request) -> web.Response:
         """Post method."""
         # Check that integration still loaded.
@@ -81,4 +85,8 @@ class DomikaAPIPushStatesWithDelay(HomeAssistantView):
         data = {"entities": result}
         LOGGER.debug("DomikaAPIPushStatesWithDelay data: %s", data)
 
-        return self.json(data, HTTPStatus.OK)
+        return await compression.compress_response(
+            hass,
+            request,
+            wire_format_service.make_response(request, data, HTTPStatus.OK),
+        )
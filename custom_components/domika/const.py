@@ -19,10 +19,102 @@ if os.getenv("DOMIKA_DEBUG") == "1":
 else:
     PUSH_INTERVAL = timedelta(minutes=15)
 
-PUSH_SERVER_URL = "https://pns.domika.app:8000/api/v1"
+# May be pointed to a local push server stub for load and failure testing.
+PUSH_SERVER_URL = os.getenv("DOMIKA_PUSH_SERVER_URL") or "https://pns.domika.app:8000/api/v1"
 # Seconds
 PUSH_SERVER_TIMEOUT = 10
 
+# Network adapters changes are not announced by homeassistant, so cached network properties are
+# also refreshed periodically.
+NETWORK_PROPERTIES_TTL = timedelta(minutes=5)
+
+# Bytes
+DASHBOARD_CACHE_MAX_SIZE = 16 * 1024 * 1024
+# Dashboards smaller than this are stored and sent uncompressed.
+DASHBOARD_COMPRESSION_MIN_SIZE = 1024
+DASHBOARD_COMPRESSION_LEVEL = 6
+# Number of recent dashboards patches kept per user for delta updates.
+DASHBOARD_PATCH_HISTORY_LENGTH = 20
+# Dashboards updates are broadcast to user devices after a pause in saving, but not later than
+# max delay after the first unannounced save.
+DASHBOARD_UPDATE_DELAY = timedelta(seconds=2)
+DASHBOARD_UPDATE_MAX_DELAY = timedelta(seconds=10)
+
+# Bytes
+STATE_FRAGMENT_CACHE_MAX_SIZE = 8 * 1024 * 1024
+
+# Bytes. Larger payloads are encoded and compressed in the executor, not on the event loop.
+EXECUTOR_ENCODING_MIN_SIZE = 256 * 1024
+# Number of entities, for payloads whose size is not known before they are encoded.
+EXECUTOR_ENCODING_MIN_ENTITIES = 200
+
+# Bytes. REST responses smaller than this are sent uncompressed.
+API_COMPRESSION_MIN_SIZE = 1024
+API_COMPRESSION_LEVEL = 6
+API_COMPRESSION_BROTLI_QUALITY = 5
+
+# Subscriptions index load is retried if subscriptions were changed while it was read.
+SUBSCRIPTION_INDEX_LOAD_ATTEMPTS = 3
+# Pattern subscriptions are kept in homeassistant storage, not in the framework database.
+SUBSCRIPTION_PATTERNS_STORAGE_KEY = f"{DOMAIN}.subscription_patterns"
+SUBSCRIPTION_PATTERNS_STORAGE_VERSION = 1
+SUBSCRIPTION_PATTERNS_SAVE_DELAY = timedelta(seconds=10)
+# Pattern subscriptions are recompiled after a pause in entity, device and area registries updates.
+SUBSCRIPTION_MATCHER_RECOMPILE_DELAY = timedelta(seconds=1)
+
+# Seconds. Measured operations taking longer are sampled for diagnostics.
+METRICS_SLOW_OPERATION_THRESHOLD = 0.5
+# Number of recent slow operations samples.
+METRICS_SLOW_OPERATIONS_LENGTH = 50
+
+# Seconds. Event loop lag is measured by the watchdog sleeping for the interval, lag exceeding the
+# threshold is recorded as a stall along with Domika handlers running at that time.
+LOOP_WATCHDOG_INTERVAL = 0.5
+LOOP_WATCHDOG_LAG_THRESHOLD = 0.1
+# Number of recent stalls kept for diagnostics.
+LOOP_WATCHDOG_STALLS_LENGTH = 50
+
+# State changes are traced by homeassistant context from the event to the app confirmation, if
+# enabled. Recent traces are kept in memory.
+TRACING_ENABLED = os.getenv("DOMIKA_TRACING") == "1"
+TRACING_MAX_TRACES = 500
+# Max number of spans per trace, contexts may change many entities at once.
+TRACING_MAX_SPANS = 200
+
+# State changed events seen by the integration are recorded to reproduce performance issues, if
+# enabled. Files are written to this dir under homeassistant config dir, and rotated by size.
+RECORDER_ENABLED = os.getenv("DOMIKA_RECORD_EVENTS") == "1"
+RECORDER_DIR = "domika_recordings"
+# Bytes, compressed.
+RECORDER_MAX_FILE_SIZE = 16 * 1024 * 1024
+# Number of rotated files kept.
+RECORDER_MAX_FILES = 5
+RECORDER_FLUSH_INTERVAL = timedelta(seconds=10)
+# Max number of events buffered between flushes, further events are not recorded.
+RECORDER_MAX_BUFFER = 50000
+
+# Profiler stats files are written to this dir under homeassistant config dir.
+PROFILER_DIR = "domika_profiles"
+# Seconds.
+PROFILER_DEFAULT_DURATION = 30
+PROFILER_MAX_DURATION = 300
+# Number of top functions by cumulative time returned by default.
+PROFILER_TOP_FUNCTIONS = 30
+
+# Diagnostic sensors are refreshed from in-memory counters, rates are per this interval.
+HEALTH_UPDATE_INTERVAL = timedelta(minutes=1)
+
+# Max number of concurrently running background device operations by type.
+DEVICE_WORKERS = {
+    "check_push_token": 4,
+    "create_push_session": 2,
+    "verify_push_session": 2,
+    "remove_push_session": 2,
+    "remove_app_session": 2,
+}
+# Max number of queued device operations of each type. Further requests wait for free space.
+DEVICE_WORKER_QUEUE_SIZE = 256
+
 SENSORS_DOMAIN = binary_sensor.DOMAIN
 
 CRITICAL_NOTIFICATION_DEVICE_CLASSES = [
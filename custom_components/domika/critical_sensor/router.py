@@ -9,6 +9,7 @@ from homeassistant.components.websocket_api.decorators import websocket_command
 from homeassistant.core import HomeAssistant, callback
 
 from ..const import LOGGER
+from ..metrics import service as metrics_service
 from .enums import NotificationType
 from .service import get
 
@@ -19,6 +20,7 @@ from .service import get
     },
 )
 @callback
+@metrics_service.instrument_command
 def websocket_domika_critical_sensors(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -0,0 +1,138 @@
+"""Application dashboard cache."""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class DashboardCacheItem:
+    """Cached user dashboards."""
+
+    hash: str
+    # Serialized get_dashboards result.
+    payload: bytes
+    # Serialized get_dashboards result with zlib encoded dashboards, if they are compressed.
+    payload_zlib: bytes | None = None
+
+    @property
+    def size(self) -> int:
+        """Approximate memory footprint in bytes."""
+        return len(self.payload) + len(self.payload_zlib or b"") + len(self.hash)
+
+
+class DashboardCache:
+    """Per user dashboards cache with LRU eviction by byte size."""
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._items: OrderedDict[str, DashboardCacheItem] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._items
+
+    @property
+    def size(self) -> int:
+        """Total size of cached items in bytes."""
+        return self._size
+
+    def get(self, user_id: str) -> DashboardCacheItem | None:
+        """Get cached dashboards for the user and mark them as recently used."""
+        item = self._items.get(user_id)
+        if item is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._items.move_to_end(user_id)
+        return item
+
+    def set(self, user_id: str, item: DashboardCacheItem) -> None:
+        """Store dashboards for the user, evicting least recently used ones if needed."""
+        self.pop(user_id)
+
+        # Do not let a single oversized item flush the whole cache.
+        if item.size > self._max_size:
+            return
+
+        self._items[user_id] = item
+        self._size += item.size
+
+        while self._size > self._max_size:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= evicted.size
+
+    def set_if_missing(self, user_id: str, item: DashboardCacheItem) -> None:
+        """Store dashboards for the user only if nothing is cached yet.
+
+        Used for lazily loaded values, so they never overwrite a concurrent update.
+        """
+        if user_id not in self._items:
+            self.set(user_id, item)
+
+    def pop(self, user_id: str) -> DashboardCacheItem | None:
+        """Remove dashboards of the user from the cache."""
+        item = self._items.pop(user_id, None)
+        if item is not None:
+            self._size -= item.size
+        return item
+
+    def clear(self) -> None:
+        """Remove all cached dashboards."""
+        self._items.clear()
+        self._size = 0
+
+
+@dataclass(frozen=True)
+class DashboardPatch:
+    """Applied dashboards patch."""
+
+    base_hash: str
+    hash: str
+    patch: list[dict[str, Any]]
+
+
+class DashboardPatchHistory:
+    """Recently applied dashboards patches per user."""
+
+    def __init__(self, max_length: int) -> None:
+        self._max_length = max_length
+        self._patches: dict[str, deque[DashboardPatch]] = {}
+
+    def append(self, user_id: str, patch: DashboardPatch) -> None:
+        """Store applied patch. Patch base hash must match the hash of the previous one."""
+        patches = self._patches.setdefault(user_id, deque(maxlen=self._max_length))
+        if patches and patches[-1].hash != patch.base_hash:
+            patches.clear()
+        patches.append(patch)
+
+    def clear(self, user_id: str) -> None:
+        """Forget patches of the user, e.g. after a full dashboards update."""
+        self._patches.pop(user_id, None)
+
+    def get_patch(self, user_id: str, base_hash: str, hash_: str) -> list[dict[str, Any]] | None:
+        """Get combined patch that turns dashboards with base_hash into dashboards with hash_.
+
+        Returns:
+            list of patch operations, or None if patches history doesn't cover base_hash.
+
+        """
+        if base_hash == hash_:
+            return []
+
+        patches = self._patches.get(user_id)
+        if not patches or patches[-1].hash != hash_:
+            return None
+
+        # Search from the newest patch, hashes may repeat if the user reverted changes.
+        for index in range(len(patches) - 1, -1, -1):
+            if patches[index].base_hash == base_hash:
+                return [operation for patch in list(patches)[index:] for operation in patch.patch]
+
+        return None
@@ -0,0 +1,62 @@
+"""Application dashboard compression."""
+
+import base64
+import zlib
+
+from ..const import DASHBOARD_COMPRESSION_LEVEL, DASHBOARD_COMPRESSION_MIN_SIZE
+
+# Dashboards are json, so raw dashboards never start with the prefix.
+ZLIB_PREFIX = "zlib:"
+
+ENCODING_IDENTITY = "identity"
+ENCODING_ZLIB = "zlib"
+
+
+def compress(dashboards: str) -> str:
+    """Compress dashboards for storage.
+
+    Args:
+        dashboards: raw dashboards json.
+
+    Returns:
+        prefixed base64 encoded zlib stream, or raw dashboards if they are too small or
+        compression does not reduce their size.
+
+    """
+    if len(dashboards) < DASHBOARD_COMPRESSION_MIN_SIZE:
+        return dashboards
+
+    compressed = (
+        ZLIB_PREFIX
+        + base64.b64encode(
+            zlib.compress(dashboards.encode(), DASHBOARD_COMPRESSION_LEVEL),
+        ).decode()
+    )
+
+    return compressed if len(compressed) < len(dashboards) else dashboards
+
+
+def is_compressed(stored: str) -> bool:
+    """Check if stored dashboards are compressed."""
+    return stored.startswith(ZLIB_PREFIX)
+
+
+def get_zlib_base64(stored: str) -> str:
+    """Get base64 encoded zlib stream of compressed stored dashboards."""
+    return stored.removeprefix(ZLIB_PREFIX)
+
+
+def decompress(stored: str) -> str:
+    """Get raw dashboards from stored ones. Raw stored dashboards are returned as is.
+
+    Raise:
+        ValueError: if stored dashboards are corrupted.
+    """
+    if not is_compressed(stored):
+        return stored
+
+    try:
+        return zlib.decompress(base64.b64decode(get_zlib_base64(stored))).decode()
+    except (zlib.error, UnicodeDecodeError) as e:
+        msg = f"Corrupted compressed dashboards. {e}"
+        raise ValueError(msg) from e
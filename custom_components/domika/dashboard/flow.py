@@ -0,0 +1,131 @@
+"""Application dashboard flow."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from domika_ha_framework.errors import DomikaFrameworkBaseError
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from ..const import DASHBOARD_UPDATE_DELAY, DASHBOARD_UPDATE_MAX_DELAY, DOMAIN, LOGGER
+from ..device import service as device_service
+
+
+@dataclass
+class _PendingDashboardUpdate:
+    hash: str
+    # Hash of the dashboards the apps can patch to get the pending hash. None if the pending
+    # update includes a full dashboards update.
+    base_hash: str | None
+    # Loop time of the first coalesced update.
+    created_at: float
+    cancel_timer: CALLBACK_TYPE | None = None
+
+    def merge(self, hash_: str, base_hash: str | None) -> None:
+        """Coalesce next update of the same user into this one."""
+        # Patches chain stays usable only while every next patch is based on the previous one.
+        if base_hash is None or base_hash != self.hash:
+            self.base_hash = None
+        self.hash = hash_
+
+
+def _get_pending_updates(hass: HomeAssistant) -> dict[str, _PendingDashboardUpdate]:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.setdefault("dashboard_pending_updates", {})
+
+
+@callback
+def schedule_dashboard_update(
+    hass: HomeAssistant,
+    user_id: str,
+    hash_: str,
+    base_hash: str | None = None,
+) -> None:
+    """Schedule dashboard_update event for the user devices.
+
+    Updates of the same user are coalesced: the event is fired once saving pauses for
+    DASHBOARD_UPDATE_DELAY, but not later than DASHBOARD_UPDATE_MAX_DELAY after the first
+    coalesced update, and contains the final hash only.
+
+    Args:
+        hass: homeassistant core object.
+        user_id: homeassistant user id.
+        hash_: hash of the updated dashboards.
+        base_hash: hash of the dashboards before update, if the update was made with a patch.
+
+    """
+    pending_updates = _get_pending_updates(hass)
+    now = hass.loop.time()
+
+    pending = pending_updates.get(user_id)
+    if pending is None:
+        pending = _PendingDashboardUpdate(hash=hash_, base_hash=base_hash, created_at=now)
+        pending_updates[user_id] = pending
+    else:
+        pending.merge(hash_, base_hash)
+        if pending.cancel_timer:
+            pending.cancel_timer()
+
+    delay = min(
+        DASHBOARD_UPDATE_DELAY.total_seconds(),
+        pending.created_at + DASHBOARD_UPDATE_MAX_DELAY.total_seconds() - now,
+    )
+    pending.cancel_timer = async_call_later(
+        hass,
+        max(delay, 0),
+        HassJob(
+            partial(_fire_dashboard_update, hass, user_id),
+            "domika_dashboard_update",
+            cancel_on_shutdown=True,
+        ),
+    )
+
+
+@callback
+def cancel_dashboard_updates(hass: HomeAssistant) -> None:
+    """Cancel all scheduled dashboard_update events."""
+    pending_updates = _get_pending_updates(hass)
+    for pending in pending_updates.values():
+        if pending.cancel_timer:
+            pending.cancel_timer()
+    pending_updates.clear()
+
+
+async def _fire_dashboard_update(hass: HomeAssistant, user_id: str, _now: datetime) -> None:
+    pending = _get_pending_updates(hass).pop(user_id, None)
+    if pending is None:
+        return
+
+    try:
+        app_session_ids = await device_service.get_app_session_ids_by_user_id(hass, user_id)
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error(
+            'Can\'t send dashboard update for user "%s". Framework error. %s',
+            user_id,
+            e,
+        )
+        return
+    except Exception:  # noqa: BLE001
+        LOGGER.exception('Can\'t send dashboard update for user "%s". Unhandled error', user_id)
+        return
+
+    event_data = {
+        "d.type": "dashboard_update",
+        "hash": pending.hash,
+    }
+    # Let apps know that they can fetch the patch instead of the whole dashboards.
+    if pending.base_hash is not None:
+        event_data["base_hash"] = pending.base_hash
+
+    for app_session_id in app_session_ids:
+        hass.bus.async_fire(f"domika_{app_session_id}", event_data)
+
+    LOGGER.debug(
+        'Dashboard update "%s" sent to %s devices of user "%s"',
+        pending.hash,
+        len(app_session_ids),
+        user_id,
+    )
@@ -0,0 +1,133 @@
+"""Application dashboard json patch.
+
+Minimal RFC 6902 implementation, used for dashboards delta updates.
+"""
+
+import copy
+from typing import Any
+
+PATCH_OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        msg = f'Invalid json pointer "{pointer}"'
+        raise ValueError(msg)
+    return [key.replace("~1", "/").replace("~0", "~") for key in pointer[1:].split("/")]
+
+
+def _get_index(container: list, key: str, *, append: bool = False) -> int:
+    if append and key == "-":
+        return len(container)
+    if not key.isdigit() or (key != "0" and key.startswith("0")):
+        msg = f'Invalid array index "{key}"'
+        raise ValueError(msg)
+    index = int(key)
+    if index > len(container) or (not append and index == len(container)):
+        msg = f'Array index "{key}" out of range'
+        raise ValueError(msg)
+    return index
+
+
+def _resolve(document: Any, keys: list[str]) -> Any:
+    for key in keys:
+        if isinstance(document, dict):
+            if key not in document:
+                msg = f'Member "{key}" not found'
+                raise ValueError(msg)
+            document = document[key]
+        elif isinstance(document, list):
+            document = document[_get_index(document, key)]
+        else:
+            msg = f'Can\'t resolve "{key}" in scalar value'
+            raise ValueError(msg)
+    return document
+
+
+def _add(document: Any, keys: list[str], value: Any) -> Any:
+    if not keys:
+        return value
+    parent = _resolve(document, keys[:-1])
+    if isinstance(parent, dict):
+        parent[keys[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_get_index(parent, keys[-1], append=True), value)
+    else:
+        msg = f'Can\'t add "{keys[-1]}" to scalar value'
+        raise ValueError(msg)
+    return document
+
+
+def _remove(document: Any, keys: list[str]) -> tuple[Any, Any]:
+    if not keys:
+        msg = "Can't remove document root"
+        raise ValueError(msg)
+    parent = _resolve(document, keys[:-1])
+    if isinstance(parent, dict):
+        if keys[-1] not in parent:
+            msg = f'Member "{keys[-1]}" not found'
+            raise ValueError(msg)
+        return document, parent.pop(keys[-1])
+    if isinstance(parent, list):
+        return document, parent.pop(_get_index(parent, keys[-1]))
+    msg = f'Can\'t remove "{keys[-1]}" from scalar value'
+    raise ValueError(msg)
+
+
+def apply_patch(document: Any, patch: list[dict[str, Any]]) -> Any:
+    """Apply json patch to the document.
+
+    Patch is applied atomically: the original document is never modified.
+
+    Args:
+        document: parsed json document.
+        patch: list of RFC 6902 operations.
+
+    Returns:
+        patched document.
+
+    Raise:
+        ValueError: if patch is malformed or can't be applied to the document.
+    """
+    document = copy.deepcopy(document)
+    for operation in patch:
+        op = operation.get("op")
+        if op not in PATCH_OPERATIONS:
+            msg = f'Unsupported patch operation "{op}"'
+            raise ValueError(msg)
+        if "path" not in operation:
+            msg = f'Patch operation "{op}" has no path'
+            raise ValueError(msg)
+        keys = _parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            msg = f'Patch operation "{op}" has no value'
+            raise ValueError(msg)
+        if op in ("move", "copy") and "from" not in operation:
+            msg = f'Patch operation "{op}" has no from'
+            raise ValueError(msg)
+
+        if op == "add":
+            document = _add(document, keys, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            document, _ = _remove(document, keys)
+        elif op == "replace":
+            document, _ = _remove(document, keys) if keys else (document, None)
+            document = _add(document, keys, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            from_keys = _parse_pointer(operation["from"])
+            if keys[: len(from_keys)] == from_keys and keys != from_keys:
+                msg = "Can't move value into its own child"
+                raise ValueError(msg)
+            document, value = _remove(document, from_keys)
+            document = _add(document, keys, value)
+        elif op == "copy":
+            value = copy.deepcopy(_resolve(document, _parse_pointer(operation["from"])))
+            document = _add(document, keys, value)
+        elif _resolve(document, keys) != operation["value"]:
+            msg = f'Patch test failed for "{operation["path"]}"'
+            raise ValueError(msg)
+
+    return document
@@ -2,13 +2,7 @@
 
 from typing import Any, cast
 
-from domika_ha_framework.dashboard.models import (
-    DomikaDashboardCreate,
-    DomikaDashboardRead,
-)
-import domika_ha_framework.dashboard.service as dashboard_service
 import domika_ha_framework.database.core as database_core
-import domika_ha_framework.device.service as device_service
 from domika_ha_framework.errors import DomikaFrameworkBaseError
 import voluptuous as vol
 
@@ -17,10 +11,30 @@ from homeassistant.components.websocket_api.decorators import (
     async_response,
     websocket_command,
 )
+from homeassistant.components.websocket_api.messages import construct_result_message
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from ..const import DOMAIN, LOGGER
+from ..metrics import service as metrics_service
+from . import flow as dashboard_flow, service as dashboard_service
+from .cache import DashboardCacheItem
+from .compression import ENCODING_IDENTITY, ENCODING_ZLIB
+
+
+def _send_dashboards(
+    connection: ActiveConnection,
+    msg_id: int,
+    dashboards: DashboardCacheItem,
+    accept_encoding: list[str],
+) -> None:
+    payload = (
+        dashboards.payload_zlib
+        if dashboards.payload_zlib and ENCODING_ZLIB in accept_encoding
+        else dashboards.payload
+    )
+    # Send pre-serialized dashboards.
+    connection.send_message(construct_result_message(msg_id, payload))
 
 
 async def _update_dashboards(
@@ -32,24 +46,14 @@ async def _update_dashboards(
     try:
         async with database_core.get_session() as session:
             await dashboard_service.create_or_update(
+                hass,
                 session,
-                DomikaDashboardCreate(
-                    dashboards=dashboards,
-                    hash=hash_,
-                    user_id=user_id,
-                ),
+                dashboards,
+                hash_,
+                user_id,
             )
 
-            devices = await device_service.get_by_user_id(session, user_id)
-
-        for device in devices:
-            hass.bus.async_fire(
-                f"domika_{device.app_session_id}",
-                {
-                    "d.type": "dashboard_update",
-                    "hash": hash_,
-                },
-            )
+        dashboard_flow.schedule_dashboard_update(hass, user_id, hash_)
     except DomikaFrameworkBaseError as e:
         LOGGER.error(
             'Can\'t update dashboards "%s" for user "%s". Framework error. %s',
@@ -73,6 +77,7 @@ async def _update_dashboards(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_update_dashboards(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -116,15 +121,21 @@ async def websocket_domika_update_dashboards(
 @websocket_command(
     {
         vol.Required("type"): "domika/get_dashboards",
+        vol.Optional("accept_encoding", default=[ENCODING_IDENTITY]): [str],
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_get_dashboards(
-    _hass: HomeAssistant,
+    hass: HomeAssistant,
     connection: ActiveConnection,
     msg: dict[str, Any],
 ) -> None:
-    """Handle domika get dashboards request."""
+    """Handle domika get dashboards request.
+
+    If the app accepts zlib encoding, compressed dashboards are sent as base64 encoded zlib
+    stream, and result contains "encoding" key.
+    """
     msg_id: int | None = msg.get("id")
     if msg_id is None:
         LOGGER.error('Got websocket message "get_dashboards", msg_id is missing')
@@ -138,8 +149,7 @@ async def websocket_domika_get_dashboards(
 
     dashboards = None
     try:
-        async with database_core.get_session() as session:
-            dashboards = await dashboard_service.get(session, connection.user.id)
+        dashboards = await dashboard_service.get(hass, connection.user.id)
     except DomikaFrameworkBaseError as e:
         LOGGER.error(
             'Can\'t get dashboards for user "%s". Framework error. %s',
@@ -152,14 +162,16 @@ async def websocket_domika_get_dashboards(
             connection.user.id,
         )
 
-    result = (
-        DomikaDashboardRead.from_dict(dashboards.dict()).to_dict()
-        if dashboards
-        else DomikaDashboardRead(dashboards="", hash="").to_dict()
-    )
-
-    connection.send_result(msg_id, result)
-    LOGGER.debug("update_dashboards msg_id=%s", msg_id)
+    if dashboards:
+        _send_dashboards(
+            connection,
+            msg_id,
+            dashboards,
+            cast(list[str], msg.get("accept_encoding")),
+        )
+    else:
+        connection.send_result(msg_id, {"dashboards": "", "hash": ""})
+    LOGGER.debug("get_dashboards msg_id=%s", msg_id)
 
 
 @websocket_command(
@@ -168,8 +180,9 @@ async def websocket_domika_get_dashboards(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_get_dashboards_hash(
-    _hass: HomeAssistant,
+    hass: HomeAssistant,
     connection: ActiveConnection,
     msg: dict[str, Any],
 ) -> None:
@@ -187,8 +200,7 @@ async def websocket_domika_get_dashboards_hash(
 
     dashboards = None
     try:
-        async with database_core.get_session() as session:
-            dashboards = await dashboard_service.get(session, connection.user.id)
+        dashboards = await dashboard_service.get(hass, connection.user.id)
     except DomikaFrameworkBaseError as e:
         LOGGER.error(
             'Can\'t get dashboards hash for user "%s". Framework error. %s',
@@ -205,3 +217,143 @@ async def websocket_domika_get_dashboards_hash(
 
     connection.send_result(msg_id, result)
     LOGGER.debug("get_dashboards_hash msg_id=%s data=%s", msg_id, result)
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/patch_dashboards",
+        vol.Required("base_hash"): str,
+        vol.Required("hash"): str,
+        vol.Required("patch"): [dict],
+    },
+)
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_patch_dashboards(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika patch dashboards request.
+
+    Apply json patch to the dashboards with base_hash. If stored dashboards have another hash,
+    "hash_mismatch" error is sent, so the app can fall back to update_dashboards.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "patch_dashboards", msg_id is missing')
+        return
+
+    LOGGER.debug(
+        'Got websocket message "patch_dashboards", user: "%s", base_hash: %s, hash: %s',
+        connection.user.id,
+        msg.get("base_hash"),
+        msg.get("hash"),
+    )
+
+    base_hash = cast(str, msg.get("base_hash"))
+    hash_ = cast(str, msg.get("hash"))
+    user_id = connection.user.id
+
+    try:
+        async with database_core.get_session() as session:
+            applied = await dashboard_service.patch(
+                hass,
+                session,
+                base_hash,
+                hash_=hash_,
+                patch_=cast(list[dict[str, Any]], msg.get("patch")),
+                user_id=user_id,
+            )
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error('Can\'t patch dashboards for user "%s". Framework error. %s', user_id, e)
+        connection.send_error(msg_id, "unknown_error", "framework error")
+        return
+    except ValueError as e:
+        LOGGER.error('Can\'t patch dashboards for user "%s". %s', user_id, e)
+        connection.send_error(msg_id, "invalid_patch", str(e))
+        return
+    except Exception:  # noqa: BLE001
+        LOGGER.exception('Can\'t patch dashboards for user "%s". Unhandled error', user_id)
+        connection.send_error(msg_id, "unknown_error", "unhandled error")
+        return
+
+    if not applied:
+        LOGGER.debug("patch_dashboards msg_id=%s base hash mismatch", msg_id)
+        connection.send_error(msg_id, "hash_mismatch", "base hash mismatch")
+        return
+
+    connection.send_result(msg_id, {"result": "success"})
+    LOGGER.debug("patch_dashboards msg_id=%s data=%s", msg_id, {"result": "success"})
+
+    dashboard_flow.schedule_dashboard_update(hass, user_id, hash_, base_hash)
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/get_dashboards_patch",
+        vol.Required("hash"): str,
+        vol.Optional("accept_encoding", default=[ENCODING_IDENTITY]): [str],
+    },
+)
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_get_dashboards_patch(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika get dashboards patch request.
+
+    Send json patch from the dashboards with known hash to the current ones as
+    {"hash": ..., "patch": [...]}. If the known hash is not in patches history, send the whole
+    dashboards, same as get_dashboards does.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "get_dashboards_patch", msg_id is missing')
+        return
+
+    LOGGER.debug(
+        'Got websocket message "get_dashboards_patch", data: %s, user_id: %s',
+        msg,
+        connection.user.id,
+    )
+
+    dashboards = None
+    try:
+        dashboards = await dashboard_service.get(hass, connection.user.id)
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error(
+            'Can\'t get dashboards patch for user "%s". Framework error. %s',
+            connection.user.id,
+            e,
+        )
+    except Exception:  # noqa: BLE001
+        LOGGER.exception(
+            'Can\'t get dashboards patch for user "%s". Unhandled error',
+            connection.user.id,
+        )
+
+    if not dashboards:
+        connection.send_result(msg_id, {"dashboards": "", "hash": ""})
+        return
+
+    patch = dashboard_service.get_patch(
+        hass,
+        connection.user.id,
+        cast(str, msg.get("hash")),
+        dashboards.hash,
+    )
+    if patch is None:
+        _send_dashboards(
+            connection,
+            msg_id,
+            dashboards,
+            cast(list[str], msg.get("accept_encoding")),
+        )
+        LOGGER.debug("get_dashboards_patch msg_id=%s full dashboards sent", msg_id)
+        return
+
+    connection.send_result(msg_id, {"hash": dashboards.hash, "patch": patch})
+    LOGGER.debug("get_dashboards_patch msg_id=%s patch length=%s", msg_id, len(patch))
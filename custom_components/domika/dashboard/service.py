@@ -0,0 +1,238 @@
+"""Application dashboard service."""
+
+import asyncio
+from typing import Any
+from weakref import WeakValueDictionary
+
+from domika_ha_framework.dashboard.models import (
+    DomikaDashboardCreate,
+    DomikaDashboardRead,
+)
+import domika_ha_framework.dashboard.service as dashboard_service
+import domika_ha_framework.database.core as database_core
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes, json_dumps
+from homeassistant.util.json import json_loads
+
+from ..const import DOMAIN, EXECUTOR_ENCODING_MIN_SIZE
+from ..wire_format import service as wire_format_service
+from . import compression
+from .cache import (
+    DashboardCache,
+    DashboardCacheItem,
+    DashboardPatch,
+    DashboardPatchHistory,
+)
+from .patch import apply_patch
+
+
+def _get_cache(hass: HomeAssistant) -> DashboardCache | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("dashboard_cache")
+
+
+def _get_patch_history(hass: HomeAssistant) -> DashboardPatchHistory | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("dashboard_patches")
+
+
+def _get_lock(hass: HomeAssistant, user_id: str) -> asyncio.Lock:
+    """Get lock that serializes dashboards modifications of the user.
+
+    Locks are referenced by their holder and waiters only, so they are dropped when released.
+    """
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    locks: WeakValueDictionary[str, asyncio.Lock] = domain_data.setdefault(
+        "dashboard_locks",
+        WeakValueDictionary(),
+    )
+    if (lock := locks.get(user_id)) is None:
+        lock = asyncio.Lock()
+        locks[user_id] = lock
+    return lock
+
+
+def _create_cache_item(
+    stored: str,
+    hash_: str,
+    dashboards: str | None = None,
+) -> DashboardCacheItem:
+    if dashboards is None:
+        dashboards = compression.decompress(stored)
+
+    payload_zlib: bytes | None = None
+    if compression.is_compressed(stored):
+        payload_zlib = json_bytes(
+            {
+                "dashboards": compression.get_zlib_base64(stored),
+                "hash": hash_,
+                "encoding": compression.ENCODING_ZLIB,
+            },
+        )
+
+    return DashboardCacheItem(
+        hash=hash_,
+        payload=json_bytes(DomikaDashboardRead(dashboards=dashboards, hash=hash_).to_dict()),
+        payload_zlib=payload_zlib,
+    )
+
+
+def _apply_patch(payload: bytes, patch_: list[dict[str, Any]]) -> str:
+    """Get dashboards of the cached payload with the patch applied."""
+    dashboards: str = json_loads(payload)["dashboards"]
+    return json_dumps(apply_patch(json_loads(dashboards) if dashboards else None, patch_))
+
+
+def _encode(dashboards: str, hash_: str) -> tuple[str, DashboardCacheItem]:
+    """Get stored dashboards and their cache item."""
+    stored = compression.compress(dashboards)
+    return stored, _create_cache_item(stored, hash_, dashboards)
+
+
+async def get(hass: HomeAssistant, user_id: str) -> DashboardCacheItem:
+    """Get user dashboards.
+
+    Dashboards are served from the cache, database session is opened only on a cache miss.
+    Large dashboards are decompressed and serialized in the executor.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+        ValueError: if stored dashboards are corrupted.
+    """
+    cache = _get_cache(hass)
+    if cache is not None and (item := cache.get(user_id)):
+        return item
+
+    async with database_core.get_session() as session:
+        dashboards = await dashboard_service.get(session, user_id)
+    stored, hash_ = (dashboards.dashboards, dashboards.hash) if dashboards else ("", "")
+    item = await wire_format_service.async_run_encoding(
+        hass,
+        _create_cache_item,
+        stored,
+        hash_,
+        offload=len(stored) >= EXECUTOR_ENCODING_MIN_SIZE,
+    )
+
+    if cache is not None:
+        cache.set_if_missing(user_id, item)
+
+    return item
+
+
+async def create_or_update(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    dashboards: str,
+    hash_: str,
+    user_id: str,
+) -> None:
+    """Store user dashboards in the database and the cache.
+
+    Dashboards are stored compressed if it reduces their size.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    async with _get_lock(hass, user_id):
+        await _store(hass, db_session, dashboards, hash_, user_id)
+
+        # Patches can't be tracked through a full update.
+        if (patch_history := _get_patch_history(hass)) is not None:
+            patch_history.clear(user_id)
+
+
+async def patch(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    base_hash: str,
+    *,
+    hash_: str,
+    patch_: list[dict[str, Any]],
+    user_id: str,
+) -> bool:
+    """Apply json patch to user dashboards and store the result.
+
+    Large dashboards are decoded, patched and encoded in the executor.
+
+    Args:
+        hass: homeassistant core object.
+        db_session: sqlalchemy session.
+        base_hash: hash of the dashboards the patch was created against.
+        hash_: hash of the patched dashboards.
+        patch_: list of RFC 6902 operations.
+        user_id: homeassistant user id.
+
+    Returns:
+        True if patch applied, False if stored dashboards hash doesn't match base_hash.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+        ValueError: if patch can't be applied to stored dashboards.
+    """
+    async with _get_lock(hass, user_id):
+        current = await get(hass, user_id)
+        if current.hash != base_hash:
+            return False
+
+        patched = await wire_format_service.async_run_encoding(
+            hass,
+            _apply_patch,
+            current.payload,
+            patch_,
+            offload=len(current.payload) >= EXECUTOR_ENCODING_MIN_SIZE,
+        )
+        await _store(hass, db_session, patched, hash_, user_id)
+
+        if (patch_history := _get_patch_history(hass)) is not None:
+            patch_history.append(user_id, DashboardPatch(base_hash, hash_, patch_))
+
+    return True
+
+
+def get_patch(
+    hass: HomeAssistant,
+    user_id: str,
+    base_hash: str,
+    hash_: str,
+) -> list[dict[str, Any]] | None:
+    """Get json patch that turns user dashboards with base_hash into dashboards with hash_.
+
+    Returns:
+        list of RFC 6902 operations, or None if base_hash is unknown.
+
+    """
+    if base_hash == hash_:
+        return []
+
+    patch_history = _get_patch_history(hass)
+    return patch_history.get_patch(user_id, base_hash, hash_) if patch_history else None
+
+
+async def _store(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    dashboards: str,
+    hash_: str,
+    user_id: str,
+) -> None:
+    stored, item = await wire_format_service.async_run_encoding(
+        hass,
+        _encode,
+        dashboards,
+        hash_,
+        offload=len(dashboards) >= EXECUTOR_ENCODING_MIN_SIZE,
+    )
+    await dashboard_service.create_or_update(
+        db_session,
+        DomikaDashboardCreate(
+            dashboards=stored,
+            hash=hash_,
+            user_id=user_id,
+        ),
+    )
+
+    if (cache := _get_cache(hass)) is not None:
+        cache.set(user_id, item)
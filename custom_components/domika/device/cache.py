@@ -0,0 +1,131 @@
+"""Application device cache."""
+
+from collections.abc import Collection
+from dataclasses import dataclass, replace
+import uuid
+
+
+@dataclass(frozen=True)
+class CachedDevice:
+    """Snapshot of the application device database row."""
+
+    app_session_id: uuid.UUID
+    user_id: str
+    push_session_id: uuid.UUID | None
+    push_token_hash: str
+
+
+class DeviceCache:
+    """Devices by app session id and app session ids of the users devices.
+
+    Both are loaded lazily, after that devices are tracked with write-through updates.
+    """
+
+    def __init__(self) -> None:
+        self._devices: dict[uuid.UUID, CachedDevice] = {}
+        # Complete sets of app session ids of loaded users.
+        self._app_session_ids: dict[str, set[uuid.UUID]] = {}
+        # Incremented on every modification, so lazy loads can detect concurrent updates.
+        self.generation = 0
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._app_session_ids
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def get(self, app_session_id: uuid.UUID) -> CachedDevice | None:
+        """Get cached device."""
+        return self._devices.get(app_session_id)
+
+    def get_app_session_ids(self, user_id: str) -> list[uuid.UUID] | None:
+        """Get app session ids of the user devices, or None if the user is not loaded."""
+        app_session_ids = self._app_session_ids.get(user_id)
+        return None if app_session_ids is None else list(app_session_ids)
+
+    def load(self, user_id: str, app_session_ids: list[uuid.UUID], generation: int) -> None:
+        """Store app session ids of the user devices read from the database.
+
+        Values are ignored if the cache was modified since generation was taken.
+        """
+        if generation == self.generation:
+            self._app_session_ids[user_id] = set(app_session_ids)
+
+    def load_device(self, device: CachedDevice, generation: int) -> None:
+        """Store device read from the database.
+
+        Device is ignored if the cache was modified since generation was taken.
+        """
+        if generation == self.generation:
+            self._devices[device.app_session_id] = device
+
+    def set(self, device: CachedDevice) -> None:
+        """Track new or updated device."""
+        self.add(device.user_id, device.app_session_id)
+        self._devices[device.app_session_id] = device
+
+    def add(self, user_id: str, app_session_id: uuid.UUID) -> None:
+        """Track new or updated device of the user, which row is not known."""
+        self.generation += 1
+        # Device may be moved from another user.
+        device = self._devices.get(app_session_id)
+        if device and device.user_id != user_id:
+            del self._devices[app_session_id]
+        for other_user_id, app_session_ids in self._app_session_ids.items():
+            if other_user_id != user_id:
+                app_session_ids.discard(app_session_id)
+        if user_id in self._app_session_ids:
+            self._app_session_ids[user_id].add(app_session_id)
+
+    def reset_push_session(self, app_session_id: uuid.UUID) -> None:
+        """Track removal of the device push session."""
+        self.generation += 1
+        if device := self._devices.get(app_session_id):
+            self._devices[app_session_id] = replace(device, push_session_id=None)
+
+    def forget_push_sessions(self, push_session_ids: Collection[uuid.UUID] | None) -> None:
+        """Forget devices which push sessions could be changed outside of the integration.
+
+        Args:
+            push_session_ids: push session ids, or None to forget all devices with push session.
+
+        """
+        self.generation += 1
+        for app_session_id, device in list(self._devices.items()):
+            if device.push_session_id and (
+                push_session_ids is None or device.push_session_id in push_session_ids
+            ):
+                del self._devices[app_session_id]
+
+    def remove(self, app_session_id: uuid.UUID) -> None:
+        """Forget removed device."""
+        self.generation += 1
+        self._discard(app_session_id)
+
+    def remove_with_push_token_hash(self, push_token_hash: str, app_session_id: uuid.UUID) -> None:
+        """Forget devices with the push token hash, except the device with app session id.
+
+        Rows of the users devices may be not loaded, so users with such devices are forgotten, as
+        they could have the push token hash too.
+        """
+        self.generation += 1
+        for other_app_session_id, device in list(self._devices.items()):
+            if device.push_token_hash == push_token_hash and other_app_session_id != app_session_id:
+                self._discard(other_app_session_id)
+        for user_id, app_session_ids in list(self._app_session_ids.items()):
+            if any(
+                other_app_session_id != app_session_id and other_app_session_id not in self._devices
+                for other_app_session_id in app_session_ids
+            ):
+                del self._app_session_ids[user_id]
+
+    def clear(self) -> None:
+        """Forget all devices, e.g. after bulk removal."""
+        self.generation += 1
+        self._devices.clear()
+        self._app_session_ids.clear()
+
+    def _discard(self, app_session_id: uuid.UUID) -> None:
+        self._devices.pop(app_session_id, None)
+        for app_session_ids in self._app_session_ids.values():
+            app_session_ids.discard(app_session_id)
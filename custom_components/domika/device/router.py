@@ -1,6 +1,7 @@
 """Application device router."""
 
 import contextlib
+from functools import partial
 from typing import Any, cast
 import uuid
 
@@ -9,76 +10,27 @@ import domika_ha_framework.database.core as database_core
 import domika_ha_framework.device.flow as device_flow
 import domika_ha_framework.device.service as device_service
 from domika_ha_framework.errors import DomikaFrameworkBaseError
-from hass_nabucasa import Cloud
 import voluptuous as vol
 
-from homeassistant.components import network
-from homeassistant.components.cloud import (
-    DOMAIN as CLOUD_DOMAIN,
-    CloudNotAvailable,
-    async_remote_ui_url,
-)
-from homeassistant.components.hassio import is_hassio
-from homeassistant.components.hassio.coordinator import get_host_info
 from homeassistant.components.websocket_api.connection import ActiveConnection
 from homeassistant.components.websocket_api.decorators import (
     async_response,
     websocket_command,
 )
-from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from ..const import DOMAIN, LOGGER
+from ..ha_event import flow as ha_event_flow
+from ..ha_network import service as ha_network_service
+from ..metrics import service as metrics_service
+from ..subscription import service as subscription_service
+from . import service as domika_device_service
+from .worker_pool import WorkerPool
 
 
-async def _get_hass_network_properties(hass: HomeAssistant) -> dict:
-    instance_name = hass.config.location_name
-    cloud_url: str | None = None
-    certificate_fingerprint: str | None = None
-
-    port = hass.http.server_port
-
-    external_url = hass.config.external_url
-    internal_url = hass.config.internal_url
-
-    local_url: str | None = None
-
-    if is_hassio(hass) and (host_info := get_host_info(hass)):
-        local_url = f"http://{host_info['hostname']}.local:{port}"
-
-    if "cloud" in hass.config.components:
-        try:
-            cloud_url = async_remote_ui_url(hass)
-            if hass.data[CLOUD_DOMAIN]:
-                cloud: Cloud = hass.data[CLOUD_DOMAIN]
-                if cloud and cloud.remote.certificate:
-                    certificate_fingerprint = cloud.remote.certificate.fingerprint
-        except CloudNotAvailable:
-            cloud_url = None
-
-    announce_addresses = await network.async_get_announce_addresses(hass)
-    local_ip_port = (
-        f"http://{announce_addresses[0]}:{port}" if announce_addresses else None
-    )
-
-    result: dict[str, Any] = {
-        "instance_name": instance_name,
-        "local_ip_port": local_ip_port,
-        "local_url": local_url,
-        "external_url": external_url,
-        "internal_url": internal_url,
-        "cloud_url": cloud_url,
-        "certificate_fingerprint": certificate_fingerprint,
-    }
-
-    # Return without none values.
-    return {k: v for k, v in result.items() if v is not None}
-
-
-def _get_entry(hass: HomeAssistant) -> ConfigEntry | None:
+def _get_worker_pool(hass: HomeAssistant) -> WorkerPool | None:
     domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
-    return domain_data.get("entry")
+    return domain_data.get("device_worker_pool")
 
 
 def _check_app_compatibility(
@@ -104,6 +56,7 @@ def _check_app_compatibility(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_update_app_session(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -133,6 +86,7 @@ async def websocket_domika_update_app_session(
         app_session_id: uuid.UUID | None = None
         with contextlib.suppress(TypeError):
             app_session_id = uuid.UUID(msg.get("app_session_id"))
+        requested_app_session_id = app_session_id
 
         try:
             async with database_core.get_session() as session:
@@ -147,11 +101,19 @@ async def websocket_domika_update_app_session(
                 )
                 LOGGER.info('Successfully updated app session id "%s"', app_session_id)
 
+            domika_device_service.on_app_session_updated(
+                hass,
+                connection.user.id,
+                app_session_id,
+                requested_app_session_id,
+                push_token_hash,
+            )
+
             result = {
                 "app_session_id": str(app_session_id),
                 "old_app_session_ids": old_app_session_ids,
             }
-            result.update(await _get_hass_network_properties(hass))
+            result.update(await ha_network_service.get(hass))
         except DomikaFrameworkBaseError as e:
             LOGGER.error("Can't updated app session id. Framework error. %s", e)
             result = {
@@ -175,33 +137,32 @@ async def _check_push_token(
     push_token_hash: str,
 ) -> None:
     try:
-        async with database_core.get_session() as session:
-            device = await device_service.get(session, app_session_id)
-            if device:
-                if device.push_session_id and device.push_token_hash == push_token_hash:
-                    event_result = {
-                        "d.type": "push_activation",
-                        "push_activation_success": True,
-                    }
-                    LOGGER.info('Push token hash "%s" check. OK', push_token_hash)
-                else:
-                    event_result = {
-                        "d.type": "push_activation",
-                        "push_activation_success": False,
-                    }
-                    LOGGER.info(
-                        'Push token hash "%s" check. Need validation',
-                        push_token_hash,
-                    )
+        device = await domika_device_service.get(hass, app_session_id)
+        if device:
+            if device.push_session_id and device.push_token_hash == push_token_hash:
+                event_result = {
+                    "d.type": "push_activation",
+                    "push_activation_success": True,
+                }
+                LOGGER.info('Push token hash "%s" check. OK', push_token_hash)
             else:
                 event_result = {
                     "d.type": "push_activation",
                     "push_activation_success": False,
                 }
                 LOGGER.info(
-                    'Push token hash "%s" check. Device not found',
+                    'Push token hash "%s" check. Need validation',
                     push_token_hash,
                 )
+        else:
+            event_result = {
+                "d.type": "push_activation",
+                "push_activation_success": False,
+            }
+            LOGGER.info(
+                'Push token hash "%s" check. Device not found',
+                push_token_hash,
+            )
     except DomikaFrameworkBaseError as e:
         event_result = {
             "d.type": "push_activation",
@@ -233,6 +194,7 @@ async def _check_push_token(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_update_push_token(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -250,19 +212,21 @@ async def websocket_domika_update_push_token(
     connection.send_result(msg_id, {"result": "accepted"})
     LOGGER.debug("Update_push_token msg_id=%s data=%s", msg_id, {"result": "accepted"})
 
-    entry = _get_entry(hass)
-    if not entry:
-        LOGGER.debug("Update_push_token Error. Entry not found")
+    worker_pool = _get_worker_pool(hass)
+    if not worker_pool:
+        LOGGER.debug("Update_push_token Error. Worker pool not found")
         return
 
-    entry.async_create_task(
-        hass,
-        _check_push_token(
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+    await worker_pool.submit(
+        "check_push_token",
+        app_session_id,
+        partial(
+            _check_push_token,
             hass,
-            cast(uuid.UUID, msg.get("app_session_id")),
+            app_session_id,
             cast(str, msg.get("push_token_hash")),
         ),
-        "check_push_token",
     )
 
 
@@ -271,7 +235,7 @@ async def _remove_push_session(hass: HomeAssistant, app_session_id: uuid.UUID) -
         async with database_core.get_session() as session:
             push_session_id = await device_flow.remove_push_session(
                 session,
-                async_get_clientsession(hass),
+                metrics_service.get_push_server_session(hass),
                 app_session_id,
             )
             LOGGER.info('Push session "%s" successfully removed', push_session_id)
@@ -295,6 +259,10 @@ async def _remove_push_session(hass: HomeAssistant, app_session_id: uuid.UUID) -
     except Exception:  # noqa: BLE001
         LOGGER.exception("Can't remove push session. Unhandled error")
 
+    # Push session is removed from the device before the push server request, so it's gone even if
+    # the request failed.
+    domika_device_service.on_push_session_removed(hass, app_session_id)
+
 
 @websocket_command(
     {
@@ -303,6 +271,7 @@ async def _remove_push_session(hass: HomeAssistant, app_session_id: uuid.UUID) -
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_remove_push_session(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -324,15 +293,16 @@ async def websocket_domika_remove_push_session(
         {"result": "accepted"},
     )
 
-    entry = _get_entry(hass)
-    if not entry:
-        LOGGER.debug("Remove_push_session Error. Entry not found")
+    worker_pool = _get_worker_pool(hass)
+    if not worker_pool:
+        LOGGER.debug("Remove_push_session Error. Worker pool not found")
         return
 
-    entry.async_create_task(
-        hass,
-        _remove_push_session(hass, cast(uuid.UUID, msg.get("app_session_id"))),
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+    await worker_pool.submit(
         "remove_push_session",
+        app_session_id,
+        partial(_remove_push_session, hass, app_session_id),
     )
 
 
@@ -346,7 +316,7 @@ async def _create_push_session(
 ) -> None:
     try:
         await device_flow.create_push_session(
-            async_get_clientsession(hass),
+            metrics_service.get_push_server_session(hass),
             original_transaction_id,
             platform,
             environment,
@@ -411,6 +381,7 @@ async def _create_push_session(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_update_push_session(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -432,22 +403,24 @@ async def websocket_domika_update_push_session(
         {"result": "accepted"},
     )
 
-    entry = _get_entry(hass)
-    if not entry:
-        LOGGER.debug("Update_push_session Error. Entry not found")
+    worker_pool = _get_worker_pool(hass)
+    if not worker_pool:
+        LOGGER.debug("Update_push_session Error. Worker pool not found")
         return
 
-    entry.async_create_task(
-        hass,
-        _create_push_session(
+    app_session_id = cast(str, msg.get("app_session_id"))
+    await worker_pool.submit(
+        "create_push_session",
+        app_session_id,
+        partial(
+            _create_push_session,
             hass,
             cast(str, msg.get("original_transaction_id")),
             cast(str, msg.get("platform")),
             cast(str, msg.get("environment")),
             cast(str, msg.get("push_token_hex")),
-            cast(str, msg.get("app_session_id")),
+            app_session_id,
         ),
-        "create_push_session",
     )
 
 
@@ -457,7 +430,7 @@ async def _remove_app_session(hass: HomeAssistant, app_session_id: uuid.UUID) ->
             try:
                 push_session_id = await device_flow.remove_push_session(
                     session,
-                    async_get_clientsession(hass),
+                    metrics_service.get_push_server_session(hass),
                     app_session_id,
                 )
                 LOGGER.info(
@@ -489,6 +462,10 @@ async def _remove_app_session(hass: HomeAssistant, app_session_id: uuid.UUID) ->
 
             await device_service.delete(session, app_session_id)
             LOGGER.info('App session "%s" successfully removed', app_session_id)
+
+        domika_device_service.on_app_session_removed(hass, app_session_id)
+        ha_event_flow.on_app_session_removed(hass, app_session_id)
+        subscription_service.set_patterns(hass, app_session_id, [])
     except errors.DomikaFrameworkBaseError as e:
         LOGGER.error("Can't remove app session. Framework error. %s", e)
     except Exception:  # noqa: BLE001
@@ -502,6 +479,7 @@ async def _remove_app_session(hass: HomeAssistant, app_session_id: uuid.UUID) ->
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_remove_app_session(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -519,15 +497,16 @@ async def websocket_domika_remove_app_session(
     connection.send_result(msg_id, {"result": "accepted"})
     LOGGER.debug("remove_app_session msg_id=%s data=%s", msg_id, {"result": "accepted"})
 
-    entry = _get_entry(hass)
-    if not entry:
-        LOGGER.debug("Remove_app_session Error. Entry not found")
+    worker_pool = _get_worker_pool(hass)
+    if not worker_pool:
+        LOGGER.debug("Remove_app_session Error. Worker pool not found")
         return
 
-    entry.async_create_task(
-        hass,
-        _remove_app_session(hass, cast(uuid.UUID, msg.get("app_session_id"))),
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+    await worker_pool.submit(
         "remove_app_session",
+        app_session_id,
+        partial(_remove_app_session, hass, app_session_id),
     )
 
 
@@ -541,11 +520,18 @@ async def _verify_push_session(
         async with database_core.get_session() as session:
             push_session_id = await device_flow.verify_push_session(
                 session,
-                async_get_clientsession(hass),
+                metrics_service.get_push_server_session(hass),
                 app_session_id,
                 verification_key,
                 push_token_hash,
             )
+
+        domika_device_service.on_push_session_verified(
+            hass,
+            app_session_id,
+            push_session_id,
+            push_token_hash,
+        )
         LOGGER.info(
             'Verification key "%s" for application "%s" successfully verified. '
             'New push session id "%s". Push token hash "%s"',
@@ -609,6 +595,7 @@ async def _verify_push_session(
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_verify_push_session(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -630,18 +617,20 @@ async def websocket_domika_verify_push_session(
         {"result": "accepted"},
     )
 
-    entry = _get_entry(hass)
-    if not entry:
-        LOGGER.debug("Verify_push_session Error. Entry not found")
+    worker_pool = _get_worker_pool(hass)
+    if not worker_pool:
+        LOGGER.debug("Verify_push_session Error. Worker pool not found")
         return
 
-    entry.async_create_task(
-        hass,
-        _verify_push_session(
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+    await worker_pool.submit(
+        "verify_push_session",
+        app_session_id,
+        partial(
+            _verify_push_session,
             hass,
-            cast(uuid.UUID, msg.get("app_session_id")),
+            app_session_id,
             cast(str, msg.get("verification_key")),
             cast(str, msg.get("push_token_hash")),
         ),
-        "verify_push_session",
     )
@@ -0,0 +1,164 @@
+"""Application device service."""
+
+from collections.abc import Collection
+from dataclasses import replace
+from typing import Any
+import uuid
+
+import domika_ha_framework.database.core as database_core
+import domika_ha_framework.device.service as device_service
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import DOMAIN
+from .cache import CachedDevice, DeviceCache
+
+
+def _get_cache(hass: HomeAssistant) -> DeviceCache | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("device_cache")
+
+
+async def get(hass: HomeAssistant, app_session_id: uuid.UUID) -> CachedDevice | None:
+    """Get device by app session id.
+
+    Device is served from the cache, database session is opened only on a cache miss.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    cache = _get_cache(hass)
+    if cache is not None and (device := cache.get(app_session_id)):
+        return device
+
+    generation = cache.generation if cache is not None else 0
+    async with database_core.get_session() as session:
+        row = await device_service.get(session, app_session_id)
+        if not row:
+            return None
+        device = CachedDevice(
+            app_session_id=row.app_session_id,
+            user_id=row.user_id,
+            push_session_id=row.push_session_id,
+            push_token_hash=row.push_token_hash,
+        )
+
+    if cache is not None:
+        cache.load_device(device, generation)
+
+    return device
+
+
+async def get_app_session_ids_by_user_id(hass: HomeAssistant, user_id: str) -> list[uuid.UUID]:
+    """Get app session ids of the user devices.
+
+    Devices are served from the cache, database session is opened only on a cache miss.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    cache = _get_cache(hass)
+    if cache is not None and (app_session_ids := cache.get_app_session_ids(user_id)) is not None:
+        return app_session_ids
+
+    generation = cache.generation if cache is not None else 0
+    async with database_core.get_session() as session:
+        devices = await device_service.get_by_user_id(session, user_id)
+    app_session_ids = [device.app_session_id for device in devices]
+
+    if cache is not None:
+        cache.load(user_id, app_session_ids, generation)
+
+    return app_session_ids
+
+
+@callback
+def on_app_session_updated(
+    hass: HomeAssistant,
+    user_id: str,
+    app_session_id: uuid.UUID,
+    requested_app_session_id: uuid.UUID | None,
+    push_token_hash: str,
+) -> None:
+    """Update cached devices after update_app_session_id.
+
+    Args:
+        hass: homeassistant core object.
+        user_id: homeassistant user id.
+        app_session_id: resulting app session id.
+        requested_app_session_id: app session id sent by the app. If it differs from the resulting
+            one, it was removed or never existed, and the resulting device was created.
+        push_token_hash: push token hash sent by the app.
+
+    """
+    if (cache := _get_cache(hass)) is None:
+        return
+
+    if app_session_id == requested_app_session_id:
+        # Existing device only got its last_update changed.
+        cache.add(user_id, app_session_id)
+        return
+
+    if requested_app_session_id:
+        cache.remove(requested_app_session_id)
+    cache.set(
+        CachedDevice(
+            app_session_id=app_session_id,
+            user_id=user_id,
+            push_session_id=None,
+            push_token_hash=push_token_hash,
+        ),
+    )
+
+
+@callback
+def on_push_session_verified(
+    hass: HomeAssistant,
+    app_session_id: uuid.UUID,
+    push_session_id: uuid.UUID,
+    push_token_hash: str,
+) -> None:
+    """Update cached devices after push session verification."""
+    if (cache := _get_cache(hass)) is None:
+        return
+
+    device = cache.get(app_session_id)
+    # Verification removes other devices with the same push token hash.
+    if push_token_hash:
+        cache.remove_with_push_token_hash(push_token_hash, app_session_id)
+    if device:
+        cache.set(
+            replace(device, push_session_id=push_session_id, push_token_hash=push_token_hash),
+        )
+
+
+@callback
+def on_push_session_removed(hass: HomeAssistant, app_session_id: uuid.UUID) -> None:
+    """Update cached devices after push session removal."""
+    if (cache := _get_cache(hass)) is not None:
+        cache.reset_push_session(app_session_id)
+
+
+@callback
+def on_push_sessions_used(
+    hass: HomeAssistant,
+    push_session_ids: Collection[uuid.UUID] | None,
+) -> None:
+    """Forget devices which push sessions were used to send pushes.
+
+    Push server may reject a push session, and then it is removed from the device by the framework.
+
+    Args:
+        hass: homeassistant core object.
+        push_session_ids: used push session ids, or None if all push sessions could be used.
+
+    """
+    if (cache := _get_cache(hass)) is not None:
+        cache.forget_push_sessions(push_session_ids)
+
+
+@callback
+def on_app_session_removed(hass: HomeAssistant, app_session_id: uuid.UUID) -> None:
+    """Update cached devices after app session removal."""
+    if (cache := _get_cache(hass)) is not None:
+        cache.remove(app_session_id)
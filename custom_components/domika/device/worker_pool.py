@@ -0,0 +1,146 @@
+"""Application device worker pool."""
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import LOGGER
+
+type Job = Callable[[], Coroutine[Any, Any, None]]
+
+
+@dataclass
+class _OperationQueue:
+    limit: int
+    # Not started jobs by deduplication key, in submission order.
+    pending: OrderedDict[Hashable, Job] = field(default_factory=OrderedDict)
+    # Submitters waiting for free space in the queue.
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+    running: int = 0
+    max_depth: int = 0
+    submitted: int = 0
+    deduplicated: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+class WorkerPool:
+    """Bounded pool of workers for background device operations.
+
+    Every operation type has its own queue and concurrency limit. Submitters wait while the
+    queue of the operation is full. A queued job is replaced by a new one submitted with the same
+    key, e.g. app session id, so repeated requests are processed once.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        limits: dict[str, int],
+        max_queue_size: int,
+    ) -> None:
+        self._hass = hass
+        self._entry = entry
+        self._max_queue_size = max_queue_size
+        self._queues = {operation: _OperationQueue(limit) for operation, limit in limits.items()}
+        self._closed = False
+
+    async def submit(self, operation: str, key: Hashable, job: Job) -> None:
+        """Queue job, waiting for free space if the operation queue is full.
+
+        Args:
+            operation: operation type, one of the configured limits keys.
+            key: deduplication key.
+            job: coroutine function without arguments that performs the operation.
+
+        """
+        queue = self._queues[operation]
+        queue.submitted += 1
+
+        while True:
+            if self._closed:
+                LOGGER.debug('Worker pool closed, "%s" job for "%s" dropped', operation, key)
+                return
+
+            if key in queue.pending:
+                # Job keeps its place in the queue, but runs with the latest arguments.
+                queue.pending[key] = job
+                queue.deduplicated += 1
+                return
+
+            if len(queue.pending) < self._max_queue_size:
+                break
+
+            LOGGER.debug('"%s" queue is full, waiting for free space', operation)
+            waiter = self._hass.loop.create_future()
+            queue.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in queue.waiters:
+                    queue.waiters.remove(waiter)
+
+        queue.pending[key] = job
+        queue.max_depth = max(queue.max_depth, len(queue.pending))
+
+        if queue.running < queue.limit:
+            queue.running += 1
+            self._entry.async_create_task(
+                self._hass,
+                self._worker(operation, queue),
+                f"domika_{operation}_worker",
+            )
+
+    async def _worker(self, operation: str, queue: _OperationQueue) -> None:
+        try:
+            while queue.pending:
+                key, job = queue.pending.popitem(last=False)
+                self._wake_waiter(queue)
+                try:
+                    await job()
+                    queue.completed += 1
+                except Exception:  # noqa: BLE001
+                    queue.failed += 1
+                    LOGGER.exception('"%s" job for "%s" failed. Unhandled error', operation, key)
+        finally:
+            queue.running -= 1
+
+    @staticmethod
+    def _wake_waiter(queue: _OperationQueue) -> None:
+        while queue.waiters:
+            waiter = queue.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    @callback
+    def close(self) -> None:
+        """Drop not started jobs and reject new ones. Running jobs are not interrupted."""
+        self._closed = True
+        for queue in self._queues.values():
+            queue.pending.clear()
+            while queue.waiters:
+                waiter = queue.waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def get_metrics(self) -> dict[str, dict[str, int]]:
+        """Get queue depth and jobs counters of every operation type."""
+        return {
+            operation: {
+                "queue_depth": len(queue.pending),
+                "max_queue_depth": queue.max_depth,
+                "waiting": len(queue.waiters),
+                "running": queue.running,
+                "submitted": queue.submitted,
+                "deduplicated": queue.deduplicated,
+                "completed": queue.completed,
+                "failed": queue.failed,
+            }
+            for operation, queue in self._queues.items()
+        }
@@ -0,0 +1,143 @@
+"""Diagnostics support for Domika."""
+
+import hashlib
+from typing import Any
+import uuid
+
+import domika_ha_framework.database.core as database_core
+from domika_ha_framework.dashboard.models import Dashboard
+from domika_ha_framework.device.models import Device
+from domika_ha_framework.errors import DomikaFrameworkBaseError
+from domika_ha_framework.push_data.models import PushData
+from domika_ha_framework.subscription.models import Subscription
+import sqlalchemy
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import LOGGER, PUSH_SERVER_TIMEOUT, PUSH_SERVER_URL
+from .metrics import service as metrics_service
+from .subscription import service as subscription_service
+
+# App session ids authorize api requests, so they are replaced with pseudonyms too.
+TO_REDACT = {"app_session_id", "push_session_id", "push_token", "push_token_hash"}
+
+TABLES = {
+    "devices": Device,
+    "subscriptions": Subscription,
+    "push_data": PushData,
+    "dashboards": Dashboard,
+}
+
+
+def _pseudonymize(app_session_id: uuid.UUID) -> str:
+    """Get stable app session pseudonym, so it's matched across reports but not revealed."""
+    return hashlib.sha256(app_session_id.bytes).hexdigest()[:12]
+
+
+async def _get_table_rows() -> dict[str, int] | str:
+    """Count rows of the framework database tables.
+
+    Returns:
+        rows by table, or error description.
+
+    """
+    result: dict[str, int] = {}
+    try:
+        async with database_core.get_session() as session:
+            for table, model in TABLES.items():
+                stmt = sqlalchemy.select(sqlalchemy.func.count()).select_from(model)
+                result[table] = (await session.scalar(stmt)) or 0
+    except (DomikaFrameworkBaseError, SQLAlchemyError) as e:
+        LOGGER.error("Can't count database rows for diagnostics. %s", e)
+        return f"Database error. {e}"
+    return result
+
+
+def _get_caches(components: dict[str, Any]) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for cache_name, metrics in components.get("caches", {}).items():
+        cache = dict(metrics)
+        if "hits" in metrics:
+            lookups = metrics["hits"] + metrics["misses"]
+            cache["hit_rate"] = round(metrics["hits"] / lookups, 3) if lookups else None
+        result[cache_name] = cache
+    return result
+
+
+def _get_slow_operations(metrics: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "time": dt_util.utc_from_timestamp(operation["timestamp"]).isoformat(),
+            "name": operation["name"],
+            "labels": operation["labels"],
+            "duration": operation["duration"],
+        }
+        for operation in metrics["slow_operations"]
+    ]
+
+
+def _get_loop_watchdog(components: dict[str, Any]) -> dict[str, Any] | None:
+    if (watchdog := components.get("loop_watchdog")) is None:
+        return None
+    return {
+        **watchdog,
+        "stalls": [
+            {
+                "time": dt_util.utc_from_timestamp(stall["timestamp"]).isoformat(),
+                "lag": stall["lag"],
+                "handlers": stall["handlers"],
+            }
+            for stall in watchdog["stalls"]
+        ],
+    }
+
+
+def _get_push_server(metrics: dict[str, Any]) -> dict[str, Any]:
+    # There is no circuit breaker, every push is sent to the push server, so the state of the
+    # push server is shown by the recent requests results.
+    return {
+        "url": PUSH_SERVER_URL,
+        "timeout": PUSH_SERVER_TIMEOUT,
+        "requests": metrics["counters"].get(metrics_service.PUSH_SERVER_REQUESTS, []),
+        "duration": metrics["histograms"].get(metrics_service.PUSH_SERVER_REQUEST_DURATION, []),
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    metrics = metrics_service.as_dict(hass)
+    components = metrics["components"]
+
+    diagnostics = {
+        "entry": {"options": dict(entry.options)},
+        "queues": {
+            "device_worker_pool": components.get("device_worker_pool", {}),
+            "pending_push_data": components.get("pending_push_data"),
+        },
+        "caches": _get_caches(components),
+        "subscriptions": {
+            "index": components.get("subscription_index"),
+            "matcher": components.get("subscription_matcher"),
+            "app_sessions": {
+                _pseudonymize(app_session_id): counts
+                for app_session_id, counts in subscription_service.get_counts(hass).items()
+            },
+        },
+        "tables": await _get_table_rows(),
+        "push_server": _get_push_server(metrics),
+        "slow_operations": _get_slow_operations(metrics),
+        "loop_watchdog": _get_loop_watchdog(components),
+        "api_compression": components.get("api_compression"),
+        "metrics": {
+            "counters": metrics["counters"],
+            "histograms": metrics["histograms"],
+        },
+    }
+    return async_redact_data(diagnostics, TO_REDACT)
@@ -2,7 +2,6 @@
 
 from typing import Any, cast
 
-from domika_ha_framework.utils import flatten_json
 import voluptuous as vol
 
 from homeassistant.components.websocket_api.connection import ActiveConnection
@@ -12,7 +11,12 @@ from homeassistant.components.websocket_api.decorators import (
 )
 from homeassistant.core import HomeAssistant, callback
 
-from ..const import LOGGER
+from ..const import EXECUTOR_ENCODING_MIN_ENTITIES, LOGGER
+from ..ha_entity import service as ha_entity_service
+from ..ha_entity.cache import StateFragment
+from ..metrics import service as metrics_service
+from ..wire_format import service as wire_format_service
+from ..wire_format.service import FORMAT_JSON, FORMATS
 from .service import get, get_single
 
 
@@ -20,15 +24,20 @@ from .service import get, get_single
     {
         vol.Required("type"): "domika/entity_list",
         vol.Required("domains"): list[str],
+        vol.Optional("wire_format", default=FORMAT_JSON): vol.In(FORMATS),
     },
 )
-@callback
-def websocket_domika_entity_list(
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_entity_list(
     hass: HomeAssistant,
     connection: ActiveConnection,
     msg: dict[str, Any],
 ) -> None:
-    """Handle domika entity_list request."""
+    """Handle domika entity_list request.
+
+    Large lists are encoded in the executor, not to block the event loop.
+    """
     msg_id: int | None = msg.get("id")
     if msg_id is None:
         LOGGER.error('Got websocket message "entity_list", msg_id is missing')
@@ -40,7 +49,14 @@ def websocket_domika_entity_list(
     entities = get(hass, domains_list)
     result = entities.to_dict()
 
-    connection.send_result(msg_id, result)
+    await wire_format_service.async_send_result(
+        hass,
+        connection,
+        msg_id,
+        result,
+        msg["wire_format"],
+        offload=len(entities.entities) >= EXECUTOR_ENCODING_MIN_ENTITIES,
+    )
     LOGGER.debug("Entity_list msg_id=%s", msg_id)
 
 
@@ -51,6 +67,7 @@ def websocket_domika_entity_list(
     },
 )
 @callback
+@metrics_service.instrument_command
 def websocket_domika_entity_info(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -76,9 +93,11 @@ def websocket_domika_entity_info(
     {
         vol.Required("type"): "domika/entity_state",
         vol.Required("entity_id"): str,
+        vol.Optional("wire_format", default=FORMAT_JSON): vol.In(FORMATS),
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_entity_state(
     hass: HomeAssistant,
     connection: ActiveConnection,
@@ -94,23 +113,13 @@ async def websocket_domika_entity_state(
 
     entity_id = cast(str, msg.get("entity_id"))
     state = hass.states.get(entity_id)
-    result: tuple[dict, ...] = ({},)
+    result: tuple[dict | StateFragment, ...] = ({},)
     if state:
-        time_updated = max(state.last_changed, state.last_updated)
-        result = (
-            {
-                "entity_id": entity_id,
-                "time_updated": time_updated,
-                "attributes": flatten_json(
-                    state.as_compressed_state,
-                    exclude={"c", "lc", "lu"},
-                ),
-            },
-        )
+        result = (ha_entity_service.get_state_fragment(hass, state),)
     else:
         LOGGER.error(
             "Entity_state requesting state of unknown entity: %s",
             entity_id,
         )
-    connection.send_result(msg_id, result)
+    wire_format_service.send_result(connection, msg_id, result, msg["wire_format"])
     LOGGER.debug("Entity_state msg_id=%s data=%s", msg_id, result)
@@ -1,16 +1,12 @@
-"""Domika entity service."""
+"""Domika entity service.
+
+Domain integrations are imported by the capabilities of their entities, so they are loaded by
+then, and search is imported on the first entities request, not with the integration.
+"""
 
 from typing import cast
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
-from homeassistant.components.climate import ClimateEntityFeature
-from homeassistant.components.cover import CoverEntityFeature
-from homeassistant.components.light import (
-    ColorMode,
-    LightEntityFeature,
-    get_supported_color_modes,
-)
-from homeassistant.components.search import ItemType, Searcher
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.const import ATTR_DEVICE_CLASS, ATTR_FRIENDLY_NAME, Platform
 from homeassistant.core import HomeAssistant, State
@@ -25,6 +21,8 @@ from .models import DomikaEntitiesList, DomikaEntityInfo
 
 
 def _related(hass: HomeAssistant, root_entity_id: str) -> set[str]:
+    from homeassistant.components.search import ItemType, Searcher  # noqa: PLC0415
+
     searcher = Searcher(hass, hass_entity.entity_sources(hass))
     related_devices = searcher.async_search(ItemType.ENTITY, root_entity_id)
     if related_devices and "device" in related_devices:
@@ -36,6 +34,12 @@ def _related(hass: HomeAssistant, root_entity_id: str) -> set[str]:
 
 
 def _capabilities_light(hass: HomeAssistant, entity_id: str) -> set[str]:
+    from homeassistant.components.light import (  # noqa: PLC0415
+        ColorMode,
+        LightEntityFeature,
+        get_supported_color_modes,
+    )
+
     capabilities = set()
     supported_modes = get_supported_color_modes(hass, entity_id) or set()
     supported_features = hass_entity.get_supported_features(hass, entity_id)
@@ -67,6 +71,8 @@ def _capabilities_light(hass: HomeAssistant, entity_id: str) -> set[str]:
 
 
 def _capabilities_climate(hass: HomeAssistant, entity_id: str) -> set[str]:
+    from homeassistant.components.climate import ClimateEntityFeature  # noqa: PLC0415
+
     capabilities = set()
     supported_features = hass_entity.get_supported_features(hass, entity_id)
     if supported_features & ClimateEntityFeature.TARGET_TEMPERATURE:
@@ -81,6 +87,8 @@ def _capabilities_climate(hass: HomeAssistant, entity_id: str) -> set[str]:
 
 
 def _capabilities_cover(hass: HomeAssistant, entity_id: str) -> set[str]:
+    from homeassistant.components.cover import CoverEntityFeature  # noqa: PLC0415
+
     capabilities = set()
     supported_features = hass_entity.get_supported_features(
         hass, entity_id
@@ -164,6 +172,8 @@ def _related_area(hass: HomeAssistant, entity_id: str) -> str:
         if entity_entry.area_id:
             return entity_entry.area_id
 
+        from homeassistant.components.search import ItemType, Searcher  # noqa: PLC0415
+
         searcher = Searcher(hass, hass_entity.entity_sources(hass))
         related_devices = searcher.async_search(ItemType.ENTITY, entity_id)
         if related_devices and "device" in related_devices:
@@ -174,6 +184,8 @@ def _related_area(hass: HomeAssistant, entity_id: str) -> str:
 
 
 def _related_integrations(hass: HomeAssistant, entity_id: str) -> set:
+    from homeassistant.components.search import ItemType, Searcher  # noqa: PLC0415
+
     searcher = Searcher(hass, hass_entity.entity_sources(hass))
     related = searcher.async_search(ItemType.ENTITY, entity_id)
     if related and "integration" in related:
@@ -0,0 +1 @@
+"""Domika state changed events recorder."""
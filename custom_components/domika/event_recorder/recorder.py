@@ -0,0 +1,92 @@
+"""State changed events recorder."""
+
+from collections.abc import Iterable, Iterator
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util import dt as dt_util
+
+# Events are appended to the current file, which is renamed with the rotation time suffix when it
+# exceeds max size.
+CURRENT_FILE = "state_changed.jsonl.gz"
+ROTATED_FILES_PATTERN = "state_changed.*.jsonl.gz"
+
+
+def get_files(path: Path) -> list[Path]:
+    """Get recording files in the dir, from the oldest to the current."""
+    files = sorted(path.glob(ROTATED_FILES_PATTERN))
+    if (current := path / CURRENT_FILE).exists():
+        files.append(current)
+    return files
+
+
+def read_records(files: Iterable[Path]) -> Iterator[dict[str, Any]]:
+    """Read recorded events from the files in order."""
+    for file in files:
+        with gzip.open(file, "rb") as stream:
+            for line in stream:
+                yield json.loads(line)
+
+
+class EventRecorder:
+    """Append-only recorder of state changed events.
+
+    Events are buffered in memory and written by flushes in the executor, every flush appends a
+    gzip member to the current file, so the file is readable as a whole by gzip. Events are not
+    recorded while the buffer is full.
+
+    Record keys:
+        t: event fired time, seconds since epoch.
+        c: event context id.
+        e: entity id.
+        o: old compressed state, or None.
+        n: new compressed state, or None.
+    """
+
+    def __init__(self, path: Path, max_file_size: int, max_files: int, max_buffer: int) -> None:
+        self.path = path
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.max_buffer = max_buffer
+        self.recorded = 0
+        self.dropped = 0
+        self._buffer: list[dict[str, Any]] = []
+
+    def add(self, record: dict[str, Any]) -> None:
+        """Buffer record to be written by the next flush."""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(record)
+
+    def take(self) -> list[dict[str, Any]]:
+        """Take buffered records to write them, the caller counts them as recorded or dropped."""
+        records, self._buffer = self._buffer, []
+        return records
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        """Append records to the current file, and rotate it if it's full.
+
+        Does blocking I/O, must be run in the executor.
+
+        Raise:
+            OSError: if records can't be written.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        current = self.path / CURRENT_FILE
+        with gzip.open(current, "ab") as stream:
+            stream.writelines(json_bytes(record) + b"\n" for record in records)
+
+        if current.stat().st_size >= self.max_file_size:
+            self._rotate(current)
+
+    def _rotate(self, current: Path) -> None:
+        current.rename(
+            self.path / CURRENT_FILE.replace(".", f".{dt_util.utcnow():%Y%m%d_%H%M%S_%f}.", 1),
+        )
+        rotated = sorted(self.path.glob(ROTATED_FILES_PATTERN))
+        for file in rotated[: max(len(rotated) - self.max_files, 0)]:
+            file.unlink()
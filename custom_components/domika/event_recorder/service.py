@@ -0,0 +1,84 @@
+"""Event recorder service.
+
+Recording is opt-in, when it's disabled events are not buffered and nothing is written.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+
+from ..const import (
+    DOMAIN,
+    LOGGER,
+    RECORDER_DIR,
+    RECORDER_ENABLED,
+    RECORDER_FLUSH_INTERVAL,
+    RECORDER_MAX_BUFFER,
+    RECORDER_MAX_FILE_SIZE,
+    RECORDER_MAX_FILES,
+)
+from .recorder import EventRecorder
+
+
+def create_recorder(hass: HomeAssistant) -> EventRecorder | None:
+    """Create events recorder, None if recording is disabled."""
+    if not RECORDER_ENABLED:
+        return None
+    return EventRecorder(
+        Path(hass.config.path(RECORDER_DIR)),
+        RECORDER_MAX_FILE_SIZE,
+        RECORDER_MAX_FILES,
+        RECORDER_MAX_BUFFER,
+    )
+
+
+def get_recorder(hass: HomeAssistant) -> EventRecorder | None:
+    """Get events recorder, None if recording is disabled or the integration is not loaded."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("event_recorder")
+
+
+@callback
+def record(hass: HomeAssistant, event: Event[EventStateChangedData]) -> None:
+    """Record state changed event, if recording is enabled."""
+    if (recorder := get_recorder(hass)) is None:
+        return
+
+    old_state = event.data["old_state"]
+    new_state = event.data["new_state"]
+    recorder.add(
+        {
+            "t": event.time_fired_timestamp,
+            "c": event.context.id,
+            "e": event.data["entity_id"],
+            "o": old_state.as_compressed_state if old_state else None,
+            "n": new_state.as_compressed_state if new_state else None,
+        },
+    )
+
+
+async def flush(hass: HomeAssistant) -> None:
+    """Write buffered events, events which can't be written are counted as dropped."""
+    if (recorder := get_recorder(hass)) is None:
+        return
+
+    if records := recorder.take():
+        try:
+            await hass.async_add_executor_job(recorder.write, records)
+        except OSError as e:
+            recorder.dropped += len(records)
+            LOGGER.error("Can't write %s recorded events. %s", len(records), e)
+        else:
+            recorder.recorded += len(records)
+
+
+async def run_recorder(hass: HomeAssistant) -> None:
+    """Write buffered events periodically until cancelled."""
+    if get_recorder(hass) is None:
+        return
+
+    while True:
+        await asyncio.sleep(RECORDER_FLUSH_INTERVAL.total_seconds())
+        await flush(hass)
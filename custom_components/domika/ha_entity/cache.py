@@ -0,0 +1,95 @@
+"""HA entity state fragments cache."""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.helpers.json import json_fragment
+from homeassistant.util.json import json_loads_object
+
+
+class StateFragment:
+    """Serialized entity state, embedded into json responses without re-serialization.
+
+    Not a dataclass, as orjson serializes dataclasses by fields.
+    """
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: bytes) -> None:
+        self.payload = payload
+
+    @property
+    def size(self) -> int:
+        """Approximate memory footprint in bytes."""
+        return len(self.payload)
+
+    @property
+    def json_fragment(self) -> json_fragment:
+        """Get json fragment, used by homeassistant json encoder."""
+        return json_fragment(self.payload)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get deserialized state, used by non-json encoders."""
+        return json_loads_object(self.payload)
+
+
+@dataclass(frozen=True)
+class _CacheItem:
+    last_updated: float
+    fragment: StateFragment
+
+
+class StateFragmentCache:
+    """Serialized entities states by (entity_id, attributes filter) with LRU eviction by size.
+
+    Items are valid while entity state last_updated is unchanged, outdated items are replaced on
+    the next access.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._items: OrderedDict[Hashable, _CacheItem] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def size(self) -> int:
+        """Total size of cached fragments in bytes."""
+        return self._size
+
+    def get(self, key: Hashable, last_updated: float) -> StateFragment | None:
+        """Get fragment of the state updated at last_updated and mark it as recently used."""
+        item = self._items.get(key)
+        if item is None or item.last_updated != last_updated:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item.fragment
+
+    def set(self, key: Hashable, last_updated: float, fragment: StateFragment) -> None:
+        """Store fragment, evicting least recently used ones if needed."""
+        if (item := self._items.pop(key, None)) is not None:
+            self._size -= item.fragment.size
+
+        if fragment.size > self._max_size:
+            return
+
+        self._items[key] = _CacheItem(last_updated, fragment)
+        self._size += fragment.size
+
+        while self._size > self._max_size:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= evicted.fragment.size
+
+    def clear(self) -> None:
+        """Remove all cached fragments."""
+        self._items.clear()
+        self._size = 0
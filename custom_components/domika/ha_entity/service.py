@@ -1,16 +1,197 @@
 """HA entity service."""
 
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
+from functools import partial
+from typing import Any, cast
 import uuid
 
 import domika_ha_framework.subscription.service as subscription_service
 from domika_ha_framework.utils import flatten_json
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from homeassistant.core import async_get_hass
+from homeassistant.core import HomeAssistant, State, async_get_hass
+from homeassistant.helpers.json import json_bytes
 
-from ..const import LOGGER
-from .models import DomikaHaEntity
+from ..const import DOMAIN, EXECUTOR_ENCODING_MIN_ENTITIES, LOGGER
+from ..subscription.matcher import AttributeFilter
+from ..wire_format import service as wire_format_service
+from .cache import StateFragment, StateFragmentCache
+
+# Compressed state keys that are never sent to the app.
+EXCLUDED_STATE_KEYS = {"c", "lc", "lu"}
+
+
+def _get_prefixes(attributes: Collection[str]) -> set[str]:
+    prefixes: set[str] = set()
+    for attribute in attributes:
+        index = attribute.find(".")
+        while index != -1:
+            prefixes.add(attribute[:index])
+            index = attribute.find(".", index + 1)
+    return prefixes
+
+
+def get_flat_state(state: State, attributes: Collection[str] | None = None) -> dict[str, str]:
+    """Get flattened compressed state of the entity.
+
+    Args:
+        state: homeassistant entity state.
+        attributes: flattened names of the attributes to keep, e.g. "s" or "a.brightness". If
+            None, all attributes are kept.
+
+    Returns:
+        flattened state.
+
+    """
+    compressed_state = state.as_compressed_state
+    if attributes is None:
+        return flatten_json(compressed_state, exclude=EXCLUDED_STATE_KEYS)
+
+    # Skip not subscribed top level keys and attributes before flattening, as some of them (e.g.
+    # forecasts or media player source lists) are expensive to flatten.
+    attributes = set(attributes)
+    needed = attributes | _get_prefixes(attributes)
+    exclude = set(EXCLUDED_STATE_KEYS)
+    for key, value in compressed_state.items():
+        if key not in needed:
+            exclude.add(key)
+        elif isinstance(value, dict):
+            exclude.update(
+                f"{key}.{child}" for child in value if f"{key}.{child}" not in needed
+            )
+
+    flat_state = flatten_json(compressed_state, exclude=exclude)
+    return {k: v for (k, v) in flat_state.items() if k in attributes}
+
+
+def _get_filtered_state(state: State, attribute_filter: AttributeFilter) -> dict[str, str]:
+    if attribute_filter.match_all:
+        return get_flat_state(state)
+    if attribute_filter.prefixes:
+        return {k: v for k, v in get_flat_state(state).items() if attribute_filter.match(k)}
+    return get_flat_state(state, attribute_filter.names)
+
+
+type _Attributes = Collection[str] | AttributeFilter | None
+
+
+def _get_cache(hass: HomeAssistant) -> StateFragmentCache | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("state_fragment_cache")
+
+
+def _get_fragment_key(
+    state: State,
+    attributes: _Attributes,
+    *,
+    timestamp: bool,
+) -> tuple[Any, ...]:
+    return (
+        state.entity_id,
+        attributes
+        if attributes is None or isinstance(attributes, AttributeFilter)
+        else frozenset(attributes),
+        timestamp,
+    )
+
+
+def _build_fragment(state: State, attributes: _Attributes, *, timestamp: bool) -> StateFragment:
+    time_updated = max(state.last_changed, state.last_updated)
+    return StateFragment(
+        json_bytes(
+            {
+                "entity_id": state.entity_id,
+                "time_updated": time_updated.timestamp() if timestamp else time_updated,
+                "attributes": (
+                    _get_filtered_state(state, attributes)
+                    if isinstance(attributes, AttributeFilter)
+                    else get_flat_state(state, attributes)
+                ),
+            },
+        ),
+    )
+
+
+def _build_fragments(
+    items: list[tuple[State, _Attributes]],
+    *,
+    timestamp: bool,
+) -> list[StateFragment]:
+    return [_build_fragment(state, attributes, timestamp=timestamp) for state, attributes in items]
+
+
+def get_state_fragment(
+    hass: HomeAssistant,
+    state: State,
+    attributes: _Attributes = None,
+    *,
+    timestamp: bool = False,
+) -> StateFragment:
+    """Get serialized {"entity_id", "time_updated", "attributes"} of the entity state.
+
+    Fragments are cached until the state is updated, so the same state sent to several apps is
+    serialized once.
+
+    Args:
+        hass: homeassistant core object.
+        state: homeassistant entity state.
+        attributes: flattened names or filter of the attributes to keep, all if None.
+        timestamp: send time_updated as unix timestamp instead of iso formatted datetime.
+
+    Returns:
+        state fragment, embedded as is by homeassistant json encoder.
+
+    """
+    key = _get_fragment_key(state, attributes, timestamp=timestamp)
+    cache = _get_cache(hass)
+    if cache is not None and (fragment := cache.get(key, state.last_updated_timestamp)):
+        return fragment
+
+    fragment = _build_fragment(state, attributes, timestamp=timestamp)
+    if cache is not None:
+        cache.set(key, state.last_updated_timestamp, fragment)
+    return fragment
+
+
+async def async_get_state_fragments(
+    hass: HomeAssistant,
+    items: list[tuple[State, _Attributes]],
+    *,
+    timestamp: bool = False,
+) -> list[StateFragment]:
+    """Get state fragments of the (state, attributes) items, see get_state_fragment.
+
+    Fragments missing in the cache are built in the executor if there are many of them. States
+    are immutable, so they can be read outside of the event loop.
+    """
+    cache = _get_cache(hass)
+    result: list[StateFragment | None] = []
+    missing: list[int] = []
+    for state, attributes in items:
+        key = _get_fragment_key(state, attributes, timestamp=timestamp)
+        fragment = cache.get(key, state.last_updated_timestamp) if cache is not None else None
+        if fragment is None:
+            missing.append(len(result))
+        result.append(fragment)
+
+    if missing:
+        built = await wire_format_service.async_run_encoding(
+            hass,
+            partial(_build_fragments, timestamp=timestamp),
+            [items[index] for index in missing],
+            offload=len(missing) >= EXECUTOR_ENCODING_MIN_ENTITIES,
+        )
+        for index, fragment in zip(missing, built, strict=True):
+            result[index] = fragment
+            if cache is not None:
+                state, attributes = items[index]
+                cache.set(
+                    _get_fragment_key(state, attributes, timestamp=timestamp),
+                    state.last_updated_timestamp,
+                    fragment,
+                )
+
+    return cast(list[StateFragment], result)
 
 
 async def get(
@@ -19,11 +200,9 @@ async def get(
     *,
     need_push: bool | None = True,
     entity_id: str | None = None,
-) -> Sequence[DomikaHaEntity]:
+) -> Sequence[StateFragment]:
     """Get the attribute state of all entities from the subscription for the given app_session_id."""
-    result: list[DomikaHaEntity] = []
-
-    entities_attributes: dict[str, list[str]] = {}
+    entities_attributes: dict[str, set[str]] = {}
 
     subscriptions = await subscription_service.get(
         db_session,
@@ -37,31 +216,20 @@ async def get(
     #   "entity_id": ["attr1", "attr2"]
     # } noqa: ERA001
     for subscription in subscriptions:
-        entities_attributes.setdefault(subscription.entity_id, []).append(
+        entities_attributes.setdefault(subscription.entity_id, set()).add(
             subscription.attribute
         )
 
     hass = async_get_hass()
+    items: list[tuple[State, _Attributes]] = []
     for entity, attributes in entities_attributes.items():
         state = hass.states.get(entity)
         if state:
-            flat_state = flatten_json(
-                state.as_compressed_state,
-                exclude={"c", "lc", "lu"},
-            )
-            filtered_dict = {k: v for (k, v) in flat_state.items() if k in attributes}
-            domika_entity = DomikaHaEntity(
-                entity_id=entity,
-                time_updated=max(state.last_changed, state.last_updated).timestamp(),
-                attributes=filtered_dict,
-            )
-            result.append(
-                domika_entity,
-            )
+            items.append((state, attributes))
         else:
             LOGGER.error(
                 'Ha_entity.get is requesting state of unknown entity: "%s"',
                 entity,
             )
 
-    return result
+    return await async_get_state_fragments(hass, items, timestamp=True)
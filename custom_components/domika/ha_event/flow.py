@@ -1,18 +1,25 @@
 """HA event flow."""
 
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 import logging
+import time
+from typing import Any
 import uuid
 
+from domika_ha_framework import errors
 import domika_ha_framework.database.core as database_core
 from domika_ha_framework.errors import DomikaFrameworkBaseError
 import domika_ha_framework.push_data.flow as push_data_flow
 from domika_ha_framework.push_data.models import (
     DomikaPushDataCreate,
     DomikaPushedEvents,
+    PushData,
 )
 import domika_ha_framework.subscription.flow as subscription_flow
 from domika_ha_framework.utils import flatten_json
+import sqlalchemy
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from homeassistant.const import ATTR_DEVICE_CLASS
 from homeassistant.core import (
@@ -20,17 +27,29 @@ from homeassistant.core import (
     Event,
     EventStateChangedData,
     HomeAssistant,
+    callback,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from ..const import (
     CRITICAL_PUSH_ALERT_STRINGS,
+    DOMAIN,
     LOGGER,
     PUSH_DELAY_DEFAULT,
     PUSH_DELAY_FOR_DOMAIN,
 )
 from ..critical_sensor import service as critical_sensor_service
 from ..critical_sensor.enums import NotificationType
+from ..device import service as device_service
+from ..event_recorder import service as event_recorder_service
+from ..metrics import service as metrics_service
+from ..subscription import service as subscription_service
+from ..tracing import service as tracing_service
+from .pending import PendingPushData
+
+
+def _get_pending(hass: HomeAssistant) -> PendingPushData | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("pending_push_data")
 
 
 async def register_event(
@@ -38,17 +57,38 @@ async def register_event(
     event: Event[EventStateChangedData],
 ) -> None:
     """Register new incoming HA event."""
+    event_recorder_service.record(hass, event)
+    with (
+        metrics_service.track(hass, "state_changed", event.data),
+        metrics_service.measure(hass, metrics_service.REGISTER_EVENT_DURATION),
+        tracing_service.span(hass, event, "state_changed"),
+    ):
+        await _register_event(hass, event)
+
+
+async def _register_event(
+    hass: HomeAssistant,
+    event: Event[EventStateChangedData],
+) -> None:
     event_data: EventStateChangedData = event.data
 
     entity_id = event_data["entity_id"]
 
-    attributes = _get_changed_attributes_from_event_data(event_data)
+    with (
+        metrics_service.measure(hass, metrics_service.REGISTER_EVENT_STAGE_DURATION, "diff"),
+        tracing_service.span(hass, event, "diff") as diff_span,
+    ):
+        attributes = _get_changed_attributes_from_event_data(event_data)
+        diff_span["attributes"] = len(attributes)
 
     LOGGER.debug("Got event for entity: %s, attributes: %s", entity_id, attributes)
 
     if not attributes:
+        metrics_service.inc(hass, metrics_service.EVENTS, "filtered")
         return
 
+    metrics_service.inc(hass, metrics_service.EVENTS, "registered")
+
     # Check if it's a critical or warning binary sensor.
     notification_required = critical_sensor_service.check_notification_type(
         hass,
@@ -65,6 +105,7 @@ async def register_event(
 
     # Store events into db.
     event_id = uuid.uuid4()
+    timestamp = int(event.time_fired.timestamp() * 1e6)
     delay = await _get_delay_by_entity_id(hass, entity_id)
     events = [
         DomikaPushDataCreate(
@@ -73,7 +114,7 @@ async def register_event(
             attribute=attribute[0],
             value=attribute[1],
             context_id=event.context.id,
-            timestamp=int(event.time_fired.timestamp() * 1e6),
+            timestamp=timestamp,
             delay=delay,
         )
         for attribute in attributes
@@ -88,42 +129,155 @@ async def register_event(
         _get_critical_alert_payload(hass, entity_id) if critical_push_needed else {}
     )
 
+    attribute_names = [attribute[0] for attribute in attributes]
+
     try:
+        metrics_service.inc(hass, metrics_service.DB_SESSIONS, "register_event")
         async with database_core.get_session() as session:
-            # Get application id's associated with attributes.
-            app_session_ids = await subscription_flow.get_app_session_id_by_attributes(
-                session,
-                entity_id,
-                [attribute[0] for attribute in attributes],
-            )
+            with (
+                metrics_service.measure(
+                    hass,
+                    metrics_service.REGISTER_EVENT_STAGE_DURATION,
+                    "lookup",
+                ),
+                tracing_service.span(hass, event, "lookup") as lookup_span,
+            ):
+                # Get application id's associated with attributes.
+                app_session_ids = subscription_service.get_app_session_ids(
+                    hass,
+                    entity_id,
+                    attribute_names,
+                )
+
+                # Fall back to the database until subscriptions index is loaded.
+                if app_session_ids is None:
+                    app_session_ids = await subscription_flow.get_app_session_id_by_attributes(
+                        session,
+                        entity_id,
+                        attribute_names,
+                    )
+
+                # Add app sessions subscribed with patterns.
+                if pattern_app_session_ids := subscription_service.get_pattern_app_session_ids(
+                    hass,
+                    entity_id,
+                    attribute_names,
+                ):
+                    app_session_ids = list({*app_session_ids, *pattern_app_session_ids})
+
+                lookup_span["app_sessions"] = len(app_session_ids)
 
             # If any app_session_ids are subscribed for these attributes - fire the event to those
             # app_session_ids for app to catch.
             if app_session_ids:
-                _fire_event_to_app_session_ids(
+                with tracing_service.span(hass, event, "fan_out") as fan_out_span:
+                    _fire_event_to_app_session_ids(
+                        hass,
+                        event,
+                        event_id,
+                        entity_id,
+                        attributes,
+                        app_session_ids,
+                    )
+                    fan_out_span["app_sessions"] = len(app_session_ids)
+
+            # Critical push is sent along with storing events, so it's measured as push stage.
+            with (
+                metrics_service.measure(
                     hass,
-                    event,
-                    event_id,
-                    entity_id,
-                    attributes,
-                    app_session_ids,
+                    metrics_service.REGISTER_EVENT_STAGE_DURATION,
+                    "push" if critical_push_needed else "db",
+                ),
+                tracing_service.span(hass, event, "push" if critical_push_needed else "db"),
+            ):
+                pushed_events = await push_data_flow.register_event(
+                    session,
+                    metrics_service.get_push_server_session(hass),
+                    push_data=events,
+                    critical_push_needed=critical_push_needed,
+                    critical_alert_payload=critical_alert_payload,
                 )
-
-            pushed_events = await push_data_flow.register_event(
-                session,
-                async_get_clientsession(hass),
-                push_data=events,
-                critical_push_needed=critical_push_needed,
-                critical_alert_payload=critical_alert_payload,
-            )
             if LOGGER.isEnabledFor(logging.DEBUG):
                 _log_pushed_events(pushed_events)
+
+        _track_pending(hass, event_id, entity_id, attribute_names)
+        tracing_service.on_event_stored(hass, event, event_id, timestamp)
     except DomikaFrameworkBaseError:
+        metrics_service.inc(hass, metrics_service.EVENTS, "dropped")
         LOGGER.exception(
             "Can't register event entity: %s attributes %s. Framework error",
             entity_id,
             attributes,
         )
+    finally:
+        # Critical push is sent to every device with push session.
+        if critical_push_needed:
+            device_service.on_push_sessions_used(hass, None)
+
+
+def _track_pending(
+    hass: HomeAssistant,
+    event_id: uuid.UUID,
+    entity_id: str,
+    attributes: Iterable[str],
+) -> None:
+    """Track push data rows stored for app sessions subscribed to push of the attributes."""
+    pending = _get_pending(hass)
+    if pending is None:
+        return
+
+    app_session_attributes: dict[uuid.UUID, list[str]] = {}
+    for attribute in attributes:
+        app_session_ids = subscription_service.get_push_app_session_ids(hass, entity_id, attribute)
+        # Not known until subscriptions index is loaded, the next sweep will count them.
+        if app_session_ids is None:
+            return
+        for app_session_id in app_session_ids:
+            app_session_attributes.setdefault(app_session_id, []).append(attribute)
+
+    for app_session_id, app_session_attribute_names in app_session_attributes.items():
+        pending.add(app_session_id, entity_id, app_session_attribute_names, event_id)
+
+
+@callback
+def on_events_confirmed(
+    hass: HomeAssistant,
+    app_session_id: uuid.UUID,
+    event_ids: Iterable[uuid.UUID],
+) -> None:
+    """Update pending push data after events were confirmed by the app."""
+    if (pending := _get_pending(hass)) is not None:
+        pending.confirm(app_session_id, event_ids)
+
+
+@callback
+def on_app_session_removed(hass: HomeAssistant, app_session_id: uuid.UUID) -> None:
+    """Update pending push data after app session removal."""
+    if (pending := _get_pending(hass)) is not None:
+        pending.remove(app_session_id)
+
+
+async def _count_push_data(db_session: AsyncSession) -> int:
+    stmt = sqlalchemy.select(sqlalchemy.func.count()).select_from(PushData)
+    try:
+        return (await db_session.scalar(stmt)) or 0
+    except SQLAlchemyError as e:
+        raise errors.DatabaseError(str(e)) from e
+
+
+async def count_pending_push_data(hass: HomeAssistant) -> None:
+    """Read pending push data count from the database.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    pending = _get_pending(hass)
+    if pending is None:
+        return
+
+    metrics_service.inc(hass, metrics_service.DB_SESSIONS, "count_pending_push_data")
+    async with database_core.get_session() as session:
+        pending.reset(await _count_push_data(session))
 
 
 def _get_critical_alert_payload(hass: HomeAssistant, entity_id: str) -> dict:
@@ -144,12 +298,28 @@ def _get_critical_alert_payload(hass: HomeAssistant, entity_id: str) -> dict:
 
 async def push_registered_events(hass: HomeAssistant) -> None:
     """Push registered events to the push server."""
-    async with database_core.get_session() as session:
-        pushed_events = await push_data_flow.push_registered_events(
-            session, async_get_clientsession(hass)
+    pushed_events: list[DomikaPushedEvents] | None = None
+    try:
+        metrics_service.inc(hass, metrics_service.DB_SESSIONS, "push_registered_events")
+        async with database_core.get_session() as session:
+            start = time.monotonic()
+            pushed_events = await push_data_flow.push_registered_events(
+                session, metrics_service.get_push_server_session(hass)
+            )
+            tracing_service.on_events_pushed(hass, pushed_events, start, time.monotonic())
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                _log_pushed_events(pushed_events)
+
+            # Rows are counted once per sweep, not on every read of the pending count.
+            if (pending := _get_pending(hass)) is not None:
+                pending.reset(await _count_push_data(session))
+    finally:
+        device_service.on_push_sessions_used(
+            hass,
+            None
+            if pushed_events is None
+            else {pushed_event.push_session_id for pushed_event in pushed_events},
         )
-        if LOGGER.isEnabledFor(logging.DEBUG):
-            _log_pushed_events(pushed_events)
 
 
 def _log_pushed_events(
@@ -0,0 +1,57 @@
+"""Pending push data tracker."""
+
+from collections.abc import Iterable
+import uuid
+
+
+class PendingPushData:
+    """Number of push data rows waiting for the push, without counting them in the database.
+
+    The count is read from the database by every event pusher sweep, between sweeps rows stored
+    by registered events are tracked by (app_session_id, entity_id, attribute), as the database
+    does. Rows left by the sweep are not known individually, so they are not matched when updated
+    by newer events or confirmed by apps, and the count is approximate until the next sweep.
+    """
+
+    def __init__(self) -> None:
+        # Rows count after the last sweep, None if there was no sweep yet.
+        self.swept: int | None = None
+        # app_session_id -> (entity_id, attribute) -> event_id.
+        self._rows: dict[uuid.UUID, dict[tuple[str, str], uuid.UUID]] = {}
+
+    def get_count(self) -> int | None:
+        """Get pending rows count, None if it was not read from the database yet."""
+        if self.swept is None:
+            return None
+        return self.swept + sum(len(rows) for rows in self._rows.values())
+
+    def add(
+        self,
+        app_session_id: uuid.UUID,
+        entity_id: str,
+        attributes: Iterable[str],
+        event_id: uuid.UUID,
+    ) -> None:
+        """Track rows of the event stored for the app session."""
+        rows = self._rows.setdefault(app_session_id, {})
+        for attribute in attributes:
+            rows[entity_id, attribute] = event_id
+
+    def confirm(self, app_session_id: uuid.UUID, event_ids: Iterable[uuid.UUID]) -> None:
+        """Forget rows of the events confirmed by the app."""
+        rows = self._rows.get(app_session_id)
+        if not rows:
+            return
+
+        event_ids = set(event_ids)
+        for key in [key for key, event_id in rows.items() if event_id in event_ids]:
+            del rows[key]
+
+    def remove(self, app_session_id: uuid.UUID) -> None:
+        """Forget rows of the removed app session."""
+        self._rows.pop(app_session_id, None)
+
+    def reset(self, count: int) -> None:
+        """Set rows count read after the sweep."""
+        self.swept = count
+        self._rows.clear()
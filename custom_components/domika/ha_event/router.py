@@ -1,5 +1,6 @@
 """HA event router."""
 
+import time
 from typing import Any, cast
 import uuid
 
@@ -16,6 +17,9 @@ from homeassistant.components.websocket_api.decorators import (
 from homeassistant.core import HomeAssistant
 
 from ..const import LOGGER
+from ..metrics import service as metrics_service
+from ..tracing import service as tracing_service
+from . import flow as ha_event_flow
 
 
 @websocket_command(
@@ -26,8 +30,9 @@ from ..const import LOGGER
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_confirm_events(
-    _hass: HomeAssistant,
+    hass: HomeAssistant,
     connection: ActiveConnection,
     msg: dict[str, Any],
 ) -> None:
@@ -48,8 +53,11 @@ async def websocket_domika_confirm_events(
 
     if event_ids and app_session_id:
         try:
+            start = time.monotonic()
             async with database_core.get_session() as session:
                 await push_data_service.delete(session, event_ids, app_session_id)
+            ha_event_flow.on_events_confirmed(hass, app_session_id, event_ids)
+            tracing_service.on_events_confirmed(hass, event_ids, start, time.monotonic())
         except DomikaFrameworkBaseError as e:
             LOGGER.error(
                 'Can\'t confirm events "%s". Framework error. %s', event_ids, e
@@ -0,0 +1 @@
+"""HA network."""
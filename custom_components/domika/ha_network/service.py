@@ -0,0 +1,194 @@
+"""HA network service.
+
+Cloud and supervisor integrations are heavy to import and are not installed everywhere, so they
+are imported only when they are loaded by homeassistant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components import network
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.setup import async_when_setup
+
+from ..const import DOMAIN, LOGGER, NETWORK_PROPERTIES_TTL
+
+if TYPE_CHECKING:
+    from hass_nabucasa import Cloud
+
+    from homeassistant.components.cloud import CloudConnectionState
+
+CLOUD_DOMAIN = "cloud"
+HASSIO_DOMAIN = "hassio"
+
+
+@dataclass
+class _NetworkPropertiesCache:
+    properties: dict[str, Any]
+    expires_at: float
+
+
+async def _get_network_properties(hass: HomeAssistant) -> dict[str, Any]:
+    instance_name = hass.config.location_name
+    cloud_url: str | None = None
+    certificate_fingerprint: str | None = None
+
+    port = hass.http.server_port
+
+    external_url = hass.config.external_url
+    internal_url = hass.config.internal_url
+
+    local_url: str | None = None
+
+    if HASSIO_DOMAIN in hass.config.components:
+        from homeassistant.components.hassio.coordinator import (  # noqa: PLC0415
+            get_host_info,
+        )
+
+        if host_info := get_host_info(hass):
+            local_url = f"http://{host_info['hostname']}.local:{port}"
+
+    if CLOUD_DOMAIN in hass.config.components:
+        from homeassistant.components.cloud import (  # noqa: PLC0415
+            CloudNotAvailable,
+            async_remote_ui_url,
+        )
+
+        try:
+            cloud_url = async_remote_ui_url(hass)
+            if hass.data[CLOUD_DOMAIN]:
+                cloud: Cloud = hass.data[CLOUD_DOMAIN]
+                if cloud and cloud.remote.certificate:
+                    certificate_fingerprint = cloud.remote.certificate.fingerprint
+        except CloudNotAvailable:
+            cloud_url = None
+
+    announce_addresses = await network.async_get_announce_addresses(hass)
+    local_ip_port = f"http://{announce_addresses[0]}:{port}" if announce_addresses else None
+
+    result: dict[str, Any] = {
+        "instance_name": instance_name,
+        "local_ip_port": local_ip_port,
+        "local_url": local_url,
+        "external_url": external_url,
+        "internal_url": internal_url,
+        "cloud_url": cloud_url,
+        "certificate_fingerprint": certificate_fingerprint,
+    }
+
+    # Return without none values.
+    return {k: v for k, v in result.items() if v is not None}
+
+
+async def _refresh(hass: HomeAssistant, domain_data: dict[str, Any]) -> dict[str, Any]:
+    properties = await _get_network_properties(hass)
+
+    # Store result only if cache was not invalidated while properties were computed.
+    if domain_data.get("network_properties_task") is asyncio.current_task():
+        domain_data["network_properties"] = _NetworkPropertiesCache(
+            properties=properties,
+            expires_at=time.monotonic() + NETWORK_PROPERTIES_TTL.total_seconds(),
+        )
+        domain_data.pop("network_properties_task")
+
+    return properties
+
+
+async def get(hass: HomeAssistant) -> dict[str, Any]:
+    """Get homeassistant network properties.
+
+    Properties are cached until core config update, cloud connection state change or ttl
+    expiration. Concurrent requests share the same computation.
+
+    Args:
+        hass: homeassistant core object.
+
+    Returns:
+        network properties without None values.
+
+    """
+    domain_data: dict[str, Any] | None = hass.data.get(DOMAIN)
+    if domain_data is None:
+        return await _get_network_properties(hass)
+
+    cache: _NetworkPropertiesCache | None = domain_data.get("network_properties")
+    if cache and cache.expires_at > time.monotonic():
+        return dict(cache.properties)
+
+    task: asyncio.Task | None = domain_data.get("network_properties_task")
+    if task is None or task.done():
+        task = hass.async_create_task(
+            _refresh(hass, domain_data),
+            "domika_network_properties",
+        )
+        domain_data["network_properties_task"] = task
+
+    # Shield shared computation from cancellation of a single request.
+    return dict(await asyncio.shield(task))
+
+
+async def warm_up(hass: HomeAssistant) -> None:
+    """Fill network properties cache."""
+    try:
+        await get(hass)
+        LOGGER.debug("Network properties cache warmed up")
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Can't warm up network properties cache. Unhandled error")
+
+
+@callback
+def invalidate(hass: HomeAssistant) -> None:
+    """Drop cached network properties."""
+    domain_data: dict[str, Any] | None = hass.data.get(DOMAIN)
+    if domain_data:
+        domain_data.pop("network_properties", None)
+        domain_data.pop("network_properties_task", None)
+
+
+@callback
+def _on_core_config_update(hass: HomeAssistant, _event: Event) -> None:
+    LOGGER.debug("Core config updated. Network properties cache invalidated")
+    invalidate(hass)
+
+
+@callback
+def _on_cloud_connection_change(hass: HomeAssistant, state: CloudConnectionState) -> None:
+    LOGGER.debug("Cloud %s. Network properties cache invalidated", state.value)
+    invalidate(hass)
+
+
+async def _on_cloud_setup(entry: ConfigEntry, hass: HomeAssistant, _component: str) -> None:
+    # Entry may be unloaded before cloud is set up.
+    if entry.state not in (ConfigEntryState.SETUP_IN_PROGRESS, ConfigEntryState.LOADED):
+        return
+
+    from homeassistant.components.cloud import async_listen_connection_change  # noqa: PLC0415
+
+    entry.async_on_unload(
+        async_listen_connection_change(
+            hass,
+            partial(_on_cloud_connection_change, hass),
+        ),
+    )
+
+
+@callback
+def setup_invalidation(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Invalidate network properties cache on core config and cloud connection changes.
+
+    Cloud connection is listened once cloud is set up, if it ever is.
+    """
+    entry.async_on_unload(
+        hass.bus.async_listen(
+            EVENT_CORE_CONFIG_UPDATE,
+            partial(_on_core_config_update, hass),
+        ),
+    )
+    async_when_setup(hass, CLOUD_DOMAIN, partial(_on_cloud_setup, entry))
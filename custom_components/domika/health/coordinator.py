@@ -0,0 +1,161 @@
+"""Domika health coordinator."""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+import time
+from typing import Any
+import uuid
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from ..const import DB_NAME, DOMAIN, HEALTH_UPDATE_INTERVAL, LOGGER
+from ..metrics import service as metrics_service
+from ..metrics.registry import estimate_quantile
+
+APP_SESSION_EVENT_PREFIX = "domika_"
+
+
+@dataclass(frozen=True)
+class DomikaHealth:
+    """Domika health indicators, rates are measured over the last update interval."""
+
+    pending_push_data: int | None
+    # Bytes.
+    database_size: int | None
+    events_registered_per_minute: float | None
+    events_dropped_per_minute: float | None
+    # Percent of failed push server requests, None if there were no requests.
+    push_server_error_rate: float | None
+    connected_app_sessions: int
+    # Milliseconds, None if there were no registered events.
+    register_event_p95: float | None
+
+
+@dataclass(frozen=True)
+class _CountersSnapshot:
+    time: float
+    events_registered: float
+    events_dropped: float
+    push_server_requests: float
+    push_server_errors: float
+    register_event_buckets: Sequence[float]
+    register_event_counts: list[int]
+
+
+def _get_rates(previous: _CountersSnapshot, current: _CountersSnapshot) -> dict[str, Any]:
+    """Get rates of DomikaHealth measured between counters snapshots."""
+    minutes = (current.time - previous.time) / 60
+    if minutes <= 0:
+        return {}
+
+    result: dict[str, Any] = {
+        "events_registered_per_minute": round(
+            (current.events_registered - previous.events_registered) / minutes,
+            2,
+        ),
+        "events_dropped_per_minute": round(
+            (current.events_dropped - previous.events_dropped) / minutes,
+            2,
+        ),
+    }
+
+    if requests := current.push_server_requests - previous.push_server_requests:
+        errors = current.push_server_errors - previous.push_server_errors
+        result["push_server_error_rate"] = round(errors / requests * 100, 1)
+
+    p95 = estimate_quantile(
+        current.register_event_buckets,
+        [
+            count - previous_count
+            for count, previous_count in zip(
+                current.register_event_counts,
+                previous.register_event_counts,
+                strict=True,
+            )
+        ],
+        0.95,
+    )
+    if p95 is not None:
+        result["register_event_p95"] = round(p95 * 1000, 2)
+
+    return result
+
+
+class DomikaHealthCoordinator(DataUpdateCoordinator[DomikaHealth]):
+    """Domika health, collected from metrics counters without database queries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            name=f"{DOMAIN} health",
+            update_interval=HEALTH_UPDATE_INTERVAL,
+        )
+        self._previous: _CountersSnapshot | None = self._get_counters()
+
+    def _get_counters(self) -> _CountersSnapshot | None:
+        registry = metrics_service.get_registry(self.hass)
+        if registry is None:
+            return None
+
+        events = registry.counters[metrics_service.EVENTS]
+        push_server_requests = registry.counters[metrics_service.PUSH_SERVER_REQUESTS]
+        register_event = registry.histograms[metrics_service.REGISTER_EVENT_DURATION]
+
+        requests_count = 0.0
+        errors_count = 0.0
+        for (_method, _path, status), value in push_server_requests.get_values().items():
+            requests_count += value
+            # Failed to connect or got an error status.
+            if not status.isdigit() or int(status) >= HTTPStatus.BAD_REQUEST:
+                errors_count += value
+
+        return _CountersSnapshot(
+            time=time.monotonic(),
+            events_registered=events.get(("registered",)),
+            events_dropped=events.get(("dropped",)),
+            push_server_requests=requests_count,
+            push_server_errors=errors_count,
+            register_event_buckets=register_event.buckets,
+            register_event_counts=register_event.get_counts(),
+        )
+
+    def _count_connected_app_sessions(self) -> int:
+        """Count app sessions listening to their events, i.e. with connected app."""
+        count = 0
+        for event_type in self.hass.bus.async_listeners():
+            if not event_type.startswith(APP_SESSION_EVENT_PREFIX):
+                continue
+            try:
+                uuid.UUID(event_type.removeprefix(APP_SESSION_EVENT_PREFIX))
+            except ValueError:
+                continue
+            count += 1
+        return count
+
+    def _get_database_size(self) -> int | None:
+        try:
+            return Path(self.hass.config.path(DB_NAME)).stat().st_size
+        except OSError:
+            return None
+
+    async def _async_update_data(self) -> DomikaHealth:
+        previous = self._previous
+        current = self._previous = self._get_counters()
+        rates = _get_rates(previous, current) if previous and current else {}
+
+        domain_data: dict[str, Any] = self.hass.data.get(DOMAIN, {})
+        pending = domain_data.get("pending_push_data")
+
+        return DomikaHealth(
+            pending_push_data=pending.get_count() if pending is not None else None,
+            database_size=await self.hass.async_add_executor_job(self._get_database_size),
+            events_registered_per_minute=rates.get("events_registered_per_minute"),
+            events_dropped_per_minute=rates.get("events_dropped_per_minute"),
+            push_server_error_rate=rates.get("push_server_error_rate"),
+            connected_app_sessions=self._count_connected_app_sessions(),
+            register_event_p95=rates.get("register_event_p95"),
+        )
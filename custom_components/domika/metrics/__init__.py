@@ -0,0 +1 @@
+"""Domika metrics."""
@@ -0,0 +1,302 @@
+"""Metrics registry.
+
+Counters and histograms are plain in-memory values, updated on the event loop without locks.
+They are exported as a snapshot dict or in the Prometheus text exposition format.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass
+import time
+from typing import Any
+
+# Latency buckets in seconds, from sub-millisecond index lookups to push server timeouts.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+type Labels = tuple[str, ...]
+
+
+def estimate_quantile(buckets: Sequence[float], counts: Sequence[int], q: float) -> float | None:
+    """Estimate quantile by linear interpolation inside the bucket, as Prometheus does.
+
+    Args:
+        buckets: sorted buckets upper bounds.
+        counts: not cumulative counts of values in every bucket, and above the largest one.
+        q: quantile, from 0 to 1.
+
+    Returns:
+        estimated value, the largest bucket bound if it falls above it, or None if nothing
+        was observed.
+
+    """
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = q * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if not count or cumulative + count < rank:
+            cumulative += count
+            continue
+        if index == len(buckets):
+            return buckets[-1]
+        lower = buckets[index - 1] if index else 0.0
+        upper = buckets[index]
+        return lower + (upper - lower) * (rank - cumulative) / count
+    return buckets[-1]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+    def labels_dict(self, labels: Labels) -> dict[str, str]:
+        """Get label values by label names."""
+        return dict(zip(self.label_names, labels, strict=True))
+
+
+class Counter(_Metric):
+    """Monotonically increasing value for every combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), value: float = 1) -> None:
+        """Increase value of the labels."""
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def get(self, labels: Labels = ()) -> float:
+        """Get value of the labels."""
+        return self._values.get(labels, 0)
+
+    def get_values(self) -> dict[Labels, float]:
+        """Get values of all labels."""
+        return dict(self._values)
+
+    def as_dict(self) -> list[dict[str, Any]]:
+        """Get values snapshot."""
+        return [
+            {"labels": self.labels_dict(labels), "value": value}
+            for labels, value in self._values.items()
+        ]
+
+    def to_prometheus(self) -> Iterator[str]:
+        """Get lines in Prometheus text format."""
+        yield from self._header()
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, set from the current state of a component."""
+
+    kind = "gauge"
+
+    def set(self, labels: Labels, value: float) -> None:
+        """Set value of the labels."""
+        self._values[labels] = value
+
+
+class _HistogramValue:
+    __slots__ = ("count", "counts", "sum")
+
+    def __init__(self, buckets_count: int) -> None:
+        # Not cumulative, the last one counts values above the largest bucket.
+        self.counts = [0] * (buckets_count + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, for every combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[Labels, _HistogramValue] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """Account observed value of the labels."""
+        histogram_value = self._values.get(labels)
+        if histogram_value is None:
+            histogram_value = self._values[labels] = _HistogramValue(len(self.buckets))
+        histogram_value.counts[bisect_left(self.buckets, value)] += 1
+        histogram_value.count += 1
+        histogram_value.sum += value
+
+    def get_count(self, labels: Labels = ()) -> int:
+        """Get count of observed values of the labels."""
+        histogram_value = self._values.get(labels)
+        return histogram_value.count if histogram_value else 0
+
+    def get_sum(self, labels: Labels = ()) -> float:
+        """Get sum of observed values of the labels."""
+        histogram_value = self._values.get(labels)
+        return histogram_value.sum if histogram_value else 0.0
+
+    def get_counts(self, labels: Labels = ()) -> list[int]:
+        """Get not cumulative counts of values of the labels in every bucket, and above them."""
+        histogram_value = self._values.get(labels)
+        return list(histogram_value.counts) if histogram_value else [0] * (len(self.buckets) + 1)
+
+    def quantile(self, q: float, labels: Labels = ()) -> float | None:
+        """Estimate quantile of all values of the labels, see estimate_quantile."""
+        histogram_value = self._values.get(labels)
+        if not histogram_value:
+            return None
+        return estimate_quantile(self.buckets, histogram_value.counts, q)
+
+    def as_dict(self) -> list[dict[str, Any]]:
+        """Get values snapshot with estimated quantiles."""
+        return [
+            {
+                "labels": self.labels_dict(labels),
+                "count": histogram_value.count,
+                "sum": histogram_value.sum,
+                "p50": self.quantile(0.5, labels),
+                "p95": self.quantile(0.95, labels),
+                "p99": self.quantile(0.99, labels),
+            }
+            for labels, histogram_value in self._values.items()
+        ]
+
+    def to_prometheus(self) -> Iterator[str]:
+        """Get lines in Prometheus text format."""
+        yield from self._header()
+        bounds = [*self.buckets, float("inf")]
+        for labels, histogram_value in self._values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, histogram_value.counts, strict=True):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    (*self.label_names, "le"),
+                    (*labels, _format_value(bound)),
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            sample_labels = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{sample_labels} {_format_value(histogram_value.sum)}"
+            yield f"{self.name}_count{sample_labels} {histogram_value.count}"
+
+
+@dataclass(frozen=True, slots=True)
+class SlowOperation:
+    """Observed value above the slow operation threshold."""
+
+    name: str
+    labels: dict[str, str]
+    # Seconds.
+    duration: float
+    timestamp: float
+
+
+class MetricsRegistry:
+    """Named counters and histograms, with samples of recent slow operations."""
+
+    def __init__(
+        self,
+        slow_operation_threshold: float = float("inf"),
+        slow_operations_length: int = 0,
+    ) -> None:
+        self.counters: dict[str, Counter] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.slow_operation_threshold = slow_operation_threshold
+        self.slow_operations: deque[SlowOperation] = deque(maxlen=slow_operations_length)
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """Register counter."""
+        counter = self.counters[name] = Counter(name, documentation, label_names)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Register histogram."""
+        histogram = self.histograms[name] = Histogram(name, documentation, label_names, buckets)
+        return histogram
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Account value in the histogram, and keep a sample if it's a slow operation."""
+        histogram = self.histograms[name]
+        histogram.observe(value, labels)
+        if value >= self.slow_operation_threshold:
+            self.slow_operations.append(
+                SlowOperation(name, histogram.labels_dict(labels), value, time.time()),
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get snapshot of all metrics."""
+        return {
+            "counters": {name: counter.as_dict() for name, counter in self.counters.items()},
+            "histograms": {
+                name: histogram.as_dict() for name, histogram in self.histograms.items()
+            },
+            "slow_operations": [asdict(operation) for operation in self.slow_operations],
+        }
+
+    def to_prometheus(self) -> Iterator[str]:
+        """Get lines of all metrics in Prometheus text format."""
+        for counter in self.counters.values():
+            yield from counter.to_prometheus()
+        for histogram in self.histograms.values():
+            yield from histogram.to_prometheus()
@@ -0,0 +1,42 @@
+"""Metrics router."""
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.components.websocket_api.decorators import (
+    require_admin,
+    websocket_command,
+)
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import LOGGER
+from . import service as metrics_service
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/metrics",
+    },
+)
+@require_admin
+@callback
+@metrics_service.instrument_command
+def websocket_domika_metrics(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika metrics request.
+
+    Components snapshot describes integration internals, so it's available to admins only.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "metrics", msg_id is missing')
+        return
+
+    LOGGER.debug('Got websocket message "metrics", data: %s', msg)
+
+    connection.send_result(msg_id, metrics_service.as_dict(hass))
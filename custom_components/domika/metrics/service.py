@@ -0,0 +1,432 @@
+"""Metrics service."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import wraps
+import time
+from types import SimpleNamespace
+from typing import Any, Concatenate, cast
+
+import aiohttp
+from aiohttp import web
+
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession, async_get_clientsession
+from homeassistant.helpers.http import KEY_HASS, HomeAssistantView
+
+from ..const import (
+    DOMAIN,
+    LOGGER,
+    LOOP_WATCHDOG_INTERVAL,
+    LOOP_WATCHDOG_LAG_THRESHOLD,
+    LOOP_WATCHDOG_STALLS_LENGTH,
+    METRICS_SLOW_OPERATION_THRESHOLD,
+    METRICS_SLOW_OPERATIONS_LENGTH,
+)
+from .registry import Counter, Gauge, MetricsRegistry
+from .watchdog import LoopWatchdog
+
+WEBSOCKET_COMMAND_DURATION = "domika_websocket_command_duration_seconds"
+WEBSOCKET_COMMAND_ERRORS = "domika_websocket_command_errors_total"
+API_REQUEST_DURATION = "domika_api_request_duration_seconds"
+API_REQUESTS = "domika_api_requests_total"
+EVENTS = "domika_events_total"
+REGISTER_EVENT_DURATION = "domika_register_event_duration_seconds"
+REGISTER_EVENT_STAGE_DURATION = "domika_register_event_stage_duration_seconds"
+DB_SESSIONS = "domika_db_sessions_total"
+EVENT_PUSHER_SWEEPS = "domika_event_pusher_sweeps_total"
+EVENT_PUSHER_SWEEP_DURATION = "domika_event_pusher_sweep_duration_seconds"
+PUSH_SERVER_REQUESTS = "domika_push_server_requests_total"
+PUSH_SERVER_REQUEST_DURATION = "domika_push_server_request_duration_seconds"
+LOOP_LAG = "domika_loop_lag_seconds"
+LOOP_STALLS = "domika_loop_stalls_total"
+
+
+def create_registry() -> MetricsRegistry:
+    """Create registry with all Domika metrics."""
+    registry = MetricsRegistry(METRICS_SLOW_OPERATION_THRESHOLD, METRICS_SLOW_OPERATIONS_LENGTH)
+    registry.counter(
+        WEBSOCKET_COMMAND_ERRORS,
+        "Websocket commands failed with unhandled error.",
+        ("command",),
+    )
+    registry.counter(API_REQUESTS, "Api requests by response status.", ("view", "status"))
+    registry.counter(
+        EVENTS,
+        "State changed events, registered or filtered out as having no changed attributes.",
+        ("result",),
+    )
+    registry.counter(DB_SESSIONS, "Database sessions opened by events flow.", ("operation",))
+    registry.counter(EVENT_PUSHER_SWEEPS, "Event pusher sweeps by result.", ("result",))
+    registry.counter(
+        PUSH_SERVER_REQUESTS,
+        "Push server requests by response status, error if no response was received.",
+        ("method", "path", "status"),
+    )
+    registry.counter(
+        LOOP_STALLS,
+        "Event loop stalls by the longest running Domika handler, other if there was none.",
+        ("handler",),
+    )
+    registry.histogram(
+        WEBSOCKET_COMMAND_DURATION,
+        "Websocket commands handling time.",
+        ("command",),
+    )
+    registry.histogram(API_REQUEST_DURATION, "Api requests handling time.", ("view",))
+    registry.histogram(REGISTER_EVENT_DURATION, "State changed events registration time.")
+    registry.histogram(
+        REGISTER_EVENT_STAGE_DURATION,
+        "State changed events registration time by stage.",
+        ("stage",),
+    )
+    registry.histogram(EVENT_PUSHER_SWEEP_DURATION, "Event pusher sweeps time.")
+    registry.histogram(
+        PUSH_SERVER_REQUEST_DURATION,
+        "Push server requests time.",
+        ("method", "path"),
+    )
+    registry.histogram(LOOP_LAG, "Event loop lag measured by the watchdog.")
+    return registry
+
+
+def create_watchdog() -> LoopWatchdog:
+    """Create event loop watchdog."""
+    return LoopWatchdog(
+        LOOP_WATCHDOG_INTERVAL,
+        LOOP_WATCHDOG_LAG_THRESHOLD,
+        LOOP_WATCHDOG_STALLS_LENGTH,
+    )
+
+
+def get_registry(hass: HomeAssistant) -> MetricsRegistry | None:
+    """Get metrics registry, None if the integration is not loaded."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("metrics")
+
+
+def get_watchdog(hass: HomeAssistant) -> LoopWatchdog | None:
+    """Get event loop watchdog, None if the integration is not loaded."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("loop_watchdog")
+
+
+def inc(hass: HomeAssistant, name: str, *labels: str, value: float = 1) -> None:
+    """Increase counter value of the labels."""
+    if (registry := get_registry(hass)) is not None:
+        registry.counters[name].inc(labels, value)
+
+
+def observe(hass: HomeAssistant, name: str, value: float, *labels: str) -> None:
+    """Account value in histogram of the labels."""
+    if (registry := get_registry(hass)) is not None:
+        registry.observe(name, value, labels)
+
+
+@contextmanager
+def measure(hass: HomeAssistant, name: str, *labels: str) -> Iterator[None]:
+    """Account block execution time in histogram of the labels, even if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(hass, name, time.perf_counter() - start, *labels)
+
+
+def track(
+    hass: HomeAssistant,
+    name: str,
+    args: Mapping[str, Any] | None = None,
+) -> AbstractContextManager[None]:
+    """Track block execution as Domika handler run, so loop stalls are attributed to it.
+
+    Arguments are summarized only if a stall is attributed to the run.
+    """
+    if (watchdog := get_watchdog(hass)) is None:
+        return nullcontext()
+    return watchdog.track(name, args)
+
+
+async def run_watchdog(hass: HomeAssistant) -> None:
+    """Measure event loop lag until cancelled."""
+    watchdog = get_watchdog(hass)
+    if watchdog is None:
+        return
+
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(watchdog.interval)
+        lag = max(loop.time() - start - watchdog.interval, 0.0)
+        observe(hass, LOOP_LAG, lag)
+        if (stall := watchdog.check(lag)) is None:
+            continue
+
+        handler = stall.handlers[0].name if stall.handlers else "other"
+        inc(hass, LOOP_STALLS, handler)
+        LOGGER.debug(
+            "Event loop stalled for %.3fs, handlers: %s",
+            lag,
+            [f"{h.name}({h.args}) {h.duration:.3f}s" for h in stall.handlers],
+        )
+
+
+@contextmanager
+def _measure_command(hass: HomeAssistant, msg: dict[str, Any]) -> Iterator[None]:
+    command = msg["type"]
+    with (
+        track(hass, command, msg),
+        measure(hass, WEBSOCKET_COMMAND_DURATION, command),
+    ):
+        try:
+            yield
+        except Exception:
+            inc(hass, WEBSOCKET_COMMAND_ERRORS, command)
+            raise
+
+
+def instrument_command[T: Callable[..., Any]](func: T) -> T:
+    """Measure websocket command handler.
+
+    Must be the innermost decorator, so async handlers are measured until they are done, not
+    until they are scheduled by async_response.
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(
+            hass: HomeAssistant,
+            connection: ActiveConnection,
+            msg: dict[str, Any],
+        ) -> None:
+            with _measure_command(hass, msg):
+                await func(hass, connection, msg)
+
+        return cast(T, async_wrapper)
+
+    @wraps(func)
+    def wrapper(hass: HomeAssistant, connection: ActiveConnection, msg: dict[str, Any]) -> None:
+        with _measure_command(hass, msg):
+            func(hass, connection, msg)
+
+    return cast(T, wrapper)
+
+
+def instrument_view[V: HomeAssistantView, **P](
+    func: Callable[Concatenate[V, web.Request, P], Awaitable[web.StreamResponse]],
+) -> Callable[Concatenate[V, web.Request, P], Awaitable[web.StreamResponse]]:
+    """Measure api view method and count responses by status."""
+
+    @wraps(func)
+    async def wrapper(
+        view: V,
+        request: web.Request,
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> web.StreamResponse:
+        hass = request.app[KEY_HASS]
+        view_name = view.name or type(view).__name__
+        status = web.HTTPInternalServerError.status_code
+        try:
+            with measure(hass, API_REQUEST_DURATION, view_name):
+                response = await func(view, request, *args, **kwargs)
+            status = response.status
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            inc(hass, API_REQUESTS, view_name, str(status))
+        return response
+
+    return wrapper
+
+
+def _create_push_server_trace_config(hass: HomeAssistant) -> aiohttp.TraceConfig:
+    async def on_request_start(
+        _session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        _params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        context.start = time.perf_counter()
+
+    def account(context: SimpleNamespace, method: str, path: str, status: str) -> None:
+        duration = time.perf_counter() - context.start
+        observe(hass, PUSH_SERVER_REQUEST_DURATION, duration, method, path)
+        inc(hass, PUSH_SERVER_REQUESTS, method, path, status)
+
+    async def on_request_end(
+        _session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        account(context, params.method, params.url.path, str(params.response.status))
+
+    async def on_request_exception(
+        _session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams,
+    ) -> None:
+        account(context, params.method, params.url.path, "error")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def create_push_server_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Create http session measuring push server requests.
+
+    Must be called on config entry setup, session is detached when the entry is unloaded.
+    """
+    return async_create_clientsession(
+        hass,
+        trace_configs=[_create_push_server_trace_config(hass)],
+    )
+
+
+def get_push_server_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Get http session for push server requests."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    session: aiohttp.ClientSession | None = domain_data.get("push_server_session")
+    return session or async_get_clientsession(hass)
+
+
+def get_components_metrics(hass: HomeAssistant) -> dict[str, Any]:
+    """Get current state of Domika queues, caches and indexes."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    result: dict[str, Any] = {}
+
+    if (worker_pool := domain_data.get("device_worker_pool")) is not None:
+        result["device_worker_pool"] = worker_pool.get_metrics()
+
+    if (compression_metrics := domain_data.get("api_compression_metrics")) is not None:
+        result["api_compression"] = compression_metrics.as_dict()
+
+    caches: dict[str, Any] = {}
+    for cache_name in ("dashboard_cache", "state_fragment_cache"):
+        if (cache := domain_data.get(cache_name)) is not None:
+            caches[cache_name] = {
+                "entries": len(cache),
+                "size": cache.size,
+                "hits": cache.hits,
+                "misses": cache.misses,
+            }
+    if (device_cache := domain_data.get("device_cache")) is not None:
+        caches["device_cache"] = {"entries": len(device_cache)}
+    result["caches"] = caches
+
+    if (index := domain_data.get("subscription_index")) is not None:
+        result["subscription_index"] = {"subscriptions": len(index), "loaded": index.loaded}
+
+    if (matcher := domain_data.get("subscription_matcher")) is not None:
+        result["subscription_matcher"] = {"patterns": len(matcher)}
+
+    if (pending := domain_data.get("pending_push_data")) is not None:
+        result["pending_push_data"] = pending.get_count()
+
+    if (watchdog := domain_data.get("loop_watchdog")) is not None:
+        result["loop_watchdog"] = watchdog.as_dict()
+
+    return result
+
+
+def _get_components_gauges(components: dict[str, Any]) -> list[Counter]:
+    """Convert components metrics to Prometheus metrics."""
+    worker_queue_depth = Gauge(
+        "domika_device_worker_queue_depth",
+        "Device operations waiting for a worker.",
+        ("operation",),
+    )
+    worker_running = Gauge(
+        "domika_device_worker_running",
+        "Device operations being run.",
+        ("operation",),
+    )
+    worker_jobs = Counter(
+        "domika_device_worker_jobs_total",
+        "Device operations by state.",
+        ("operation", "state"),
+    )
+    for operation, metrics in components.get("device_worker_pool", {}).items():
+        worker_queue_depth.set((operation,), metrics["queue_depth"])
+        worker_running.set((operation,), metrics["running"])
+        for state in ("submitted", "deduplicated", "completed", "failed"):
+            worker_jobs.inc((operation, state), metrics[state])
+
+    compression_responses = Counter(
+        "domika_api_compression_responses_total",
+        "Api responses by encoding, identity if sent uncompressed.",
+        ("encoding",),
+    )
+    compression_bytes = Counter(
+        "domika_api_compression_bytes_total",
+        "Api responses size before and after compression.",
+        ("encoding", "kind"),
+    )
+    if (compression := components.get("api_compression")) is not None:
+        compression_responses.inc(("identity",), compression["skipped"])
+        for encoding, metrics in compression["encodings"].items():
+            compression_responses.inc((encoding,), metrics["responses"])
+            compression_bytes.inc((encoding, "original"), metrics["original_bytes"])
+            compression_bytes.inc((encoding, "compressed"), metrics["compressed_bytes"])
+
+    cache_entries = Gauge("domika_cache_entries", "Cached items.", ("cache",))
+    cache_size = Gauge("domika_cache_size_bytes", "Cached items size.", ("cache",))
+    cache_hits = Counter("domika_cache_hits_total", "Cache hits.", ("cache",))
+    cache_misses = Counter("domika_cache_misses_total", "Cache misses.", ("cache",))
+    for cache_name, metrics in components.get("caches", {}).items():
+        cache_entries.set((cache_name,), metrics["entries"])
+        if "size" in metrics:
+            cache_size.set((cache_name,), metrics["size"])
+            cache_hits.inc((cache_name,), metrics["hits"])
+            cache_misses.inc((cache_name,), metrics["misses"])
+
+    subscriptions = Gauge("domika_subscriptions", "Indexed entity attribute subscriptions.")
+    if (index := components.get("subscription_index")) is not None:
+        subscriptions.set((), index["subscriptions"])
+    patterns = Gauge("domika_subscription_patterns", "Pattern subscriptions.")
+    if (matcher := components.get("subscription_matcher")) is not None:
+        patterns.set((), matcher["patterns"])
+    pending = Gauge("domika_pending_push_data", "Push data rows waiting for the push.")
+    if (pending_count := components.get("pending_push_data")) is not None:
+        pending.set((), pending_count)
+    loop_max_lag = Gauge("domika_loop_max_lag_seconds", "Max event loop lag since start.")
+    if (watchdog := components.get("loop_watchdog")) is not None:
+        loop_max_lag.set((), watchdog["max_lag"])
+
+    return [
+        worker_queue_depth,
+        worker_running,
+        worker_jobs,
+        compression_responses,
+        compression_bytes,
+        cache_entries,
+        cache_size,
+        cache_hits,
+        cache_misses,
+        subscriptions,
+        patterns,
+        pending,
+        loop_max_lag,
+    ]
+
+
+def as_dict(hass: HomeAssistant) -> dict[str, Any]:
+    """Get snapshot of all metrics."""
+    registry = get_registry(hass) or MetricsRegistry()
+    return {**registry.as_dict(), "components": get_components_metrics(hass)}
+
+
+def to_prometheus(hass: HomeAssistant) -> str:
+    """Get all metrics in Prometheus text exposition format."""
+    lines: list[str] = []
+    if (registry := get_registry(hass)) is not None:
+        lines.extend(registry.to_prometheus())
+    for metric in _get_components_gauges(get_components_metrics(hass)):
+        lines.extend(metric.to_prometheus())
+    lines.append("")
+    return "\n".join(lines)
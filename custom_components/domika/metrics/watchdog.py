@@ -0,0 +1,147 @@
+"""Event loop lag watchdog."""
+
+from collections import deque
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import itertools
+import time
+from typing import Any
+
+# Message keys which are not arguments of the command.
+_IGNORED_ARGS = {"id", "type"}
+# Arguments with values safe to expose, others may be credentials or personal data, e.g.
+# app_session_id authorizes api requests, so only their type and size are summarized.
+_PLAIN_ARGS = {"entity_id", "wire_format", "filter_attributes"}
+# Summarized string arguments are truncated to this length.
+_MAX_STRING_LENGTH = 64
+# Max number of handlers a stall is attributed to.
+_MAX_STALL_HANDLERS = 3
+# Max number of finished handlers kept between watchdog ticks.
+_MAX_FINISHED_HANDLERS = 256
+
+
+def summarize_args(args: Mapping[str, Any]) -> str:
+    """Get short description of handler arguments, without payloads and secrets.
+
+    Values are kept for the known safe arguments only, other ones are described by their type
+    and size.
+    """
+    result: list[str] = []
+    for key, value in args.items():
+        if key in _IGNORED_ARGS:
+            continue
+        if isinstance(value, list | tuple | set | dict):
+            result.append(f"{key}=<{len(value)} items>")
+        elif key not in _PLAIN_ARGS:
+            size = f" {len(value)}" if isinstance(value, str | bytes) else ""
+            result.append(f"{key}=<{type(value).__name__}{size}>")
+        elif isinstance(value, str):
+            truncated = "..." if len(value) > _MAX_STRING_LENGTH else ""
+            result.append(f"{key}={value[:_MAX_STRING_LENGTH]}{truncated}")
+        else:
+            result.append(f"{key}={value!r}")
+    return ", ".join(result)
+
+
+@dataclass(slots=True)
+class _HandlerRun:
+    name: str
+    # Summarized only if the run is attributed to a stall.
+    args: Mapping[str, Any] | None
+    start: float
+    end: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class StalledHandler:
+    """Domika handler which was running while the loop was stalled."""
+
+    name: str
+    args: str
+    # Seconds. Handler run time, until the stall was detected if it's still running.
+    duration: float
+    running: bool
+
+
+@dataclass(frozen=True, slots=True)
+class LoopStall:
+    """Event loop lag exceeding the threshold."""
+
+    # Seconds since epoch.
+    timestamp: float
+    # Seconds.
+    lag: float
+    handlers: tuple[StalledHandler, ...]
+
+
+class LoopWatchdog:
+    """Measure event loop lag and attribute stalls to Domika handlers.
+
+    The watchdog sleeps for the interval and measures how late it wakes up. Handlers run while
+    the loop was late are the stall suspects: synchronous handlers block the loop for their
+    whole run, async handlers only between awaits, so running handlers are reported along with
+    their run time, longest first.
+    """
+
+    def __init__(self, interval: float, threshold: float, stalls_length: int) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: deque[LoopStall] = deque(maxlen=stalls_length)
+        self.max_lag = 0.0
+        self._running: dict[int, _HandlerRun] = {}
+        self._finished: deque[_HandlerRun] = deque(maxlen=_MAX_FINISHED_HANDLERS)
+        self._ids = itertools.count()
+
+    @contextmanager
+    def track(self, name: str, args: Mapping[str, Any] | None = None) -> Iterator[None]:
+        """Track block execution as Domika handler run with its arguments."""
+        run_id = next(self._ids)
+        run = _HandlerRun(name, args, time.monotonic())
+        self._running[run_id] = run
+        try:
+            yield
+        finally:
+            del self._running[run_id]
+            run.end = time.monotonic()
+            self._finished.append(run)
+
+    def check(self, lag: float) -> LoopStall | None:
+        """Account loop lag measured just now, get the stall if it exceeds the threshold."""
+        now = time.monotonic()
+        self.max_lag = max(self.max_lag, lag)
+        # The loop was expected to wake up the watchdog at this time.
+        stall_start = now - lag
+        finished = [run for run in self._finished if (run.end or now) >= stall_start]
+        self._finished.clear()
+
+        if lag < self.threshold:
+            return None
+
+        runs = [*finished, *self._running.values()]
+        runs.sort(key=lambda run: (run.end or now) - max(run.start, stall_start), reverse=True)
+        stall = LoopStall(
+            time.time(),
+            lag,
+            tuple(
+                StalledHandler(
+                    run.name,
+                    summarize_args(run.args) if run.args is not None else "",
+                    (run.end or now) - run.start,
+                    run.end is None,
+                )
+                for run in runs[:_MAX_STALL_HANDLERS]
+            ),
+        )
+        self.stalls.append(stall)
+        return stall
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get watchdog state."""
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "max_lag": self.max_lag,
+            "running_handlers": len(self._running),
+            "stalls": [asdict(stall) for stall in self.stalls],
+        }
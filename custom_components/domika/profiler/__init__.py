@@ -0,0 +1 @@
+"""Domika profiler."""
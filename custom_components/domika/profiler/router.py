@@ -0,0 +1,69 @@
+"""Profiler router."""
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.components.websocket_api.decorators import (
+    async_response,
+    require_admin,
+    websocket_command,
+)
+from homeassistant.core import HomeAssistant
+
+from ..const import (
+    LOGGER,
+    PROFILER_DEFAULT_DURATION,
+    PROFILER_MAX_DURATION,
+    PROFILER_TOP_FUNCTIONS,
+)
+from ..metrics import service as metrics_service
+from . import service as profiler_service
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/profile",
+        vol.Optional("duration", default=PROFILER_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float),
+            vol.Range(min=0.1, max=PROFILER_MAX_DURATION),
+        ),
+        vol.Optional("top", default=PROFILER_TOP_FUNCTIONS): vol.All(
+            int,
+            vol.Range(min=1, max=500),
+        ),
+    },
+)
+@require_admin
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_profile(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika profile request.
+
+    Profiles the event loop for the requested duration, and replies when it's done.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "profile", msg_id is missing')
+        return
+
+    LOGGER.debug('Got websocket message "profile", data: %s', msg)
+
+    try:
+        result = await profiler_service.profile(hass, msg["duration"], msg["top"])
+    except ValueError as e:
+        LOGGER.error("Can't start profiler. %s", e)
+        connection.send_error(msg_id, "profiler_busy", str(e))
+        return
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Can't profile. Unhandled error")
+        connection.send_error(msg_id, "unknown_error", "unhandled error")
+        return
+
+    connection.send_result(msg_id, result)
+    LOGGER.debug("Profile msg_id=%s path=%s", msg_id, result["path"])
@@ -0,0 +1,90 @@
+"""Profiler service.
+
+cProfile measures everything running on the event loop thread while the session is active, so
+the stats file describes the whole homeassistant process load. Top functions returned to the app
+are limited to Domika integration and framework code. Code run in the executor is not profiled.
+"""
+
+import asyncio
+import cProfile
+from pathlib import Path
+import pstats
+import time
+from typing import Any
+
+import domika_ha_framework
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from ..const import DOMAIN, LOGGER, PROFILER_DIR
+
+# Domika code paths, to scope top functions.
+SCOPES = (
+    str(Path(__file__).parents[1]),
+    str(Path(domika_ha_framework.__file__).parent),
+)
+
+
+def _get_top_functions(stats: pstats.Stats, top: int) -> list[dict[str, Any]]:
+    """Get Domika functions with the highest cumulative time."""
+    functions = [(key, value) for key, value in stats.stats.items() if key[0].startswith(SCOPES)]
+    functions.sort(key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "total_time": round(total_time, 6),
+            "cumulative_time": round(cumulative_time, 6),
+        }
+        for (filename, line, name), (_, calls, total_time, cumulative_time, _) in functions[:top]
+    ]
+
+
+def _save(profiler: cProfile.Profile, path: Path, top: int) -> list[dict[str, Any]]:
+    """Write stats file and get top functions."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(path)
+    return _get_top_functions(stats, top)
+
+
+async def profile(hass: HomeAssistant, duration: float, top: int) -> dict[str, Any]:
+    """Profile the event loop for duration seconds.
+
+    Stats file is written to PROFILER_DIR under the homeassistant config dir, and can be opened
+    with pstats or snakeviz.
+
+    Returns:
+        stats file path and top Domika functions by cumulative time.
+
+    Raise:
+        ValueError: if another profiling session is running.
+    """
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    if domain_data.get("profiler_running"):
+        msg = "Domika profiler is already running"
+        raise ValueError(msg)
+
+    profiler = cProfile.Profile()
+    # Raises ValueError if another profiler, e.g. homeassistant profiler integration, is enabled.
+    profiler.enable()
+    domain_data["profiler_running"] = True
+    start = time.perf_counter()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+        domain_data["profiler_running"] = False
+    elapsed = time.perf_counter() - start
+
+    path = Path(
+        hass.config.path(PROFILER_DIR, f"domika_{dt_util.utcnow():%Y%m%d_%H%M%S}.prof"),
+    )
+    functions = await hass.async_add_executor_job(_save, profiler, path, top)
+    LOGGER.info('Domika profile of %.1f seconds saved to "%s"', elapsed, path)
+    return {
+        "path": str(path),
+        "duration": round(elapsed, 3),
+        "functions": functions,
+    }
@@ -0,0 +1,128 @@
+"""Domika diagnostic sensors."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .health.coordinator import DomikaHealth, DomikaHealthCoordinator
+
+EVENTS_PER_MINUTE = "events/min"
+
+
+@dataclass(frozen=True, kw_only=True)
+class DomikaSensorEntityDescription(SensorEntityDescription):
+    """Domika diagnostic sensor description."""
+
+    value_fn: Callable[[DomikaHealth], float | int | None]
+
+
+SENSORS: tuple[DomikaSensorEntityDescription, ...] = (
+    DomikaSensorEntityDescription(
+        key="pending_push_data",
+        translation_key="pending_push_data",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda health: health.pending_push_data,
+    ),
+    DomikaSensorEntityDescription(
+        key="database_size",
+        translation_key="database_size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+        suggested_display_precision=1,
+        value_fn=lambda health: health.database_size,
+    ),
+    DomikaSensorEntityDescription(
+        key="events_registered_per_minute",
+        translation_key="events_registered_per_minute",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=EVENTS_PER_MINUTE,
+        value_fn=lambda health: health.events_registered_per_minute,
+    ),
+    DomikaSensorEntityDescription(
+        key="events_dropped_per_minute",
+        translation_key="events_dropped_per_minute",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=EVENTS_PER_MINUTE,
+        value_fn=lambda health: health.events_dropped_per_minute,
+    ),
+    DomikaSensorEntityDescription(
+        key="push_server_error_rate",
+        translation_key="push_server_error_rate",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda health: health.push_server_error_rate,
+    ),
+    DomikaSensorEntityDescription(
+        key="connected_app_sessions",
+        translation_key="connected_app_sessions",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda health: health.connected_app_sessions,
+    ),
+    DomikaSensorEntityDescription(
+        key="register_event_p95",
+        translation_key="register_event_p95",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        value_fn=lambda health: health.register_event_p95,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Domika diagnostic sensors."""
+    coordinator = DomikaHealthCoordinator(hass)
+    await coordinator.async_config_entry_first_refresh()
+
+    async_add_entities(
+        DomikaSensorEntity(coordinator, entry, description) for description in SENSORS
+    )
+
+
+class DomikaSensorEntity(CoordinatorEntity[DomikaHealthCoordinator], SensorEntity):
+    """Domika diagnostic sensor."""
+
+    entity_description: DomikaSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: DomikaHealthCoordinator,
+        entry: ConfigEntry,
+        description: DomikaSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="Domika",
+            manufacturer="DevPocket",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the sensor value."""
+        return self.entity_description.value_fn(self.coordinator.data)
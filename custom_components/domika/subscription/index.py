@@ -0,0 +1,176 @@
+"""Subscription data index."""
+
+from collections.abc import Iterable
+import uuid
+
+
+class SubscriptionIndex:
+    """In-memory copy of the subscriptions table.
+
+    Indexed by entity and attribute for events lookup, and by app session for updates. Index is
+    loaded once, after that it's updated along with the database, without full rebuilds.
+    """
+
+    def __init__(self) -> None:
+        # entity_id -> attribute -> app_session_id -> need_push.
+        self._entities: dict[str, dict[str, dict[uuid.UUID, bool]]] = {}
+        # app_session_id -> entity_id -> attribute -> need_push.
+        self._app_sessions: dict[uuid.UUID, dict[str, dict[str, bool]]] = {}
+        # Subscriptions versions of app sessions, known since integration start.
+        self._versions: dict[uuid.UUID, int] = {}
+        self.loaded = False
+        # Incremented on every modification, so loads can detect concurrent updates.
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return sum(
+            len(attributes)
+            for entities in self._app_sessions.values()
+            for attributes in entities.values()
+        )
+
+    def load(
+        self,
+        rows: Iterable[tuple[uuid.UUID, str, str, bool]],
+        generation: int,
+    ) -> bool:
+        """Fill index with (app_session_id, entity_id, attribute, need_push) database rows.
+
+        Returns:
+            False if the index was modified since generation was taken, so rows are stale.
+
+        """
+        if generation != self.generation:
+            return False
+
+        self._entities.clear()
+        self._app_sessions.clear()
+        for app_session_id, entity_id, attribute, need_push in rows:
+            self._add(app_session_id, entity_id, attribute, need_push=need_push)
+        self.loaded = True
+        return True
+
+    def get_app_session_ids(self, entity_id: str, attributes: Iterable[str]) -> list[uuid.UUID]:
+        """Get app sessions subscribed to any of the entity attributes."""
+        entity = self._entities.get(entity_id)
+        if not entity:
+            return []
+
+        result: set[uuid.UUID] = set()
+        for attribute in attributes:
+            if app_session_ids := entity.get(attribute):
+                result.update(app_session_ids)
+        return list(result)
+
+    def get_push_app_session_ids(self, entity_id: str, attribute: str) -> list[uuid.UUID]:
+        """Get app sessions subscribed to push notifications of the entity attribute."""
+        app_session_ids = self._entities.get(entity_id, {}).get(attribute, {})
+        return [
+            app_session_id for app_session_id, need_push in app_session_ids.items() if need_push
+        ]
+
+    def get_counts(self) -> dict[uuid.UUID, tuple[int, int]]:
+        """Get numbers of subscriptions and push subscriptions of every app session."""
+        return {
+            app_session_id: (
+                sum(len(attributes) for attributes in entities.values()),
+                sum(sum(attributes.values()) for attributes in entities.values()),
+            )
+            for app_session_id, entities in self._app_sessions.items()
+        }
+
+    def get_subscriptions(self, app_session_id: uuid.UUID) -> dict[str, dict[str, bool]]:
+        """Get subscriptions of the app session as entity_id -> attribute -> need_push."""
+        return {
+            entity_id: dict(attributes)
+            for entity_id, attributes in self._app_sessions.get(app_session_id, {}).items()
+        }
+
+    def set_subscriptions(
+        self,
+        app_session_id: uuid.UUID,
+        subscriptions: dict[str, dict[str, int]],
+    ) -> None:
+        """Replace all subscriptions of the app session."""
+        self.generation += 1
+        for entity_id, attributes in self._app_sessions.pop(app_session_id, {}).items():
+            for attribute in attributes:
+                self._discard(app_session_id, entity_id, attribute)
+        for entity_id, attributes in subscriptions.items():
+            for attribute, need_push in attributes.items():
+                self._add(app_session_id, entity_id, attribute, need_push=bool(need_push))
+
+    def set_push(self, app_session_id: uuid.UUID, subscriptions: dict[str, set[str]]) -> None:
+        """Set need_push for the given attributes of the app session, and reset for all others."""
+        self.generation += 1
+        for entity_id, attributes in self._app_sessions.get(app_session_id, {}).items():
+            for attribute in attributes:
+                need_push = attribute in subscriptions.get(entity_id, ())
+                attributes[attribute] = need_push
+                self._entities[entity_id][attribute][app_session_id] = need_push
+
+    def add(
+        self,
+        app_session_id: uuid.UUID,
+        entity_id: str,
+        attribute: str,
+        *,
+        need_push: bool,
+    ) -> None:
+        """Add or update subscription."""
+        self.generation += 1
+        self._add(app_session_id, entity_id, attribute, need_push=need_push)
+
+    def remove(self, app_session_id: uuid.UUID, entity_id: str, attribute: str) -> None:
+        """Remove subscription."""
+        self.generation += 1
+        attributes = self._app_sessions.get(app_session_id, {}).get(entity_id)
+        if attributes is None or attribute not in attributes:
+            return
+
+        del attributes[attribute]
+        if not attributes:
+            del self._app_sessions[app_session_id][entity_id]
+        if not self._app_sessions[app_session_id]:
+            del self._app_sessions[app_session_id]
+        self._discard(app_session_id, entity_id, attribute)
+
+    def get_version(self, app_session_id: uuid.UUID) -> int | None:
+        """Get subscriptions version of the app session, None if not known."""
+        return self._versions.get(app_session_id)
+
+    def next_version(self, app_session_id: uuid.UUID) -> int:
+        """Increment subscriptions version of the app session."""
+        version = self._versions.get(app_session_id, 0) + 1
+        self._versions[app_session_id] = version
+        return version
+
+    def forget_version(self, app_session_id: uuid.UUID) -> None:
+        """Forget subscriptions version, so the app has to resubscribe."""
+        self._versions.pop(app_session_id, None)
+
+    def _add(
+        self,
+        app_session_id: uuid.UUID,
+        entity_id: str,
+        attribute: str,
+        *,
+        need_push: bool,
+    ) -> None:
+        self._entities.setdefault(entity_id, {}).setdefault(attribute, {})[app_session_id] = (
+            need_push
+        )
+        self._app_sessions.setdefault(app_session_id, {}).setdefault(entity_id, {})[attribute] = (
+            need_push
+        )
+
+    def _discard(self, app_session_id: uuid.UUID, entity_id: str, attribute: str) -> None:
+        entity = self._entities.get(entity_id)
+        if entity is None or attribute not in entity:
+            return
+
+        entity[attribute].pop(app_session_id, None)
+        if not entity[attribute]:
+            del entity[attribute]
+        if not entity:
+            del self._entities[entity_id]
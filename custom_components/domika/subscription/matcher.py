@@ -0,0 +1,196 @@
+"""Subscription patterns matcher."""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+import uuid
+
+# Pattern selectors, exactly one of them is set in a pattern.
+SELECTORS = ("entity_id", "domain", "area_id", "device_id")
+
+type Pattern = dict[str, Any]
+type Resolver = Callable[[Pattern], Iterable[str]]
+
+
+@dataclass(frozen=True, slots=True)
+class AttributeFilter:
+    """Compiled attributes of a pattern.
+
+    "*" matches any attribute, "a.*" matches any attribute starting with "a.", other names are
+    matched exactly.
+    """
+
+    names: frozenset[str] = frozenset()
+    prefixes: tuple[str, ...] = ()
+    match_all: bool = False
+
+    @classmethod
+    def compile(cls, attributes: Iterable[str]) -> "AttributeFilter":
+        """Compile attributes list of a pattern."""
+        names: set[str] = set()
+        prefixes: set[str] = set()
+        for attribute in attributes:
+            if attribute == "*":
+                return cls(match_all=True)
+            if attribute.endswith(".*"):
+                prefixes.add(attribute[:-1])
+            else:
+                names.add(attribute)
+        return cls(frozenset(names), tuple(sorted(prefixes)))
+
+    def merge(self, other: "AttributeFilter") -> "AttributeFilter":
+        """Get filter matching attributes of both filters."""
+        if self.match_all or other.match_all:
+            return AttributeFilter(match_all=True)
+        return AttributeFilter(
+            self.names | other.names,
+            tuple(sorted({*self.prefixes, *other.prefixes})),
+        )
+
+    def match(self, attribute: str) -> bool:
+        """Check if the attribute matches the filter."""
+        return self.match_all or attribute in self.names or attribute.startswith(self.prefixes)
+
+    def match_any(self, attributes: Iterable[str]) -> bool:
+        """Check if any of the attributes matches the filter."""
+        return any(self.match(attribute) for attribute in attributes)
+
+
+class SubscriptionMatcher:
+    """Pattern subscriptions compiled for events lookup.
+
+    Entity, area and device patterns are resolved to entity ids, so they depend on entity and
+    device registries and must be recompiled when registries change. Domain patterns are looked
+    up by the domain of the event entity, so they match newly created entities as well.
+    """
+
+    def __init__(self) -> None:
+        # app_session_id -> patterns.
+        self._patterns: dict[uuid.UUID, list[Pattern]] = {}
+        # entity_id -> app_session_id -> attribute filter.
+        self._entities: dict[str, dict[uuid.UUID, AttributeFilter]] = {}
+        # domain -> app_session_id -> attribute filter.
+        self._domains: dict[str, dict[uuid.UUID, AttributeFilter]] = {}
+        # app_session_id -> entity ids of resolved patterns.
+        self._app_session_entities: dict[uuid.UUID, set[str]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(patterns) for patterns in self._patterns.values())
+
+    def get_patterns(self) -> dict[uuid.UUID, list[Pattern]]:
+        """Get patterns of all app sessions."""
+        return {
+            app_session_id: list(patterns) for app_session_id, patterns in self._patterns.items()
+        }
+
+    def load(self, patterns: dict[uuid.UUID, list[Pattern]], resolve: Resolver) -> None:
+        """Replace patterns of all app sessions."""
+        self._patterns = {
+            app_session_id: list(app_session_patterns)
+            for app_session_id, app_session_patterns in patterns.items()
+            if app_session_patterns
+        }
+        self.compile(resolve)
+
+    def compile(self, resolve: Resolver) -> None:
+        """Compile all patterns, resolving entity, area and device selectors with resolve."""
+        self._entities.clear()
+        self._domains.clear()
+        self._app_session_entities.clear()
+        for app_session_id, patterns in self._patterns.items():
+            self._compile(app_session_id, patterns, resolve)
+
+    def set_patterns(
+        self,
+        app_session_id: uuid.UUID,
+        patterns: list[Pattern],
+        resolve: Resolver,
+    ) -> None:
+        """Replace patterns of the app session."""
+        self._discard(app_session_id)
+        if patterns:
+            self._patterns[app_session_id] = list(patterns)
+            self._compile(app_session_id, patterns, resolve)
+        else:
+            self._patterns.pop(app_session_id, None)
+
+    def get_app_session_ids(self, entity_id: str, attributes: Iterable[str]) -> list[uuid.UUID]:
+        """Get app sessions which patterns match any of the entity attributes."""
+        entity = self._entities.get(entity_id)
+        domain = self._domains.get(entity_id.partition(".")[0]) if self._domains else None
+        if not entity and not domain:
+            return []
+
+        attributes = list(attributes)
+        result: set[uuid.UUID] = set()
+        for filters in (entity, domain):
+            if not filters:
+                continue
+            for app_session_id, attribute_filter in filters.items():
+                if app_session_id not in result and attribute_filter.match_any(attributes):
+                    result.add(app_session_id)
+        return list(result)
+
+    def get_entities(
+        self,
+        app_session_id: uuid.UUID,
+        get_domain_entity_ids: Callable[[str], Iterable[str]],
+    ) -> dict[str, AttributeFilter]:
+        """Get entities matched by patterns of the app session with their attribute filters.
+
+        Args:
+            app_session_id: application session id.
+            get_domain_entity_ids: returns ids of existing entities of the domain.
+
+        Returns:
+            entity_id -> attribute filter.
+
+        """
+        result = {
+            entity_id: self._entities[entity_id][app_session_id]
+            for entity_id in self._app_session_entities.get(app_session_id, ())
+        }
+        for pattern in self._patterns.get(app_session_id, ()):
+            if domain := pattern.get("domain"):
+                attribute_filter = self._domains[domain][app_session_id]
+                for entity_id in get_domain_entity_ids(domain):
+                    if entity_id in result:
+                        result[entity_id] = result[entity_id].merge(attribute_filter)
+                    else:
+                        result[entity_id] = attribute_filter
+        return result
+
+    def _compile(
+        self,
+        app_session_id: uuid.UUID,
+        patterns: list[Pattern],
+        resolve: Resolver,
+    ) -> None:
+        entity_ids = self._app_session_entities.setdefault(app_session_id, set())
+        for pattern in patterns:
+            attribute_filter = AttributeFilter.compile(pattern["attributes"])
+            if domain := pattern.get("domain"):
+                targets = [self._domains.setdefault(domain, {})]
+            else:
+                resolved = set(resolve(pattern))
+                entity_ids.update(resolved)
+                targets = [self._entities.setdefault(entity_id, {}) for entity_id in resolved]
+            for filters in targets:
+                if app_session_id in filters:
+                    filters[app_session_id] = filters[app_session_id].merge(attribute_filter)
+                else:
+                    filters[app_session_id] = attribute_filter
+        if not entity_ids:
+            del self._app_session_entities[app_session_id]
+
+    def _discard(self, app_session_id: uuid.UUID) -> None:
+        for entity_id in self._app_session_entities.pop(app_session_id, ()):
+            filters = self._entities[entity_id]
+            filters.pop(app_session_id, None)
+            if not filters:
+                del self._entities[entity_id]
+        for pattern in self._patterns.get(app_session_id, ()):
+            if (domain := pattern.get("domain")) and (filters := self._domains.get(domain)):
+                filters.pop(app_session_id, None)
+                if not filters:
+                    del self._domains[domain]
@@ -1,12 +1,11 @@
 """Subscription data router."""
 
+from collections.abc import Collection
 from typing import Any, cast
 import uuid
 
 import domika_ha_framework.database.core as database_core
 from domika_ha_framework.errors import DomikaFrameworkBaseError
-import domika_ha_framework.subscription.flow as subscription_flow
-from domika_ha_framework.utils import flatten_json
 import voluptuous as vol
 
 from homeassistant.components.websocket_api.connection import ActiveConnection
@@ -15,8 +14,63 @@ from homeassistant.components.websocket_api.decorators import (
     websocket_command,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
 
-from ..const import LOGGER
+from ..const import EXECUTOR_ENCODING_MIN_SIZE, LOGGER
+from ..ha_entity import service as ha_entity_service
+from ..ha_entity.cache import StateFragment
+from ..metrics import service as metrics_service
+from ..wire_format import service as wire_format_service
+from ..wire_format.service import FORMAT_JSON, FORMATS
+from . import service as subscription_service
+from .matcher import SELECTORS, AttributeFilter
+
+PATTERN_SCHEMA = vol.All(
+    {
+        **{vol.Exclusive(selector, "selector"): str for selector in SELECTORS},
+        vol.Required("attributes"): [str],
+    },
+    cv.has_at_least_one_key(*SELECTORS),
+)
+
+
+async def _get_states(
+    hass: HomeAssistant,
+    subscriptions: dict[str, Collection[str]],
+    msg_type: str,
+    *,
+    filter_attributes: bool,
+) -> list[StateFragment]:
+    items = []
+    for entity_id, attributes in subscriptions.items():
+        state = hass.states.get(entity_id)
+        if state:
+            items.append((state, attributes if filter_attributes else None))
+        else:
+            LOGGER.error(
+                "Websocket_domika_%s requesting state of unknown entity: %s",
+                msg_type,
+                entity_id,
+            )
+    return await ha_entity_service.async_get_state_fragments(hass, items)
+
+
+async def _get_pattern_states(
+    hass: HomeAssistant,
+    entities: dict[str, AttributeFilter],
+) -> list[StateFragment]:
+    return await ha_entity_service.async_get_state_fragments(
+        hass,
+        [
+            (state, attribute_filter)
+            for entity_id, attribute_filter in entities.items()
+            if (state := hass.states.get(entity_id))
+        ],
+    )
+
+
+def _is_large(fragments: list[StateFragment]) -> bool:
+    return sum(fragment.size for fragment in fragments) >= EXECUTOR_ENCODING_MIN_SIZE
 
 
 @websocket_command(
@@ -24,15 +78,23 @@ from ..const import LOGGER
         vol.Required("type"): "domika/resubscribe",
         vol.Required("app_session_id"): vol.Coerce(uuid.UUID),
         vol.Required("subscriptions"): dict[str, set],
+        vol.Optional("filter_attributes", default=False): bool,
+        vol.Optional("wire_format", default=FORMAT_JSON): vol.In(FORMATS),
     },
 )
 @async_response
+@metrics_service.instrument_command
 async def websocket_domika_resubscribe(
     hass: HomeAssistant,
     connection: ActiveConnection,
     msg: dict[str, Any],
 ) -> None:
-    """Handle domika resubscribe request."""
+    """Handle domika resubscribe request.
+
+    Result contains subscriptions version, which is used by update_subscriptions. If
+    filter_attributes is set, entities states contain subscribed attributes only. Result is
+    framed in wire_format if the app requests a binary format supported by the integration.
+    """
     msg_id: int | None = msg.get("id")
     if msg_id is None:
         LOGGER.error('Got websocket message "resubscribe", msg_id is missing')
@@ -41,33 +103,152 @@ async def websocket_domika_resubscribe(
     LOGGER.debug('Got websocket message "resubscribe", data: %s', msg)
     app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
 
-    res_list = []
     subscriptions = cast(dict[str, dict[str, int]], msg.get("subscriptions"))
-    for entity_id in subscriptions:
-        state = hass.states.get(entity_id)
-        if state:
-            time_updated = max(state.last_changed, state.last_updated)
-            res_list.append(
-                {
-                    "entity_id": entity_id,
-                    "time_updated": time_updated,
-                    "attributes": flatten_json(
-                        state.as_compressed_state,
-                        exclude={"c", "lc", "lu"},
-                    ),
-                },
-            )
-        else:
-            LOGGER.error(
-                "Websocket_domika_resubscribe requesting state of unknown entity: %s",
-                entity_id,
-            )
-    connection.send_result(msg_id, {"entities": res_list})
+    res_list = await _get_states(
+        hass,
+        subscriptions,
+        "resubscribe",
+        filter_attributes=cast(bool, msg.get("filter_attributes")),
+    )
+    version = subscription_service.next_version(hass, app_session_id)
+    await wire_format_service.async_send_result(
+        hass,
+        connection,
+        msg_id,
+        {"entities": res_list, "version": version},
+        msg["wire_format"],
+        offload=_is_large(res_list),
+    )
 
     try:
         async with database_core.get_session() as session:
-            await subscription_flow.resubscribe(session, app_session_id, subscriptions)
+            await subscription_service.resubscribe(
+                hass,
+                session,
+                app_session_id,
+                subscriptions,
+                version,
+            )
     except DomikaFrameworkBaseError as e:
         LOGGER.error('Can\'t resubscribe "%s". Framework error. %s', subscriptions, e)
     except Exception:  # noqa: BLE001
         LOGGER.exception('Can\'t resubscribe "%s". Unhandled error', subscriptions)
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/update_subscriptions",
+        vol.Required("app_session_id"): vol.Coerce(uuid.UUID),
+        vol.Required("version"): int,
+        vol.Optional("remove", default={}): {str: [str]},
+        vol.Optional("add", default={}): {str: {str: vol.Coerce(int)}},
+        vol.Optional("set_need_push", default={}): {str: {str: vol.Coerce(int)}},
+        vol.Optional("filter_attributes", default=False): bool,
+        vol.Optional("wire_format", default=FORMAT_JSON): vol.In(FORMATS),
+    },
+)
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_update_subscriptions(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika update subscriptions request.
+
+    Apply remove, add and set_need_push operations to the subscriptions with the given version.
+    Result contains new version and states of added entities, filtered by added attributes if
+    filter_attributes is set. If the version is outdated, "version_mismatch" error is sent, so
+    the app can fall back to resubscribe.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "update_subscriptions", msg_id is missing')
+        return
+
+    LOGGER.debug('Got websocket message "update_subscriptions", data: %s', msg)
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+
+    try:
+        async with database_core.get_session() as session:
+            version = await subscription_service.update(
+                hass,
+                session,
+                app_session_id,
+                cast(int, msg.get("version")),
+                {key: msg[key] for key in ("remove", "add", "set_need_push")},
+            )
+    except DomikaFrameworkBaseError as e:
+        LOGGER.error('Can\'t update subscriptions of "%s". Framework error. %s', app_session_id, e)
+        connection.send_error(msg_id, "unknown_error", "framework error")
+        return
+    except Exception:  # noqa: BLE001
+        LOGGER.exception('Can\'t update subscriptions of "%s". Unhandled error', app_session_id)
+        connection.send_error(msg_id, "unknown_error", "unhandled error")
+        return
+
+    if version is None:
+        LOGGER.debug("update_subscriptions msg_id=%s version mismatch", msg_id)
+        connection.send_error(msg_id, "version_mismatch", "subscriptions version mismatch")
+        return
+
+    res_list = await _get_states(
+        hass,
+        msg["add"],
+        "update_subscriptions",
+        filter_attributes=msg["filter_attributes"],
+    )
+    await wire_format_service.async_send_result(
+        hass,
+        connection,
+        msg_id,
+        {"entities": res_list, "version": version},
+        msg["wire_format"],
+        offload=_is_large(res_list),
+    )
+    LOGGER.debug("update_subscriptions msg_id=%s version=%s", msg_id, version)
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/subscribe_patterns",
+        vol.Required("app_session_id"): vol.Coerce(uuid.UUID),
+        vol.Required("patterns"): [PATTERN_SCHEMA],
+        vol.Optional("wire_format", default=FORMAT_JSON): vol.In(FORMATS),
+    },
+)
+@async_response
+@metrics_service.instrument_command
+async def websocket_domika_subscribe_patterns(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika subscribe patterns request.
+
+    Replace pattern subscriptions of the app session. Each pattern selects entities by one of
+    "entity_id", "domain", "area_id" or "device_id", and their "attributes", where "*" matches
+    any attribute and "a.*" any of the entity attributes. Pattern subscriptions are used for
+    state_changed events in addition to explicit subscriptions, push notifications are sent for
+    explicit subscriptions only. Result contains states of currently matched entities.
+    """
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "subscribe_patterns", msg_id is missing')
+        return
+
+    LOGGER.debug('Got websocket message "subscribe_patterns", data: %s', msg)
+    app_session_id = cast(uuid.UUID, msg.get("app_session_id"))
+
+    subscription_service.set_patterns(hass, app_session_id, msg["patterns"])
+    entities = subscription_service.get_pattern_entities(hass, app_session_id)
+    res_list = await _get_pattern_states(hass, entities)
+    await wire_format_service.async_send_result(
+        hass,
+        connection,
+        msg_id,
+        {"entities": res_list},
+        msg["wire_format"],
+        offload=_is_large(res_list),
+    )
+    LOGGER.debug("subscribe_patterns msg_id=%s entities=%s", msg_id, len(entities))
@@ -0,0 +1,482 @@
+"""Subscription data service."""
+
+import asyncio
+from collections.abc import Iterable, Sequence
+from functools import partial
+from typing import Any
+import uuid
+from weakref import WeakValueDictionary
+
+from domika_ha_framework import errors
+import domika_ha_framework.database.core as database_core
+import domika_ha_framework.subscription.flow as subscription_flow
+from domika_ha_framework.subscription.models import Subscription
+import sqlalchemy
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+
+from ..const import (
+    DOMAIN,
+    LOGGER,
+    SUBSCRIPTION_INDEX_LOAD_ATTEMPTS,
+    SUBSCRIPTION_MATCHER_RECOMPILE_DELAY,
+    SUBSCRIPTION_PATTERNS_SAVE_DELAY,
+    SUBSCRIPTION_PATTERNS_STORAGE_KEY,
+    SUBSCRIPTION_PATTERNS_STORAGE_VERSION,
+)
+from .index import SubscriptionIndex
+from .matcher import AttributeFilter, Pattern, SubscriptionMatcher
+
+
+def _get_index(hass: HomeAssistant) -> SubscriptionIndex | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("subscription_index")
+
+
+def _get_matcher(hass: HomeAssistant) -> SubscriptionMatcher | None:
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("subscription_matcher")
+
+
+def _get_lock(hass: HomeAssistant, app_session_id: uuid.UUID) -> asyncio.Lock:
+    """Get lock that serializes subscriptions modifications of the app session.
+
+    Locks are referenced by their holder and waiters only, so they are dropped when released.
+    """
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    locks: WeakValueDictionary[uuid.UUID, asyncio.Lock] = domain_data.setdefault(
+        "subscription_locks",
+        WeakValueDictionary(),
+    )
+    if (lock := locks.get(app_session_id)) is None:
+        lock = asyncio.Lock()
+        locks[app_session_id] = lock
+    return lock
+
+
+async def _get_all(db_session: AsyncSession) -> Sequence[tuple[uuid.UUID, str, str, bool]]:
+    stmt = sqlalchemy.select(
+        Subscription.app_session_id,
+        Subscription.entity_id,
+        Subscription.attribute,
+        Subscription.need_push,
+    )
+    try:
+        return [tuple(row) for row in (await db_session.execute(stmt)).all()]
+    except SQLAlchemyError as e:
+        raise errors.DatabaseError(str(e)) from e
+
+
+async def load_index(hass: HomeAssistant) -> None:
+    """Load subscriptions index from the database.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    index = _get_index(hass)
+    if index is None:
+        return
+
+    for _ in range(SUBSCRIPTION_INDEX_LOAD_ATTEMPTS):
+        generation = index.generation
+        async with database_core.get_session() as session:
+            rows = await _get_all(session)
+        if index.load(rows, generation):
+            LOGGER.debug("Subscriptions index loaded, %s subscriptions", len(index))
+            return
+
+    LOGGER.warning("Can't load subscriptions index. Subscriptions are changing too often")
+
+
+@callback
+def get_app_session_ids(
+    hass: HomeAssistant,
+    entity_id: str,
+    attributes: Iterable[str],
+) -> list[uuid.UUID] | None:
+    """Get app sessions subscribed to any of the entity attributes.
+
+    Returns:
+        app session ids, or None if subscriptions index is not loaded yet.
+
+    """
+    index = _get_index(hass)
+    if index is None or not index.loaded:
+        return None
+    return index.get_app_session_ids(entity_id, attributes)
+
+
+@callback
+def get_push_app_session_ids(
+    hass: HomeAssistant,
+    entity_id: str,
+    attribute: str,
+) -> list[uuid.UUID] | None:
+    """Get app sessions subscribed to push notifications of the entity attribute.
+
+    Returns:
+        app session ids, or None if subscriptions index is not loaded yet.
+
+    """
+    index = _get_index(hass)
+    if index is None or not index.loaded:
+        return None
+    return index.get_push_app_session_ids(entity_id, attribute)
+
+
+@callback
+def get_pattern_app_session_ids(
+    hass: HomeAssistant,
+    entity_id: str,
+    attributes: Iterable[str],
+) -> list[uuid.UUID]:
+    """Get app sessions which pattern subscriptions match any of the entity attributes."""
+    matcher = _get_matcher(hass)
+    return matcher.get_app_session_ids(entity_id, attributes) if matcher is not None else []
+
+
+@callback
+def get_pattern_entities(
+    hass: HomeAssistant,
+    app_session_id: uuid.UUID,
+) -> dict[str, AttributeFilter]:
+    """Get existing entities matched by pattern subscriptions of the app session."""
+    matcher = _get_matcher(hass)
+    if matcher is None:
+        return {}
+    return matcher.get_entities(app_session_id, hass.states.async_entity_ids)
+
+
+@callback
+def get_counts(hass: HomeAssistant) -> dict[uuid.UUID, dict[str, int]]:
+    """Get numbers of subscriptions, push subscriptions and patterns of every app session.
+
+    Subscriptions are counted in the index, so they are zero until it's loaded.
+    """
+    result: dict[uuid.UUID, dict[str, int]] = {}
+    if (index := _get_index(hass)) is not None:
+        for app_session_id, (subscriptions, push) in index.get_counts().items():
+            result[app_session_id] = {"subscriptions": subscriptions, "push": push, "patterns": 0}
+    if (matcher := _get_matcher(hass)) is not None:
+        for app_session_id, patterns in matcher.get_patterns().items():
+            counts = result.setdefault(
+                app_session_id,
+                {"subscriptions": 0, "push": 0, "patterns": 0},
+            )
+            counts["patterns"] = len(patterns)
+    return result
+
+
+@callback
+def set_patterns(
+    hass: HomeAssistant,
+    app_session_id: uuid.UUID,
+    patterns: list[Pattern],
+) -> None:
+    """Replace pattern subscriptions of the app session.
+
+    Args:
+        hass: homeassistant core object.
+        app_session_id: application session id.
+        patterns: dicts with one of "entity_id", "domain", "area_id", "device_id" selectors and
+            "attributes" list, which may contain "*" and "a.*" wildcards.
+    """
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    matcher: SubscriptionMatcher | None = domain_data.get("subscription_matcher")
+    store: Store | None = domain_data.get("subscription_patterns_store")
+    if matcher is None or store is None:
+        return
+
+    matcher.set_patterns(app_session_id, patterns, _get_resolver(hass))
+    store.async_delay_save(
+        partial(_serialize_patterns, matcher),
+        SUBSCRIPTION_PATTERNS_SAVE_DELAY.total_seconds(),
+    )
+
+
+async def setup_patterns(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Load pattern subscriptions and recompile them on registries changes."""
+    matcher = _get_matcher(hass)
+    if matcher is None:
+        return
+
+    store: Store[dict[str, list[Pattern]]] = Store(
+        hass,
+        SUBSCRIPTION_PATTERNS_STORAGE_VERSION,
+        SUBSCRIPTION_PATTERNS_STORAGE_KEY,
+    )
+    hass.data[DOMAIN]["subscription_patterns_store"] = store
+    try:
+        data = await store.async_load() or {}
+    except HomeAssistantError as e:
+        LOGGER.error("Can't load pattern subscriptions. %s", e)
+        data = {}
+    matcher.load(
+        {uuid.UUID(app_session_id): patterns for app_session_id, patterns in data.items()},
+        _get_resolver(hass),
+    )
+    LOGGER.debug("Pattern subscriptions loaded, %s patterns", len(matcher))
+
+    debouncer = Debouncer(
+        hass,
+        LOGGER,
+        cooldown=SUBSCRIPTION_MATCHER_RECOMPILE_DELAY.total_seconds(),
+        immediate=False,
+        function=partial(_recompile_matcher, hass),
+    )
+    entry.async_on_unload(debouncer.async_shutdown)
+    for event_type in (
+        er.EVENT_ENTITY_REGISTRY_UPDATED,
+        dr.EVENT_DEVICE_REGISTRY_UPDATED,
+        ar.EVENT_AREA_REGISTRY_UPDATED,
+    ):
+        entry.async_on_unload(
+            hass.bus.async_listen(event_type, partial(_on_registry_updated, debouncer)),
+        )
+
+
+@callback
+def _on_registry_updated(debouncer: Debouncer, _event: Event) -> None:
+    debouncer.async_schedule_call()
+
+
+@callback
+def _recompile_matcher(hass: HomeAssistant) -> None:
+    if (matcher := _get_matcher(hass)) is not None and len(matcher):
+        matcher.compile(_get_resolver(hass))
+        LOGGER.debug("Pattern subscriptions recompiled")
+
+
+@callback
+def _get_resolver(hass: HomeAssistant) -> partial[set[str]]:
+    return partial(_resolve, er.async_get(hass), dr.async_get(hass))
+
+
+def _resolve(
+    entity_registry: er.EntityRegistry,
+    device_registry: dr.DeviceRegistry,
+    pattern: Pattern,
+) -> set[str]:
+    """Get ids of entities selected by entity, device or area pattern."""
+    if entity_id := pattern.get("entity_id"):
+        return {entity_id}
+
+    if device_id := pattern.get("device_id"):
+        return {
+            entry.entity_id for entry in er.async_entries_for_device(entity_registry, device_id)
+        }
+
+    if area_id := pattern.get("area_id"):
+        # Entities without own area belong to the area of their device.
+        entity_ids = {
+            entry.entity_id for entry in er.async_entries_for_area(entity_registry, area_id)
+        }
+        for device in dr.async_entries_for_area(device_registry, area_id):
+            entity_ids.update(
+                entry.entity_id
+                for entry in er.async_entries_for_device(entity_registry, device.id)
+                if entry.area_id is None
+            )
+        return entity_ids
+
+    return set()
+
+
+def _serialize_patterns(matcher: SubscriptionMatcher) -> dict[str, list[Pattern]]:
+    return {
+        str(app_session_id): patterns for app_session_id, patterns in matcher.get_patterns().items()
+    }
+
+
+@callback
+def next_version(hass: HomeAssistant, app_session_id: uuid.UUID) -> int:
+    """Increment subscriptions version of the app session before full resubscribe."""
+    index = _get_index(hass)
+    return index.next_version(app_session_id) if index is not None else 0
+
+
+async def resubscribe(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    app_session_id: uuid.UUID,
+    subscriptions: dict[str, dict[str, int]],
+    version: int,
+) -> None:
+    """Replace all subscriptions of the app session.
+
+    Args:
+        hass: homeassistant core object.
+        db_session: sqlalchemy session.
+        app_session_id: application session id.
+        subscriptions: entity_id -> attribute -> need_push.
+        version: subscriptions version, taken with next_version.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    index = _get_index(hass)
+    async with _get_lock(hass, app_session_id):
+        # Skip resubscribe superseded by a newer one, which result could be sent earlier.
+        if index is not None and index.get_version(app_session_id) != version:
+            return
+
+        try:
+            await subscription_flow.resubscribe(db_session, app_session_id, subscriptions)
+        except Exception:
+            # Force the app to resubscribe once again.
+            if index is not None and index.get_version(app_session_id) == version:
+                index.forget_version(app_session_id)
+            raise
+
+        if index is not None:
+            index.set_subscriptions(app_session_id, subscriptions)
+
+
+async def resubscribe_push(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    app_session_id: uuid.UUID,
+    subscriptions: dict[str, set[str]],
+) -> None:
+    """Set need_push for the given attributes of the app session, and reset for all others.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    async with _get_lock(hass, app_session_id):
+        await subscription_flow.resubscribe_push(db_session, app_session_id, subscriptions)
+
+        if (index := _get_index(hass)) is not None:
+            index.set_push(app_session_id, subscriptions)
+
+
+async def update(
+    hass: HomeAssistant,
+    db_session: AsyncSession,
+    app_session_id: uuid.UUID,
+    version: int,
+    changes: dict[str, dict[str, Any]],
+) -> int | None:
+    """Incrementally update subscriptions of the app session.
+
+    Args:
+        hass: homeassistant core object.
+        db_session: sqlalchemy session.
+        app_session_id: application session id.
+        version: subscriptions version known by the app.
+        changes: operations applied in order:
+            "remove": entity_id -> list of attributes, empty list removes the whole entity,
+            "add": entity_id -> attribute -> need_push, existing subscriptions are replaced,
+            "set_need_push": entity_id -> attribute -> need_push, for existing subscriptions.
+
+    Returns:
+        new subscriptions version, or None if the app has an outdated version and must
+        resubscribe.
+
+    Raise:
+        errors.DatabaseError: in case when database operation can't be performed.
+    """
+    index = _get_index(hass)
+    if index is None:
+        return None
+
+    async with _get_lock(hass, app_session_id):
+        if index.get_version(app_session_id) != version:
+            return None
+
+        remove: dict[str, list[str]] = changes.get("remove", {})
+        add: dict[str, dict[str, int]] = changes.get("add", {})
+        set_need_push: dict[str, dict[str, int]] = changes.get("set_need_push", {})
+        try:
+            await _update(db_session, app_session_id, remove, add, set_need_push)
+        except Exception:
+            index.forget_version(app_session_id)
+            raise
+
+        subscriptions = index.get_subscriptions(app_session_id)
+        for entity_id, attributes in remove.items():
+            for attribute in attributes or subscriptions.get(entity_id, {}):
+                index.remove(app_session_id, entity_id, attribute)
+        for entity_id, attributes in add.items():
+            for attribute, need_push in attributes.items():
+                index.add(app_session_id, entity_id, attribute, need_push=bool(need_push))
+        subscriptions = index.get_subscriptions(app_session_id)
+        for entity_id, attributes in set_need_push.items():
+            for attribute, need_push in attributes.items():
+                if attribute in subscriptions.get(entity_id, {}):
+                    index.add(app_session_id, entity_id, attribute, need_push=bool(need_push))
+
+        return index.next_version(app_session_id)
+
+
+async def _update(
+    db_session: AsyncSession,
+    app_session_id: uuid.UUID,
+    remove: dict[str, list[str]],
+    add: dict[str, dict[str, int]],
+    set_need_push: dict[str, dict[str, int]],
+) -> None:
+    try:
+        for entity_id, attributes in remove.items():
+            stmt = sqlalchemy.delete(Subscription).where(
+                Subscription.app_session_id == app_session_id,
+                Subscription.entity_id == entity_id,
+            )
+            if attributes:
+                stmt = stmt.where(Subscription.attribute.in_(attributes))
+            await db_session.execute(stmt)
+
+        for entity_id, attributes in add.items():
+            if not attributes:
+                continue
+            await db_session.execute(
+                sqlalchemy.delete(Subscription).where(
+                    Subscription.app_session_id == app_session_id,
+                    Subscription.entity_id == entity_id,
+                    Subscription.attribute.in_(attributes),
+                ),
+            )
+            await db_session.execute(
+                sqlalchemy.insert(Subscription).values(
+                    [
+                        {
+                            "app_session_id": app_session_id,
+                            "entity_id": entity_id,
+                            "attribute": attribute,
+                            "need_push": bool(need_push),
+                        }
+                        for attribute, need_push in attributes.items()
+                    ],
+                ),
+            )
+
+        for entity_id, attributes in set_need_push.items():
+            for need_push in (True, False):
+                names = [name for name, value in attributes.items() if bool(value) == need_push]
+                if not names:
+                    continue
+                await db_session.execute(
+                    sqlalchemy.update(Subscription)
+                    .where(
+                        Subscription.app_session_id == app_session_id,
+                        Subscription.entity_id == entity_id,
+                        Subscription.attribute.in_(names),
+                    )
+                    .values(need_push=need_push),
+                )
+
+        await db_session.commit()
+    except SQLAlchemyError as e:
+        await db_session.rollback()
+        raise errors.DatabaseError(str(e)) from e
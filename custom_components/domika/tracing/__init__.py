@@ -0,0 +1 @@
+"""Domika events tracing."""
@@ -0,0 +1,47 @@
+"""Tracing router."""
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.components.websocket_api.decorators import websocket_command
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import LOGGER
+from ..metrics import service as metrics_service
+from . import service as tracing_service
+
+
+@websocket_command(
+    {
+        vol.Required("type"): "domika/get_trace",
+        vol.Required("context_id"): str,
+    },
+)
+@callback
+@metrics_service.instrument_command
+def websocket_domika_get_trace(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Handle domika get trace request."""
+    msg_id: int | None = msg.get("id")
+    if msg_id is None:
+        LOGGER.error('Got websocket message "get_trace", msg_id is missing')
+        return
+
+    LOGGER.debug('Got websocket message "get_trace", data: %s', msg)
+
+    tracer = tracing_service.get_tracer(hass)
+    if tracer is None:
+        connection.send_error(msg_id, "tracing_disabled", "Tracing is disabled")
+        return
+
+    trace = tracer.get(msg["context_id"])
+    if trace is None:
+        connection.send_error(msg_id, "not_found", "Trace not found")
+        return
+
+    connection.send_result(msg_id, trace.as_dict())
@@ -0,0 +1,138 @@
+"""Tracing service.
+
+Tracing is optional, when it's disabled spans are not measured and nothing is stored.
+"""
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+import uuid
+
+from domika_ha_framework.push_data.models import DomikaPushedEvents
+
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant
+
+from ..const import DOMAIN, TRACING_ENABLED, TRACING_MAX_SPANS, TRACING_MAX_TRACES
+from .tracer import Tracer
+
+
+def create_tracer() -> Tracer | None:
+    """Create events tracer, None if tracing is disabled."""
+    if not TRACING_ENABLED:
+        return None
+    return Tracer(TRACING_MAX_TRACES, TRACING_MAX_SPANS)
+
+
+def get_tracer(hass: HomeAssistant) -> Tracer | None:
+    """Get events tracer, None if tracing is disabled or the integration is not loaded."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    return domain_data.get("tracer")
+
+
+@contextmanager
+def span(
+    hass: HomeAssistant,
+    event: Event[EventStateChangedData],
+    name: str,
+) -> Iterator[dict[str, Any]]:
+    """Trace block execution as a stage of the state changed event handling.
+
+    Yields:
+        span attributes, which may be updated by the block.
+    """
+    attributes: dict[str, Any] = {}
+    if (tracer := get_tracer(hass)) is None:
+        yield attributes
+        return
+
+    trace = tracer.get_or_create(event.context.id, event.time_fired.timestamp())
+    start = time.monotonic()
+    try:
+        yield attributes
+    finally:
+        tracer.add_span(
+            trace,
+            name,
+            event.data["entity_id"],
+            start=start,
+            end=time.monotonic(),
+            attributes=attributes,
+        )
+
+
+def on_event_stored(
+    hass: HomeAssistant,
+    event: Event[EventStateChangedData],
+    event_id: uuid.UUID,
+    timestamp: int,
+) -> None:
+    """Remember stored event, so its push and confirmation are added to the trace."""
+    if (tracer := get_tracer(hass)) is None:
+        return
+
+    trace = tracer.get_or_create(event.context.id, event.time_fired.timestamp())
+    tracer.add_event(trace, event_id, event.data["entity_id"], timestamp)
+
+
+def on_events_pushed(
+    hass: HomeAssistant,
+    pushed_events: Iterable[DomikaPushedEvents],
+    start: float,
+    end: float,
+) -> None:
+    """Add delivery spans to traces of the events pushed by the sweep.
+
+    Args:
+        hass: homeassistant object.
+        pushed_events: events pushed by the sweep.
+        start: monotonic time of the sweep start.
+        end: monotonic time of the sweep end.
+    """
+    if (tracer := get_tracer(hass)) is None:
+        return
+
+    for pushed_event in pushed_events:
+        for entity_id, attributes in pushed_event.events.items():
+            timestamps: dict[int, int] = {}
+            for attribute in attributes.values():
+                timestamps[attribute["t"]] = timestamps.get(attribute["t"], 0) + 1
+            for timestamp, count in timestamps.items():
+                if (trace := tracer.find_by_pushed_key(entity_id, timestamp)) is not None:
+                    tracer.add_span(
+                        trace,
+                        "delivery",
+                        entity_id,
+                        start=start,
+                        end=end,
+                        attributes={"attributes": count},
+                    )
+
+
+def on_events_confirmed(
+    hass: HomeAssistant,
+    event_ids: Iterable[uuid.UUID],
+    start: float,
+    end: float,
+) -> None:
+    """Add confirmation spans to traces of the events confirmed by the app.
+
+    Args:
+        hass: homeassistant object.
+        event_ids: confirmed events.
+        start: monotonic time of the confirmation start.
+        end: monotonic time of the confirmation end.
+    """
+    if (tracer := get_tracer(hass)) is None:
+        return
+
+    for context_id, traced_event_ids in tracer.find_by_event_ids(event_ids).items():
+        if (trace := tracer.get(context_id)) is not None:
+            tracer.add_span(
+                trace,
+                "confirm_event",
+                None,
+                start=start,
+                end=end,
+                attributes={"events": len(traced_event_ids)},
+            )
@@ -0,0 +1,132 @@
+"""Events tracer."""
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+import time
+from typing import Any
+import uuid
+
+
+@dataclass(slots=True)
+class Span:
+    """Traced stage of the state change handling."""
+
+    name: str
+    entity_id: str | None
+    # Seconds since the trace start.
+    start: float
+    duration: float
+    attributes: dict[str, Any]
+
+
+@dataclass(slots=True)
+class Trace:
+    """State changes of one homeassistant context, from the event to the app confirmation."""
+
+    context_id: str
+    # Seconds since epoch.
+    timestamp: float
+    # Monotonic time of the trace start.
+    start: float
+    spans: list[Span] = field(default_factory=list)
+    # Spans not recorded because the trace was full.
+    dropped_spans: int = 0
+    event_ids: set[uuid.UUID] = field(default_factory=set)
+    # (entity_id, event timestamp in microseconds), as sent to the push server.
+    pushed_keys: set[tuple[str, int]] = field(default_factory=set)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get trace in json serializable form."""
+        return {
+            "context_id": self.context_id,
+            "timestamp": self.timestamp,
+            "spans": [
+                {
+                    "name": span.name,
+                    "entity_id": span.entity_id,
+                    "start": span.start,
+                    "duration": span.duration,
+                    "attributes": span.attributes,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+class Tracer:
+    """Ring buffer of recent traces by context id.
+
+    Events are stored and pushed by their event_id, entity_id and timestamp, not by context, so
+    these keys are indexed to find traces of the pushed and confirmed events. Keys of the traces
+    pushed out of the buffer are forgotten too.
+    """
+
+    def __init__(self, max_traces: int, max_spans: int) -> None:
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self._traces: OrderedDict[str, Trace] = OrderedDict()
+        self._event_ids: dict[uuid.UUID, str] = {}
+        self._pushed_keys: dict[tuple[str, int], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def get(self, context_id: str) -> Trace | None:
+        """Get trace by context id."""
+        return self._traces.get(context_id)
+
+    def get_or_create(self, context_id: str, timestamp: float) -> Trace:
+        """Get trace of the context, start a new one if it's not traced."""
+        if (trace := self._traces.get(context_id)) is not None:
+            return trace
+
+        trace = Trace(context_id, timestamp, time.monotonic())
+        self._traces[context_id] = trace
+        while len(self._traces) > self.max_traces:
+            _, evicted = self._traces.popitem(last=False)
+            for event_id in evicted.event_ids:
+                self._event_ids.pop(event_id, None)
+            # Newer context may have the same key, if it was changed in the same microsecond.
+            for key in evicted.pushed_keys:
+                if self._pushed_keys.get(key) == evicted.context_id:
+                    del self._pushed_keys[key]
+        return trace
+
+    def add_span(
+        self,
+        trace: Trace,
+        name: str,
+        entity_id: str | None,
+        *,
+        start: float,
+        end: float,
+        attributes: dict[str, Any],
+    ) -> None:
+        """Add span measured by the monotonic clock to the trace."""
+        if len(trace.spans) >= self.max_spans:
+            trace.dropped_spans += 1
+            return
+        trace.spans.append(Span(name, entity_id, start - trace.start, end - start, attributes))
+
+    def add_event(self, trace: Trace, event_id: uuid.UUID, entity_id: str, timestamp: int) -> None:
+        """Index stored event keys to find the trace when the event is pushed or confirmed."""
+        trace.event_ids.add(event_id)
+        trace.pushed_keys.add((entity_id, timestamp))
+        self._event_ids[event_id] = trace.context_id
+        self._pushed_keys[entity_id, timestamp] = trace.context_id
+
+    def find_by_event_ids(self, event_ids: Iterable[uuid.UUID]) -> dict[str, list[uuid.UUID]]:
+        """Get traced events by context id."""
+        result: dict[str, list[uuid.UUID]] = {}
+        for event_id in event_ids:
+            if (context_id := self._event_ids.get(event_id)) is not None:
+                result.setdefault(context_id, []).append(event_id)
+        return result
+
+    def find_by_pushed_key(self, entity_id: str, timestamp: int) -> Trace | None:
+        """Get trace of the pushed entity attributes with the event timestamp."""
+        if (context_id := self._pushed_keys.get((entity_id, timestamp))) is None:
+            return None
+        return self._traces.get(context_id)
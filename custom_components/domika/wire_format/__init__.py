@@ -0,0 +1 @@
+"""Domika wire format."""
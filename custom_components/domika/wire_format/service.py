@@ -0,0 +1,219 @@
+"""Wire format service.
+
+Domika payloads are json by default. Apps may negotiate MessagePack or CBOR, which are used if
+the corresponding library is installed, otherwise json is used. Values are converted as for json,
+except for CBOR native datetime, uuid and set types.
+"""
+
+import base64
+from collections.abc import Callable
+import dataclasses
+from http import HTTPStatus
+from typing import Any
+import uuid
+
+from aiohttp import web
+
+from homeassistant.components.websocket_api.connection import ActiveConnection
+from homeassistant.components.websocket_api.messages import construct_result_message
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes, json_encoder_default
+from homeassistant.util.json import json_loads
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+FORMAT_CBOR = "cbor"
+FORMATS = [FORMAT_JSON, FORMAT_MSGPACK, FORMAT_CBOR]
+
+CONTENT_TYPES = {
+    FORMAT_JSON: "application/json",
+    FORMAT_MSGPACK: "application/msgpack",
+    FORMAT_CBOR: "application/cbor",
+}
+_FORMATS_BY_MEDIA_TYPE = {
+    "application/json": FORMAT_JSON,
+    "application/msgpack": FORMAT_MSGPACK,
+    "application/x-msgpack": FORMAT_MSGPACK,
+    "application/vnd.msgpack": FORMAT_MSGPACK,
+    "application/cbor": FORMAT_CBOR,
+}
+
+
+def _default(obj: Any) -> Any:
+    """Convert objects the same way they are converted to json."""
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return json_encoder_default(obj)
+
+
+def _cbor_default(encoder: Any, obj: Any) -> None:
+    encoder.encode(_default(obj))
+
+
+def _get_encoders() -> dict[str, Callable[[Any], bytes]]:
+    encoders: dict[str, Callable[[Any], bytes]] = {FORMAT_JSON: json_bytes}
+    if msgpack is not None:
+        encoders[FORMAT_MSGPACK] = lambda data: msgpack.packb(data, default=_default)
+    if cbor2 is not None:
+        encoders[FORMAT_CBOR] = lambda data: cbor2.dumps(data, default=_cbor_default)
+    return encoders
+
+
+_ENCODERS = _get_encoders()
+
+
+def get_available_formats() -> list[str]:
+    """Get formats supported by installed libraries."""
+    return list(_ENCODERS)
+
+
+def get_format(wire_format: str) -> str:
+    """Get the format if it is available, or json."""
+    return wire_format if wire_format in _ENCODERS else FORMAT_JSON
+
+
+def negotiate(accept: str | None) -> str:
+    """Choose the format for the http Accept header.
+
+    Available format with the highest quality is chosen, json if there are none.
+    """
+    if not accept:
+        return FORMAT_JSON
+
+    best_format = FORMAT_JSON
+    best_quality = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        wire_format = _FORMATS_BY_MEDIA_TYPE.get(media_type.strip().lower())
+        if wire_format is None or wire_format not in _ENCODERS:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best_format, best_quality = wire_format, quality
+    return best_format
+
+
+def encode(data: Any, wire_format: str) -> bytes:
+    """Encode data with the format, json is used if the format is not available."""
+    return _ENCODERS.get(wire_format, json_bytes)(data)
+
+
+def decode(payload: bytes, wire_format: str) -> Any:
+    """Decode payload encoded with the format.
+
+    Raise:
+        ValueError: if the format is not available.
+    """
+    if wire_format == FORMAT_MSGPACK and msgpack is not None:
+        return msgpack.unpackb(payload)
+    if wire_format == FORMAT_CBOR and cbor2 is not None:
+        return cbor2.loads(payload)
+    if wire_format == FORMAT_JSON:
+        return json_loads(payload)
+    msg = f'Wire format "{wire_format}" is not available'
+    raise ValueError(msg)
+
+
+def make_response(
+    request: web.Request,
+    data: Any,
+    status: int = HTTPStatus.OK,
+) -> web.Response:
+    """Make http response with data encoded in the format negotiated by Accept header."""
+    wire_format = negotiate(request.headers.get("Accept"))
+    return web.Response(
+        body=encode(data, wire_format),
+        status=int(status),
+        content_type=CONTENT_TYPES[wire_format],
+    )
+
+
+async def async_run_encoding[*Ts, R](
+    hass: HomeAssistant,
+    target: Callable[[*Ts], R],
+    *args: *Ts,
+    offload: bool,
+) -> R:
+    """Run encoding or compression of a payload, in the executor if offload is set.
+
+    Args must not be modified on the event loop until the encoding is done, so they should be
+    built for the call or immutable.
+    """
+    if not offload:
+        return target(*args)
+    return await hass.async_add_executor_job(target, *args)
+
+
+def _frame_result(result: Any, wire_format: str) -> Any:
+    """Frame result in binary format, websocket messages are text."""
+    if wire_format == FORMAT_JSON:
+        return result
+    return {
+        "format": wire_format,
+        "payload": base64.b64encode(encode(result, wire_format)).decode(),
+    }
+
+
+def _encode_result(result: Any, wire_format: str) -> bytes:
+    return json_bytes(_frame_result(result, wire_format))
+
+
+def send_result(
+    connection: ActiveConnection,
+    msg_id: int,
+    result: Any,
+    wire_format: str,
+) -> None:
+    """Send websocket result.
+
+    Websocket messages are text, so results in binary formats are framed as
+    {"format": format, "payload": base64 encoded result}. Json results are sent as is.
+    """
+    connection.send_result(msg_id, _frame_result(result, get_format(wire_format)))
+
+
+async def async_send_result(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg_id: int,
+    result: Any,
+    wire_format: str,
+    *,
+    offload: bool,
+) -> None:
+    """Send websocket result, encoding it in the executor if offload is set.
+
+    Result is framed as in send_result, and must not be modified after the call.
+    """
+    if not offload:
+        send_result(connection, msg_id, result, wire_format)
+        return
+
+    payload = await hass.async_add_executor_job(
+        _encode_result,
+        result,
+        get_format(wire_format),
+    )
+    connection.send_message(construct_result_message(msg_id, payload))
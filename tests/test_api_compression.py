@@ -0,0 +1,61 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+import gzip
+import json
+import types
+import zlib
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+from custom_components.domika.api import compression
+from custom_components.domika.api.compression import CompressionMetrics
+from custom_components.domika.const import API_COMPRESSION_MIN_SIZE, DOMAIN
+
+
+def test_compression_negotiate():
+    """Test encoding negotiation by Accept-Encoding header."""
+    assert compression.negotiate(None) is None
+    assert compression.negotiate("identity") is None
+    assert compression.negotiate("deflate, gzip") in ("gzip", "br")
+    assert compression.negotiate("gzip;q=0.5, deflate") == "deflate"
+    assert compression.negotiate("gzip;q=0, deflate;q=0") is None
+    if compression.brotli is None:
+        assert compression.negotiate("br") is None
+        assert compression.negotiate("*") == "gzip"
+    else:
+        assert compression.negotiate("gzip, br") == "br"
+
+
+def test_compress_response():
+    """Test large responses are compressed and metrics are collected."""
+    metrics = CompressionMetrics()
+    hass = types.SimpleNamespace(data={DOMAIN: {"api_compression_metrics": metrics}})
+    body = json.dumps([{"entity_id": f"light.light_{i}", "s": "on"} for i in range(100)]).encode()
+    assert len(body) >= API_COMPRESSION_MIN_SIZE
+
+    for encoding, decompress in (("gzip", gzip.decompress), ("deflate", zlib.decompress)):
+        request = make_mocked_request("POST", "/", headers={"Accept-Encoding": encoding})
+        response = asyncio.run(
+            compression.compress_response(hass, request, web.Response(body=body)),
+        )
+        assert response.headers["Content-Encoding"] == encoding
+        assert decompress(response.body) == body
+
+    request = make_mocked_request("POST", "/", headers={"Accept-Encoding": "gzip"})
+    response = asyncio.run(
+        compression.compress_response(hass, request, web.Response(body=b"{}")),
+    )
+    assert "Content-Encoding" not in response.headers
+    assert response.body == b"{}"
+
+    result = metrics.as_dict()
+    assert result["skipped"] == 1
+    assert result["encodings"]["gzip"]["responses"] == 1
+    assert result["encodings"]["gzip"]["ratio"] > 1
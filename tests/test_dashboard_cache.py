@@ -0,0 +1,70 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+from custom_components.domika.dashboard.cache import DashboardCache, DashboardCacheItem
+
+CACHE_SIZE = 100
+SMALL_ITEM_SIZE = 10
+LARGE_ITEM_SIZE = 20
+LRU_ITEM_SIZE = 40
+
+
+def _item(hash_: str, size: int) -> DashboardCacheItem:
+    return DashboardCacheItem(hash=hash_, payload=b"x" * (size - len(hash_)))
+
+
+def test_dashboard_cache_get_set():
+    """Test cached dashboards lookup."""
+    cache = DashboardCache(CACHE_SIZE)
+    assert cache.get("user1") is None
+
+    cache.set("user1", _item("h1", SMALL_ITEM_SIZE))
+    assert cache.get("user1").hash == "h1"
+    assert cache.size == SMALL_ITEM_SIZE
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.set("user1", _item("h2", LARGE_ITEM_SIZE))
+    assert cache.get("user1").hash == "h2"
+    assert cache.size == LARGE_ITEM_SIZE
+    assert len(cache) == 1
+
+
+def test_dashboard_cache_lru_eviction():
+    """Test least recently used dashboards are evicted when cache is full."""
+    cache = DashboardCache(CACHE_SIZE)
+    cache.set("user1", _item("h1", LRU_ITEM_SIZE))
+    cache.set("user2", _item("h2", LRU_ITEM_SIZE))
+
+    # Mark user1 as recently used.
+    cache.get("user1")
+
+    cache.set("user3", _item("h3", LRU_ITEM_SIZE))
+    assert "user1" in cache
+    assert "user2" not in cache
+    assert "user3" in cache
+    assert cache.size == 2 * LRU_ITEM_SIZE
+
+    # Oversized item is not cached and does not evict others.
+    cache.set("user4", _item("h4", CACHE_SIZE + 1))
+    assert "user4" not in cache
+    assert "user1" in cache
+    assert "user3" in cache
+    assert cache.size == 2 * LRU_ITEM_SIZE
+
+
+def test_dashboard_cache_set_if_missing():
+    """Test lazily loaded dashboards never overwrite cached ones."""
+    cache = DashboardCache(CACHE_SIZE)
+    cache.set("user1", _item("new", SMALL_ITEM_SIZE))
+    cache.set_if_missing("user1", _item("old", SMALL_ITEM_SIZE))
+    assert cache.get("user1").hash == "new"
+
+    cache.set_if_missing("user2", _item("h2", SMALL_ITEM_SIZE))
+    assert cache.get("user2").hash == "h2"
+
+    cache.pop("user2")
+    assert cache.size == SMALL_ITEM_SIZE
@@ -0,0 +1,34 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import json
+
+import pytest
+
+from custom_components.domika.dashboard import compression
+
+
+def test_dashboard_compression_roundtrip():
+    """Test large dashboards are stored compressed and restored unchanged."""
+    dashboards = json.dumps([{"entity_id": f"light.light_{i}", "size": 1} for i in range(200)])
+    stored = compression.compress(dashboards)
+    assert compression.is_compressed(stored)
+    assert len(stored) < len(dashboards)
+    assert compression.decompress(stored) == dashboards
+
+
+def test_dashboard_compression_small():
+    """Test small and legacy raw dashboards are kept as is."""
+    dashboards = '[{"entity_id": "light.light"}]'
+    assert compression.compress(dashboards) == dashboards
+    assert compression.decompress(dashboards) == dashboards
+
+
+def test_dashboard_compression_corrupted():
+    """Test corrupted dashboards raise ValueError."""
+    with pytest.raises(ValueError, match="Corrupted"):
+        compression.decompress(compression.ZLIB_PREFIX + "bm90IHpsaWI=")
@@ -0,0 +1,118 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+import gc
+import json
+import types
+
+import pytest
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.dashboard import service as dashboard_service
+from custom_components.domika.dashboard.cache import DashboardPatch, DashboardPatchHistory
+from custom_components.domika.dashboard.patch import apply_patch
+
+
+def test_apply_patch():
+    """Test RFC 6902 operations."""
+    document = {"pages": [{"name": "Home", "widgets": ["light.a", "light.b"]}], "v": 1}
+    patched = apply_patch(
+        document,
+        [
+            {"op": "add", "path": "/pages/0/widgets/-", "value": "light.c"},
+            {"op": "remove", "path": "/pages/0/widgets/0"},
+            {"op": "replace", "path": "/v", "value": 2},
+            {"op": "copy", "from": "/pages/0", "path": "/pages/1"},
+            {"op": "move", "from": "/pages/1/name", "path": "/pages/1/title"},
+            {"op": "add", "path": "/a~1b", "value": {"c~d": 1}},
+            {"op": "test", "path": "/a~1b/c~0d", "value": 1},
+        ],
+    )
+    assert patched == {
+        "pages": [
+            {"name": "Home", "widgets": ["light.b", "light.c"]},
+            {"title": "Home", "widgets": ["light.b", "light.c"]},
+        ],
+        "v": 2,
+        "a/b": {"c~d": 1},
+    }
+    # Original document is untouched.
+    assert document["v"] == 1
+    assert document["pages"][0]["widgets"] == ["light.a", "light.b"]
+
+
+@pytest.mark.parametrize(
+    "patch",
+    [
+        [{"op": "remove", "path": "/missing"}],
+        [{"op": "replace", "path": "/list/5", "value": 1}],
+        [{"op": "add", "path": "/list/01", "value": 1}],
+        [{"op": "test", "path": "/list/0", "value": 2}],
+        [{"op": "move", "from": "/list", "path": "/list/0"}],
+        [{"op": "unknown", "path": "/list"}],
+        [{"op": "add", "path": "list", "value": 1}],
+    ],
+)
+def test_apply_patch_invalid(patch: list):
+    """Test malformed or inapplicable patches raise ValueError."""
+    with pytest.raises(ValueError):  # noqa: PT011
+        apply_patch({"list": [1]}, patch)
+
+
+def test_patch_history():
+    """Test combined patch lookup by known hash."""
+    history = DashboardPatchHistory(2)
+    op1 = {"op": "add", "path": "/a", "value": 1}
+    op2 = {"op": "add", "path": "/b", "value": 2}
+    op3 = {"op": "add", "path": "/c", "value": 3}
+    history.append("user", DashboardPatch("h0", "h1", [op1]))
+    history.append("user", DashboardPatch("h1", "h2", [op2]))
+    assert history.get_patch("user", "h0", "h2") == [op1, op2]
+    assert history.get_patch("user", "h1", "h2") == [op2]
+    assert history.get_patch("user", "h2", "h2") == []
+    assert history.get_patch("user", "unknown", "h2") is None
+    assert history.get_patch("other", "h0", "h2") is None
+
+    # Oldest patch is dropped.
+    history.append("user", DashboardPatch("h2", "h3", [op3]))
+    assert history.get_patch("user", "h0", "h3") is None
+    assert history.get_patch("user", "h1", "h3") == [op2, op3]
+
+    # Out of chain patch resets history.
+    history.append("user", DashboardPatch("x", "h4", [op1]))
+    assert history.get_patch("user", "h2", "h4") is None
+
+    history.clear("user")
+    assert history.get_patch("user", "x", "h4") is None
+
+
+def test_patch_dashboards_payload():
+    """Test patch is applied to dashboards of the cached payload."""
+    dashboards = json.dumps({"views": [{"title": "Home"}]})
+    payload = json.dumps({"dashboards": dashboards, "hash": "h0"}).encode()
+
+    patched = dashboard_service._apply_patch(  # noqa: SLF001
+        payload,
+        [{"op": "add", "path": "/views/-", "value": {"title": "Garden"}}],
+    )
+    assert json.loads(patched) == {"views": [{"title": "Home"}, {"title": "Garden"}]}
+
+
+def test_dashboard_locks_dropped():
+    """Test user locks are dropped when released."""
+    hass = types.SimpleNamespace(data={DOMAIN: {}})
+
+    async def run() -> None:
+        lock = dashboard_service._get_lock(hass, "user")  # noqa: SLF001
+        async with lock:
+            assert dashboard_service._get_lock(hass, "user") is lock  # noqa: SLF001
+        del lock
+        gc.collect()
+
+    asyncio.run(run())
+    assert len(hass.data[DOMAIN]["dashboard_locks"]) == 0
@@ -0,0 +1,102 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+from dataclasses import replace
+import uuid
+
+from custom_components.domika.device.cache import CachedDevice, DeviceCache
+
+
+def test_device_cache_write_through():
+    """Test devices of loaded users are tracked without reloading."""
+    cache = DeviceCache()
+    app_session_id1 = uuid.uuid4()
+    app_session_id2 = uuid.uuid4()
+    assert cache.get_app_session_ids("user1") is None
+
+    cache.load("user1", [app_session_id1], cache.generation)
+    cache.add("user1", app_session_id2)
+    assert sorted(cache.get_app_session_ids("user1")) == sorted([app_session_id1, app_session_id2])
+
+    # Device moved to another, not loaded, user.
+    cache.add("user2", app_session_id1)
+    assert cache.get_app_session_ids("user1") == [app_session_id2]
+    assert "user2" not in cache
+
+    cache.remove(app_session_id2)
+    assert cache.get_app_session_ids("user1") == []
+
+    cache.clear()
+    assert "user1" not in cache
+
+
+def test_device_cache_stale_load():
+    """Test lazy load is ignored if devices changed while it was read from the database."""
+    cache = DeviceCache()
+    app_session_id = uuid.uuid4()
+
+    generation = cache.generation
+    cache.add("user1", app_session_id)
+    cache.load("user1", [], generation)
+    assert "user1" not in cache
+
+
+def test_device_cache_devices():
+    """Test cached device rows follow push session changes."""
+    cache = DeviceCache()
+    push_session_id = uuid.uuid4()
+    device = CachedDevice(uuid.uuid4(), "user1", None, "hash1")
+    cache.load("user1", [], cache.generation)
+
+    cache.set(device)
+    assert cache.get(device.app_session_id) == device
+    assert cache.get_app_session_ids("user1") == [device.app_session_id]
+
+    # Updating the same user's device keeps its row.
+    cache.add("user1", device.app_session_id)
+    assert cache.get(device.app_session_id) == device
+
+    cache.set(replace(device, push_session_id=push_session_id))
+    cache.forget_push_sessions({uuid.uuid4()})
+    assert cache.get(device.app_session_id).push_session_id == push_session_id
+
+    cache.reset_push_session(device.app_session_id)
+    assert cache.get(device.app_session_id).push_session_id is None
+
+    cache.set(replace(device, push_session_id=push_session_id))
+    cache.forget_push_sessions(None)
+    assert cache.get(device.app_session_id) is None
+    assert cache.get_app_session_ids("user1") == [device.app_session_id]
+
+    # Device moved to another user.
+    cache.set(device)
+    cache.add("user2", device.app_session_id)
+    assert cache.get(device.app_session_id) is None
+    assert cache.get_app_session_ids("user1") == []
+
+
+def test_device_cache_remove_with_push_token_hash():
+    """Test only devices with the same push token hash are forgotten after verification."""
+    cache = DeviceCache()
+    device = CachedDevice(uuid.uuid4(), "user1", None, "hash1")
+    same_hash = CachedDevice(uuid.uuid4(), "user1", None, "hash1")
+    other_hash = CachedDevice(uuid.uuid4(), "user2", None, "hash2")
+    cache.load("user1", [], cache.generation)
+    cache.load("user2", [], cache.generation)
+    cache.load("user3", [], cache.generation)
+    for cached_device in (device, same_hash, other_hash):
+        cache.set(cached_device)
+    # Row of the user device is not loaded.
+    cache.add("user3", uuid.uuid4())
+
+    cache.remove_with_push_token_hash("hash1", device.app_session_id)
+    assert cache.get(device.app_session_id) == device
+    assert cache.get(same_hash.app_session_id) is None
+    assert cache.get(other_hash.app_session_id) == other_hash
+    assert cache.get_app_session_ids("user1") == [device.app_session_id]
+    assert cache.get_app_session_ids("user2") == [other_hash.app_session_id]
+    assert "user3" not in cache
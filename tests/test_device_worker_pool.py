@@ -0,0 +1,97 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from custom_components.domika.device.worker_pool import WorkerPool
+
+
+class _Entry:
+    def __init__(self) -> None:
+        self.tasks: list[asyncio.Task] = []
+
+    def async_create_task(self, _hass, target, _name):  # noqa: ANN001, ANN202
+        task = asyncio.get_running_loop().create_task(target)
+        self.tasks.append(task)
+        return task
+
+
+async def _run_pool(jobs_count: int, limit: int, max_queue_size: int) -> tuple[WorkerPool, dict]:
+    entry = _Entry()
+    pool = WorkerPool(
+        SimpleNamespace(loop=asyncio.get_running_loop()),
+        entry,
+        {"op": limit},
+        max_queue_size,
+    )
+    release = asyncio.Event()
+    state = {"running": 0, "max_running": 0, "done": []}
+
+    async def job(key: int) -> None:
+        state["running"] += 1
+        state["max_running"] = max(state["max_running"], state["running"])
+        await release.wait()
+        state["running"] -= 1
+        state["done"].append(key)
+
+    submitters = [
+        asyncio.create_task(pool.submit("op", key, lambda key=key: job(key)))
+        for key in range(jobs_count)
+    ]
+    # Let submitters and workers settle.
+    for _ in range(5):
+        await asyncio.sleep(0)
+    state["metrics"] = pool.get_metrics()["op"]
+
+    release.set()
+    await asyncio.gather(*submitters)
+    while any(not task.done() for task in entry.tasks):
+        await asyncio.gather(*entry.tasks)
+    return pool, state
+
+
+def test_worker_pool_limits():
+    """Test concurrency limit and backpressure of the operation queue."""
+    jobs_count, limit, max_queue_size = 10, 2, 3
+    pool, state = asyncio.run(_run_pool(jobs_count, limit, max_queue_size))
+
+    assert state["max_running"] == limit
+    assert state["metrics"]["running"] == limit
+    assert state["metrics"]["queue_depth"] == max_queue_size
+    assert state["metrics"]["waiting"] == jobs_count - limit - max_queue_size
+    assert sorted(state["done"]) == list(range(jobs_count))
+
+    metrics = pool.get_metrics()["op"]
+    assert metrics["completed"] == jobs_count
+    assert metrics["queue_depth"] == 0
+    assert metrics["running"] == 0
+
+
+def test_worker_pool_deduplication():
+    """Test queued job is replaced by the next one with the same key."""
+
+    async def run() -> tuple[WorkerPool, list[str]]:
+        entry = _Entry()
+        pool = WorkerPool(SimpleNamespace(loop=asyncio.get_running_loop()), entry, {"op": 1}, 10)
+        release = asyncio.Event()
+        done: list[str] = []
+
+        async def job(value: str) -> None:
+            await release.wait()
+            done.append(value)
+
+        await pool.submit("op", "blocker", lambda: job("blocker"))
+        await pool.submit("op", "key", lambda: job("first"))
+        await pool.submit("op", "key", lambda: job("second"))
+        release.set()
+        await asyncio.gather(*entry.tasks)
+        return pool, done
+
+    pool, done = asyncio.run(run())
+    assert done == ["blocker", "second"]
+    assert pool.get_metrics()["op"]["deduplicated"] == 1
@@ -0,0 +1,53 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+import json
+import types
+import uuid
+
+import pytest
+
+from custom_components.domika import diagnostics
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.metrics import service as metrics_service
+from custom_components.domika.subscription.index import SubscriptionIndex
+
+
+async def _get_table_rows() -> dict[str, int]:
+    return {"push_data": 1}
+
+
+def test_diagnostics(monkeypatch: pytest.MonkeyPatch):
+    """Test diagnostics contain subscription counts and slow operations, but no app session ids."""
+    monkeypatch.setattr(diagnostics, "_get_table_rows", _get_table_rows)
+    app_session_id = uuid.uuid4()
+    index = SubscriptionIndex()
+    index.load(
+        [
+            (app_session_id, "light.kitchen", "s", True),
+            (app_session_id, "light.kitchen", "a.brightness", False),
+        ],
+        index.generation,
+    )
+    hass = types.SimpleNamespace(
+        data={DOMAIN: {"metrics": metrics_service.create_registry(), "subscription_index": index}},
+    )
+    metrics_service.observe(hass, metrics_service.REGISTER_EVENT_DURATION, 0.001)
+    metrics_service.observe(hass, metrics_service.REGISTER_EVENT_DURATION, 3.0)
+    entry = types.SimpleNamespace(options={"critical_entities": {}})
+
+    result = asyncio.run(diagnostics.async_get_config_entry_diagnostics(hass, entry))
+
+    assert list(result["subscriptions"]["app_sessions"].values()) == [
+        {"subscriptions": 2, "push": 1, "patterns": 0},
+    ]
+    assert str(app_session_id) not in json.dumps(result)
+    assert result["tables"] == {"push_data": 1}
+    assert [operation["name"] for operation in result["slow_operations"]] == [
+        metrics_service.REGISTER_EVENT_DURATION,
+    ]
@@ -0,0 +1,92 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from pathlib import Path
+import types
+
+from homeassistant.core import Context, Event, State
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.event_recorder import service as event_recorder_service
+from custom_components.domika.event_recorder.recorder import (
+    CURRENT_FILE,
+    EventRecorder,
+    get_files,
+    read_records,
+)
+
+
+async def _async_add_executor_job(target, *args):  # noqa: ANN001, ANN202
+    return target(*args)
+
+
+def test_recorder_rotates_files(tmp_path: Path):
+    """Test records are appended to the current file, and old rotated files are removed."""
+    max_files = 2
+    recorder = EventRecorder(tmp_path, max_file_size=200, max_files=max_files, max_buffer=10)
+    written: list[dict] = []
+    for i in range(20):
+        record = {"t": i, "c": f"context_{i}", "e": "light.kitchen", "o": None, "n": {"s": "on"}}
+        recorder.add(record)
+        written.append(record)
+        if i % 2:
+            recorder.write(recorder.take())
+
+    files = get_files(tmp_path)
+    rotated = [file for file in files if file.name != CURRENT_FILE]
+    assert 0 < len(rotated) <= max_files
+    records = list(read_records(files))
+    assert records
+    assert records == written[-len(records) :]
+
+
+def test_record_state_changed_event(tmp_path: Path):
+    """Test state changed events are buffered, recorded on flush, and dropped if buffer is full."""
+    recorder = EventRecorder(tmp_path, max_file_size=1024, max_files=1, max_buffer=1)
+    hass = types.SimpleNamespace(
+        data={DOMAIN: {"event_recorder": recorder}},
+        async_add_executor_job=_async_add_executor_job,
+    )
+    new_state = State("light.kitchen", "on", {"brightness": 255})
+    event = Event(
+        "state_changed",
+        {"entity_id": "light.kitchen", "old_state": None, "new_state": new_state},
+        time_fired_timestamp=1.5,
+        context=Context(id="context"),
+    )
+    event_recorder_service.record(hass, event)
+    event_recorder_service.record(hass, event)
+    asyncio.run(event_recorder_service.flush(hass))
+
+    assert list(read_records(get_files(tmp_path))) == [
+        {
+            "t": 1.5,
+            "c": "context",
+            "e": "light.kitchen",
+            "o": None,
+            "n": new_state.as_compressed_state,
+        },
+    ]
+    assert (recorder.recorded, recorder.dropped) == (1, 1)
+
+
+def test_flush_write_error(tmp_path: Path):
+    """Test events which can't be written are counted as dropped, not recorded."""
+    not_dir = tmp_path / "file"
+    not_dir.write_bytes(b"")
+    recorder = EventRecorder(not_dir, max_file_size=1024, max_files=1, max_buffer=10)
+    hass = types.SimpleNamespace(
+        data={DOMAIN: {"event_recorder": recorder}},
+        async_add_executor_job=_async_add_executor_job,
+    )
+    records = 3
+    for i in range(records):
+        recorder.add({"t": i, "c": "context", "e": "light.kitchen", "o": None, "n": None})
+    asyncio.run(event_recorder_service.flush(hass))
+
+    assert (recorder.recorded, recorder.dropped) == (0, records)
@@ -0,0 +1,38 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+from homeassistant.core import State
+
+from custom_components.domika.ha_entity.service import get_flat_state
+
+
+def test_get_flat_state_filtered():
+    """Test filtered state contains the same values as the filtered full state."""
+    state = State(
+        "weather.home",
+        "sunny",
+        {
+            "temperature": 21.5,
+            "forecast": [{"temperature": 20, "condition": "rainy"}] * 10,
+            "nested": {"a": {"b": 1}, "c": 2, "d.e": 3},
+            "friendly_name": "Home",
+        },
+    )
+    full = get_flat_state(state)
+    assert "lu" not in full
+    assert full["a.nested.a.b"] == "1"
+
+    for attributes in (
+        {"s"},
+        {"a.temperature"},
+        {"s", "a.nested.a.b", "a.nested.d.e"},
+        {"a.nested"},
+        {"a.unknown", "unknown"},
+    ):
+        assert get_flat_state(state, attributes) == {
+            k: v for k, v in full.items() if k in attributes
+        }
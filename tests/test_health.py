@@ -0,0 +1,104 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+import dataclasses
+from pathlib import Path
+import types
+import uuid
+
+import pytest
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.ha_event.pending import PendingPushData
+from custom_components.domika.health.coordinator import DomikaHealthCoordinator
+from custom_components.domika.metrics import service as metrics_service
+
+
+def test_pending_push_data():
+    """Test pending push data rows are tracked between sweeps as the database does."""
+    app_session_id = uuid.uuid4()
+    event_id = uuid.uuid4()
+    pending = PendingPushData()
+    pending.add(app_session_id, "light.kitchen", ["s"], uuid.uuid4())
+    assert pending.get_count() is None
+
+    pending.reset(3)
+    pending.add(app_session_id, "light.kitchen", ["s", "a.brightness"], uuid.uuid4())
+    # Newer event replaces the row of the same attribute.
+    pending.add(app_session_id, "light.kitchen", ["s"], event_id)
+    pending.add(uuid.uuid4(), "light.kitchen", ["s"], event_id)
+    assert pending.get_count() == 3 + 3
+
+    pending.confirm(app_session_id, [event_id])
+    assert pending.get_count() == 3 + 2
+    pending.remove(app_session_id)
+    assert pending.get_count() == 3 + 1
+    pending.reset(0)
+    assert pending.get_count() == 0
+
+
+def test_health_coordinator(tmp_path: Path):
+    """Test health rates are measured between updates from metrics counters."""
+
+    async def run() -> None:
+        registry = metrics_service.create_registry()
+        pending = PendingPushData()
+        pending_count = 2
+        pending.reset(pending_count)
+        app_session_id = uuid.uuid4()
+
+        async def async_add_executor_job(target, *args):  # noqa: ANN001, ANN202
+            return target(*args)
+
+        hass = types.SimpleNamespace(
+            data={DOMAIN: {"metrics": registry, "pending_push_data": pending}},
+            loop=asyncio.get_running_loop(),
+            config=types.SimpleNamespace(path=lambda *path: str(tmp_path.joinpath(*path))),
+            bus=types.SimpleNamespace(
+                async_listeners=lambda: {
+                    f"domika_{app_session_id}": 1,
+                    "domika_critical_sensors_changed": 1,
+                    "state_changed": 2,
+                },
+            ),
+            async_add_executor_job=async_add_executor_job,
+        )
+        coordinator = DomikaHealthCoordinator(hass)
+
+        events_count = 10
+        duration = 0.004
+        for _ in range(events_count):
+            metrics_service.inc(hass, metrics_service.EVENTS, "registered")
+            metrics_service.observe(hass, metrics_service.REGISTER_EVENT_DURATION, duration)
+        metrics_service.inc(hass, metrics_service.EVENTS, "filtered")
+        metrics_service.inc(hass, metrics_service.PUSH_SERVER_REQUESTS, "POST", "/push", "200")
+        metrics_service.inc(hass, metrics_service.PUSH_SERVER_REQUESTS, "POST", "/push", "error")
+        # Move the previous snapshot a minute back.
+        previous = coordinator._previous  # noqa: SLF001
+        coordinator._previous = dataclasses.replace(previous, time=previous.time - 60)  # noqa: SLF001
+
+        health = await coordinator._async_update_data()  # noqa: SLF001
+        assert health.pending_push_data == pending_count
+        assert health.database_size is None
+        assert round(health.events_registered_per_minute) == events_count
+        assert health.events_dropped_per_minute == 0
+        # One of two requests failed.
+        assert health.push_server_error_rate == pytest.approx(50)
+        assert health.connected_app_sessions == 1
+        # Estimated inside the bucket of the duration.
+        assert health.register_event_p95 == pytest.approx(duration * 1000, abs=2.5)
+
+        # Nothing happened since the last update.
+        database = b"0" * 100
+        tmp_path.joinpath("Domika.db").write_bytes(database)
+        health = await coordinator._async_update_data()  # noqa: SLF001
+        assert health.database_size == len(database)
+        assert health.push_server_error_rate is None
+        assert health.register_event_p95 is None
+
+    asyncio.run(run())
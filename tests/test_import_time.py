@@ -0,0 +1,29 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+from benchmarks.bench_import_time import INTEGRATION, LAZY_MODULES, measure, parse_import_time
+
+
+def test_parse_import_time():
+    """Only the module and the modules first imported by it are parsed."""
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:        10 |         10 | json",
+            "import time:         5 |          5 |   x.b",
+            "import time:         3 |          8 | x",
+            "import time:         2 |         10 | y",
+        ],
+    )
+    assert parse_import_time(output, "x") == {"x.b": (5, 5), "x": (3, 8)}
+
+
+def test_lazy_modules_not_imported():
+    """Heavy integrations are not imported with the integration."""
+    modules = measure()
+    assert INTEGRATION in modules
+    assert [name for name in LAZY_MODULES if name in modules] == []
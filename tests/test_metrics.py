@@ -0,0 +1,211 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from http import HTTPStatus
+import json
+import time
+import types
+from unittest.mock import MagicMock, patch
+import uuid
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+import pytest
+
+from homeassistant.exceptions import Unauthorized
+from homeassistant.helpers.http import KEY_HASS
+
+from custom_components.domika.api import metrics_view
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.metrics import router as metrics_router, service as metrics_service
+from custom_components.domika.metrics.registry import Histogram, MetricsRegistry
+from custom_components.domika.metrics.watchdog import LoopWatchdog
+from custom_components.domika.subscription.index import SubscriptionIndex
+
+
+def test_histogram_quantile():
+    """Test quantiles are interpolated inside buckets."""
+    histogram = Histogram("test_seconds", "Test.", buckets=(0.1, 0.2, 0.4))
+    assert histogram.quantile(0.5) is None
+
+    values = (0.05, 0.15, 0.15, 0.3)
+    for value in values:
+        histogram.observe(value)
+    assert histogram.get_count() == len(values)
+    assert histogram.get_sum() == pytest.approx(0.65)
+    assert histogram.quantile(0.25) == pytest.approx(0.1)
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(1.0) == pytest.approx(0.4)
+
+    histogram.observe(5.0)
+    assert histogram.quantile(1.0) == histogram.buckets[-1]
+
+
+def test_registry_to_prometheus():
+    """Test Prometheus text format of counters and histograms."""
+    registry = MetricsRegistry()
+    registry.counter("test_total", "Test counter.", ("result",)).inc(('a"b',), 2)
+    registry.histogram("test_seconds", "Test histogram.", buckets=(0.5, 1.0)).observe(0.7)
+
+    assert list(registry.to_prometheus()) == [
+        "# HELP test_total Test counter.",
+        "# TYPE test_total counter",
+        'test_total{result="a\\"b"} 2',
+        "# HELP test_seconds Test histogram.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="0.5"} 0',
+        'test_seconds_bucket{le="1"} 1',
+        'test_seconds_bucket{le="+Inf"} 1',
+        "test_seconds_sum 0.7",
+        "test_seconds_count 1",
+    ]
+
+
+def test_instrument_command():
+    """Test websocket commands are measured until done, and unhandled errors are counted."""
+    registry = metrics_service.create_registry()
+    hass = types.SimpleNamespace(
+        data={DOMAIN: {"metrics": registry, "subscription_index": SubscriptionIndex()}},
+    )
+    delay = 0.01
+
+    @metrics_service.instrument_command
+    async def async_handler(_hass, _connection, _msg) -> None:  # noqa: ANN001
+        await asyncio.sleep(delay)
+
+    @metrics_service.instrument_command
+    def failing_handler(_hass, _connection, _msg) -> None:  # noqa: ANN001
+        msg = "Handler error"
+        raise ValueError(msg)
+
+    asyncio.run(async_handler(hass, None, {"type": "domika/test"}))
+    with pytest.raises(ValueError, match="Handler error"):
+        failing_handler(hass, None, {"type": "domika/failing"})
+
+    duration = registry.histograms[metrics_service.WEBSOCKET_COMMAND_DURATION]
+    assert duration.get_count(("domika/test",)) == 1
+    assert duration.get_sum(("domika/test",)) >= delay
+    assert duration.get_count(("domika/failing",)) == 1
+    errors = registry.counters[metrics_service.WEBSOCKET_COMMAND_ERRORS]
+    assert errors.get(("domika/failing",)) == 1
+    assert errors.get(("domika/test",)) == 0
+
+    snapshot = metrics_service.as_dict(hass)
+    assert snapshot["components"]["subscription_index"] == {"subscriptions": 0, "loaded": False}
+    text = metrics_service.to_prometheus(hass)
+    assert 'domika_websocket_command_errors_total{command="domika/failing"} 1' in text
+    assert "domika_subscriptions 0" in text
+
+    # Metrics are not collected when integration is not loaded.
+    asyncio.run(async_handler(types.SimpleNamespace(data={}), None, {"type": "domika/test"}))
+    assert duration.get_count(("domika/test",)) == 1
+
+
+def test_watchdog_attributes_stalls():
+    """Test loop stalls are attributed to Domika handlers run while the loop was late."""
+    registry = metrics_service.create_registry()
+    watchdog = LoopWatchdog(interval=0.05, threshold=0.1, stalls_length=10)
+    hass = types.SimpleNamespace(data={DOMAIN: {"metrics": registry, "loop_watchdog": watchdog}})
+    blocking = 0.3
+
+    @metrics_service.instrument_command
+    def blocking_handler(_hass, _connection, _msg) -> None:  # noqa: ANN001
+        time.sleep(blocking)
+
+    async def run() -> None:
+        watchdog_task = asyncio.create_task(metrics_service.run_watchdog(hass))
+        await asyncio.sleep(0)
+        blocking_handler(
+            hass,
+            None,
+            {"id": 1, "type": "domika/entity_list", "domains": ["light", "switch"]},
+        )
+        await asyncio.sleep(watchdog.interval)
+        watchdog_task.cancel()
+
+    asyncio.run(run())
+
+    assert len(watchdog.stalls) == 1
+    stall = watchdog.stalls[0]
+    assert stall.lag >= blocking - watchdog.interval
+    handler = stall.handlers[0]
+    assert handler.name == "domika/entity_list"
+    assert handler.args == "domains=<2 items>"
+    assert handler.duration >= blocking
+    assert not handler.running
+    stalls = registry.counters[metrics_service.LOOP_STALLS]
+    assert stalls.get(("domika/entity_list",)) == 1
+    assert registry.histograms[metrics_service.LOOP_LAG].get_count() >= 1
+    assert metrics_service.as_dict(hass)["components"]["loop_watchdog"]["stalls"]
+
+
+def test_watchdog_does_not_expose_secrets():
+    """Test values of the device commands arguments are not stored in the stalls."""
+    watchdog = LoopWatchdog(interval=0.05, threshold=0.0, stalls_length=10)
+    secrets = {
+        "app_session_id": uuid.uuid4(),
+        "push_token_hex": "a1b2c3d4e5f6",
+        "verification_key": "verification-key",
+        "original_transaction_id": "transaction-id",
+        "push_session_id": str(uuid.uuid4()),
+    }
+    msg = {"id": 1, "type": "domika/update_push_session", "entity_id": "light.kitchen", **secrets}
+
+    with watchdog.track(msg["type"], msg):
+        time.sleep(watchdog.interval)
+    assert watchdog.check(watchdog.interval) is not None
+
+    dumped = json.dumps(watchdog.as_dict())
+    for key, value in secrets.items():
+        assert key in dumped
+        assert str(value) not in dumped
+    assert "entity_id=light.kitchen" in dumped
+
+
+def test_watchdog_summarizes_stalls_only():
+    """Test handler arguments are summarized only when a stall is attributed to the handler."""
+    watchdog = LoopWatchdog(interval=0.05, threshold=1.0, stalls_length=10)
+    args = MagicMock(wraps={"entity_id": "light.kitchen"})
+
+    with watchdog.track("state_changed", args):
+        pass
+    assert watchdog.check(0.0) is None
+    args.items.assert_not_called()
+
+    with watchdog.track("state_changed", args):
+        pass
+    stall = watchdog.check(watchdog.threshold)
+    assert stall.handlers[0].args == "entity_id=light.kitchen"
+
+
+def test_metrics_require_admin():
+    """Test metrics are not available to non-admin users."""
+    hass = types.SimpleNamespace(data={DOMAIN: {"metrics": metrics_service.create_registry()}})
+    sent: list[tuple[int, dict]] = []
+    connection = types.SimpleNamespace(
+        user=types.SimpleNamespace(is_admin=False),
+        send_result=lambda msg_id, result: sent.append((msg_id, result)),
+    )
+    msg = {"id": 1, "type": "domika/metrics"}
+
+    with pytest.raises(Unauthorized):
+        metrics_router.websocket_domika_metrics(hass, connection, msg)
+    assert sent == []
+
+    connection.user.is_admin = True
+    metrics_router.websocket_domika_metrics(hass, connection, msg)
+    assert sent[0][1]["components"]
+
+    async def get(*, is_admin: bool) -> web.Response:
+        request = make_mocked_request("GET", "/domika/metrics", app={KEY_HASS: hass})
+        request["hass_user"] = types.SimpleNamespace(is_admin=is_admin)
+        with patch.object(metrics_view, "async_get_hass", return_value=hass):
+            return await metrics_view.DomikaAPIMetrics().get(request)
+
+    assert asyncio.run(get(is_admin=False)).status == HTTPStatus.UNAUTHORIZED
+    assert asyncio.run(get(is_admin=True)).status == HTTPStatus.OK
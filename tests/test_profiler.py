@@ -0,0 +1,54 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from pathlib import Path
+import pstats
+import types
+
+import pytest
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.dashboard.patch import apply_patch
+from custom_components.domika.profiler import service as profiler_service
+
+
+def test_profile(tmp_path: Path):
+    """Test profile stats are saved, and top functions are limited to Domika code."""
+    top = 5
+
+    async def run() -> tuple[dict, dict]:
+        async def async_add_executor_job(target, *args):  # noqa: ANN001, ANN202
+            return target(*args)
+
+        hass = types.SimpleNamespace(
+            data={DOMAIN: {}},
+            config=types.SimpleNamespace(path=lambda *path: str(tmp_path.joinpath(*path))),
+            async_add_executor_job=async_add_executor_job,
+        )
+
+        async def load() -> None:
+            for i in range(100):
+                apply_patch({"views": [i]}, [{"op": "add", "path": "/views/-", "value": i}])
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(load())
+        profiling = asyncio.create_task(profiler_service.profile(hass, 0.05, top))
+        await asyncio.sleep(0)
+        with pytest.raises(ValueError, match="already running"):
+            await profiler_service.profile(hass, 0.05, top)
+        result = await profiling
+        await task
+        return hass.data[DOMAIN], result
+
+    domain_data, result = asyncio.run(run())
+    assert not domain_data["profiler_running"]
+    assert Path(result["path"]).parent == tmp_path / "domika_profiles"
+    pstats.Stats(result["path"])
+    assert 0 < len(result["functions"]) <= top
+    assert all("domika" in function["function"] for function in result["functions"])
+    assert any("apply_patch" in function["function"] for function in result["functions"])
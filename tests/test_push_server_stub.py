@@ -0,0 +1,71 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from http import HTTPStatus
+import uuid
+
+import aiohttp
+
+from benchmarks.push_server_stub import StubConfig, StubPushServer, start
+
+
+async def _post(url: str, path: str, requests: int = 1) -> list[tuple[int, dict | None]]:
+    result: list[tuple[int, dict | None]] = []
+    async with aiohttp.ClientSession() as session:
+        for _ in range(requests):
+            async with session.post(
+                f"{url}{path}",
+                headers={"x-session-id": str(uuid.uuid4())},
+                json={"data": "{}"},
+            ) as resp:
+                body = await resp.json() if resp.content_type == "application/json" else None
+                result.append((resp.status, body))
+    return result
+
+
+def _run(config: StubConfig, path: str, requests: int = 1) -> tuple[list, dict]:
+    async def run() -> tuple[list, dict]:
+        server = StubPushServer(config)
+        runner, url = await start(server)
+        try:
+            return await _post(url, path, requests), server.get_stats()
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_push_server_stub_api():
+    """Test stub answers as the push server, and counts requests."""
+    responses, stats = _run(StubConfig(), "/notification/push", 2)
+    assert [status for status, _ in responses] == [HTTPStatus.NO_CONTENT] * 2
+    assert stats == {
+        "requests": {"/notification/push": {"204": 2}},
+        "pushes": 2,
+        "push_sessions": 2,
+    }
+
+    [(status, body)] = _run(StubConfig(), "/push_session/verify")[0]
+    assert status == HTTPStatus.CREATED
+    assert body is not None
+    uuid.UUID(body["push_session_id"])
+
+
+def test_push_server_stub_failures():
+    """Test stub fails requests with error rate, and rejects requests over throughput limit."""
+    config = StubConfig(error_rate=1.0, error_status=HTTPStatus.SERVICE_UNAVAILABLE)
+    responses, stats = _run(config, "/notification/push")
+    assert [status for status, _ in responses] == [HTTPStatus.SERVICE_UNAVAILABLE]
+    assert stats["pushes"] == 0
+
+    requests = 3
+    responses, _ = _run(StubConfig(max_rps=1.0), "/notification/push", requests)
+    assert [status for status, _ in responses] == [
+        HTTPStatus.NO_CONTENT,
+        *[HTTPStatus.TOO_MANY_REQUESTS] * (requests - 1),
+    ]
@@ -0,0 +1,59 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import json
+import types
+
+from homeassistant.core import State
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.ha_entity.cache import StateFragment, StateFragmentCache
+from custom_components.domika.ha_entity.service import get_flat_state, get_state_fragment
+from custom_components.domika.subscription.matcher import AttributeFilter
+
+
+def test_state_fragment_cache():
+    """Test fragments are reused until the state is updated."""
+    cache = StateFragmentCache(1024)
+    hass = types.SimpleNamespace(data={DOMAIN: {"state_fragment_cache": cache}})
+    state = State("light.kitchen", "on", {"brightness": 255, "friendly_name": "Kitchen"})
+
+    fragment = get_state_fragment(hass, state, ["s"])
+    assert get_state_fragment(hass, state, {"s"}) is fragment
+    assert get_state_fragment(hass, state) is not fragment
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    payload = json.loads(json_bytes({"entities": [fragment]}))
+    assert payload["entities"][0] == {
+        "entity_id": "light.kitchen",
+        "time_updated": state.last_updated.isoformat(),
+        "attributes": {"s": "on"},
+    }
+    assert fragment.as_dict() == payload["entities"][0]
+
+    updated = State("light.kitchen", "off", state.attributes)
+    assert get_state_fragment(hass, updated, ["s"]).as_dict()["attributes"] == {"s": "off"}
+
+    attribute_filter = AttributeFilter.compile(["a.*"])
+    assert get_state_fragment(hass, updated, attribute_filter).as_dict()["attributes"] == {
+        k: v for k, v in get_flat_state(updated).items() if k.startswith("a.")
+    }
+
+
+def test_state_fragment_cache_eviction():
+    """Test least recently used fragments are evicted by size."""
+    cache = StateFragmentCache(10)
+    cache.set("a", 1.0, StateFragment(b"12345"))
+    cache.set("b", 1.0, StateFragment(b"12345"))
+    assert cache.get("a", 1.0) is not None
+    cache.set("c", 1.0, StateFragment(b"12345"))
+    assert cache.get("b", 1.0) is None
+    assert cache.get("a", 2.0) is None
+    assert cache.size == 10  # noqa: PLR2004
+    cache.set("d", 1.0, StateFragment(b"0" * 11))
+    assert len(cache) == 2  # noqa: PLR2004
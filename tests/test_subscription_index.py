@@ -0,0 +1,91 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+import gc
+import types
+import uuid
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.subscription import service as subscription_service
+from custom_components.domika.subscription.index import SubscriptionIndex
+
+
+def test_subscription_index_lookup():
+    """Test app sessions lookup by entity attributes."""
+    app_session_id1 = uuid.uuid4()
+    app_session_id2 = uuid.uuid4()
+    index = SubscriptionIndex()
+    assert index.load(
+        [
+            (app_session_id1, "light.kitchen", "s", True),
+            (app_session_id1, "light.kitchen", "a.brightness", False),
+            (app_session_id2, "light.kitchen", "a.brightness", False),
+        ],
+        index.generation,
+    )
+
+    assert index.get_app_session_ids("light.kitchen", ["s"]) == [app_session_id1]
+    assert sorted(index.get_app_session_ids("light.kitchen", ["s", "a.brightness"])) == sorted(
+        [app_session_id1, app_session_id2],
+    )
+    assert index.get_app_session_ids("light.hall", ["s"]) == []
+
+
+def test_subscription_index_updates():
+    """Test incremental updates keep both index directions consistent."""
+    app_session_id = uuid.uuid4()
+    index = SubscriptionIndex()
+    index.set_subscriptions(app_session_id, {"light.kitchen": {"s": 1}, "sensor.t": {"s": 0}})
+
+    index.add(app_session_id, "sensor.t", "a.unit", need_push=False)
+    index.remove(app_session_id, "light.kitchen", "s")
+    assert index.get_subscriptions(app_session_id) == {"sensor.t": {"s": False, "a.unit": False}}
+    assert index.get_app_session_ids("light.kitchen", ["s"]) == []
+
+    index.set_push(app_session_id, {"sensor.t": {"a.unit"}})
+    assert index.get_subscriptions(app_session_id) == {"sensor.t": {"s": False, "a.unit": True}}
+
+    index.set_subscriptions(app_session_id, {})
+    assert len(index) == 0
+    assert index.get_app_session_ids("sensor.t", ["s", "a.unit"]) == []
+
+
+def test_subscription_index_stale_load():
+    """Test load is rejected if the index was changed while rows were read."""
+    index = SubscriptionIndex()
+    generation = index.generation
+    index.set_subscriptions(uuid.uuid4(), {"light.kitchen": {"s": 1}})
+    assert not index.load([], generation)
+    assert not index.loaded
+
+
+def test_subscription_index_versions():
+    """Test subscriptions versions."""
+    app_session_id = uuid.uuid4()
+    index = SubscriptionIndex()
+    assert index.get_version(app_session_id) is None
+    assert index.next_version(app_session_id) == 1
+    assert index.next_version(app_session_id) == 2  # noqa: PLR2004
+    index.forget_version(app_session_id)
+    assert index.get_version(app_session_id) is None
+
+
+def test_subscription_locks_dropped():
+    """Test app session locks are reused while held and dropped when released."""
+    hass = types.SimpleNamespace(data={DOMAIN: {}})
+    app_session_id = uuid.uuid4()
+
+    async def run() -> None:
+        lock = subscription_service._get_lock(hass, app_session_id)  # noqa: SLF001
+        async with lock:
+            assert subscription_service._get_lock(hass, app_session_id) is lock  # noqa: SLF001
+        del lock
+        gc.collect()
+
+    asyncio.run(run())
+    assert len(hass.data[DOMAIN]["subscription_locks"]) == 0
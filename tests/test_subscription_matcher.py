@@ -0,0 +1,82 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import uuid
+
+from custom_components.domika.subscription.matcher import AttributeFilter, SubscriptionMatcher
+
+AREAS = {"kitchen": {"light.kitchen", "sensor.kitchen_t"}}
+
+
+def _resolve(pattern: dict) -> set[str]:
+    if entity_id := pattern.get("entity_id"):
+        return {entity_id}
+    return AREAS.get(pattern.get("area_id"), set())
+
+
+def test_attribute_filter():
+    """Test attribute names and wildcards."""
+    attribute_filter = AttributeFilter.compile(["s", "a.brightness", "a.rgb.*"])
+    assert attribute_filter.match("s")
+    assert attribute_filter.match("a.rgb.r")
+    assert not attribute_filter.match("a.rgb")
+    assert not attribute_filter.match_any(["a.friendly_name", "lc"])
+
+    assert AttributeFilter.compile(["s", "*"]).match("a.anything")
+    assert attribute_filter.merge(AttributeFilter.compile(["a.*"])).match("a.friendly_name")
+
+
+def test_subscription_matcher_lookup():
+    """Test app sessions lookup by domain, area and entity patterns."""
+    app_session_id1 = uuid.uuid4()
+    app_session_id2 = uuid.uuid4()
+    matcher = SubscriptionMatcher()
+    matcher.load(
+        {
+            app_session_id1: [{"domain": "light", "attributes": ["s"]}],
+            app_session_id2: [
+                {"area_id": "kitchen", "attributes": ["a.*"]},
+                {"entity_id": "light.kitchen", "attributes": ["s"]},
+            ],
+        },
+        _resolve,
+    )
+    assert len(matcher) == 3  # noqa: PLR2004
+
+    assert sorted(matcher.get_app_session_ids("light.kitchen", ["s"])) == sorted(
+        [app_session_id1, app_session_id2],
+    )
+    assert matcher.get_app_session_ids("light.new", ["s"]) == [app_session_id1]
+    assert matcher.get_app_session_ids("light.new", ["a.brightness"]) == []
+    assert matcher.get_app_session_ids("sensor.kitchen_t", ["a.unit"]) == [app_session_id2]
+    assert matcher.get_app_session_ids("sensor.hall_t", ["s"]) == []
+
+    entities = matcher.get_entities(app_session_id2, lambda _domain: [])
+    assert set(entities) == {"light.kitchen", "sensor.kitchen_t"}
+    assert entities["light.kitchen"].match("s")
+    assert entities["light.kitchen"].match("a.brightness")
+
+
+def test_subscription_matcher_updates():
+    """Test patterns replacement and recompilation after registry changes."""
+    app_session_id = uuid.uuid4()
+    matcher = SubscriptionMatcher()
+    matcher.set_patterns(app_session_id, [{"area_id": "kitchen", "attributes": ["s"]}], _resolve)
+    assert matcher.get_app_session_ids("light.kitchen", ["s"]) == [app_session_id]
+
+    AREAS["kitchen"] = {"light.hall"}
+    try:
+        matcher.compile(_resolve)
+        assert matcher.get_app_session_ids("light.kitchen", ["s"]) == []
+        assert matcher.get_app_session_ids("light.hall", ["s"]) == [app_session_id]
+    finally:
+        AREAS["kitchen"] = {"light.kitchen", "sensor.kitchen_t"}
+
+    matcher.set_patterns(app_session_id, [], _resolve)
+    assert len(matcher) == 0
+    assert matcher.get_app_session_ids("light.hall", ["s"]) == []
+    assert matcher.get_patterns() == {}
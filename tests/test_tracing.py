@@ -0,0 +1,105 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import datetime as dt
+import time
+import types
+import uuid
+
+from domika_ha_framework.push_data.models import DomikaPushedEvents
+
+from custom_components.domika.const import DOMAIN
+from custom_components.domika.tracing import service as tracing_service
+from custom_components.domika.tracing.tracer import Tracer
+
+
+def _create_event(context_id: str, entity_id: str) -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        context=types.SimpleNamespace(id=context_id),
+        time_fired=dt.datetime.now(dt.UTC),
+        data={"entity_id": entity_id},
+    )
+
+
+def test_trace_follows_event_to_confirmation():
+    """Test stored event spans, push delivery and confirmation are collected by context."""
+    tracer = Tracer(max_traces=10, max_spans=10)
+    hass = types.SimpleNamespace(data={DOMAIN: {"tracer": tracer}})
+    event = _create_event("context", "light.kitchen")
+    event_id = uuid.uuid4()
+    timestamp = int(event.time_fired.timestamp() * 1e6)
+
+    with tracing_service.span(hass, event, "state_changed"):
+        with tracing_service.span(hass, event, "lookup") as lookup_span:
+            lookup_span["app_sessions"] = 1
+        tracing_service.on_event_stored(hass, event, event_id, timestamp)
+
+    pushed_events = [
+        DomikaPushedEvents(
+            uuid.uuid4(),
+            {
+                "light.kitchen": {
+                    "s": {"v": "on", "t": timestamp},
+                    "a.brightness": {"v": "255", "t": timestamp},
+                },
+                "light.other": {"s": {"v": "on", "t": timestamp}},
+            },
+        ),
+    ]
+    start = time.monotonic()
+    tracing_service.on_events_pushed(hass, pushed_events, start, start + 1)
+    tracing_service.on_events_confirmed(hass, [event_id, uuid.uuid4()], start + 2, start + 3)
+
+    trace = tracer.get("context")
+    assert trace is not None
+    spans = {span["name"]: span for span in trace.as_dict()["spans"]}
+    assert list(spans) == ["state_changed", "lookup", "delivery", "confirm_event"]
+    assert spans["lookup"]["entity_id"] == "light.kitchen"
+    assert spans["lookup"]["attributes"] == {"app_sessions": 1}
+    assert spans["delivery"]["attributes"] == {"attributes": 2}
+    assert spans["confirm_event"]["attributes"] == {"events": 1}
+
+
+def test_tracer_evicts_oldest_traces():
+    """Test traces are kept in a ring buffer, with keys of the evicted traces forgotten."""
+    max_traces = 2
+    tracer = Tracer(max_traces=max_traces, max_spans=1)
+    event_ids = [uuid.uuid4() for _ in range(max_traces + 1)]
+    for i, event_id in enumerate(event_ids):
+        trace = tracer.get_or_create(f"context_{i}", 0)
+        tracer.add_event(trace, event_id, "light.kitchen", i)
+        for name in ("diff", "lookup"):
+            tracer.add_span(
+                trace,
+                name,
+                "light.kitchen",
+                start=trace.start,
+                end=trace.start,
+                attributes={},
+            )
+
+    assert len(tracer) == max_traces
+    assert tracer.get("context_0") is None
+    assert tracer.find_by_pushed_key("light.kitchen", 0) is None
+    assert tracer.find_by_event_ids(event_ids) == {
+        "context_1": [event_ids[1]],
+        "context_2": [event_ids[2]],
+    }
+    trace = tracer.get("context_2")
+    assert trace is not None
+    assert len(trace.spans) == 1
+    assert trace.dropped_spans == 1
+
+
+def test_tracing_disabled():
+    """Test nothing is traced when tracer is not created."""
+    hass = types.SimpleNamespace(data={DOMAIN: {}})
+    event = _create_event("context", "light.kitchen")
+    with tracing_service.span(hass, event, "diff") as diff_span:
+        diff_span["attributes"] = 1
+    tracing_service.on_event_stored(hass, event, uuid.uuid4(), 0)
+    assert tracing_service.get_tracer(hass) is None
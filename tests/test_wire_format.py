@@ -0,0 +1,105 @@
+# vim: set fileencoding=utf-8
+"""
+tests.
+
+(c) DevPocket, 2024
+"""
+
+import asyncio
+from datetime import UTC, datetime
+import json
+import types
+import uuid
+
+from homeassistant.components.websocket_api.messages import (
+    message_to_json_bytes,
+    result_message,
+)
+
+from custom_components.domika.ha_entity.cache import StateFragment
+from custom_components.domika.wire_format import service as wire_format_service
+
+
+def test_wire_format_roundtrip():
+    """Test payloads decode to the same data as json in every available format."""
+    data = {
+        "entities": [
+            StateFragment(
+                json.dumps(
+                    {
+                        "entity_id": "light.kitchen",
+                        "time_updated": 1722500000.5,
+                        "attributes": {"s": "on", "a.brightness": "255"},
+                    },
+                ).encode(),
+            ),
+        ],
+        "time_updated": datetime(2024, 8, 1, tzinfo=UTC),
+        "app_session_id": uuid.UUID(int=1),
+        "ids": {"light.kitchen"},
+        "version": 3,
+    }
+    expected = wire_format_service.decode(
+        wire_format_service.encode(data, wire_format_service.FORMAT_JSON),
+        wire_format_service.FORMAT_JSON,
+    )
+    for wire_format in wire_format_service.get_available_formats():
+        payload = wire_format_service.encode(data, wire_format)
+        decoded = wire_format_service.decode(payload, wire_format)
+        if wire_format == wire_format_service.FORMAT_CBOR:
+            # CBOR has native datetime, uuid and set types.
+            decoded["time_updated"] = decoded["time_updated"].isoformat()
+            decoded["app_session_id"] = str(decoded["app_session_id"])
+            decoded["ids"] = list(decoded["ids"])
+        assert decoded == expected, wire_format
+
+
+def test_wire_format_negotiate():
+    """Test format negotiation by Accept header."""
+    available = wire_format_service.get_available_formats()
+    assert wire_format_service.negotiate(None) == wire_format_service.FORMAT_JSON
+    assert wire_format_service.negotiate("*/*") == wire_format_service.FORMAT_JSON
+    assert wire_format_service.negotiate("text/html, application/json") == "json"
+
+    if wire_format_service.FORMAT_MSGPACK in available:
+        assert wire_format_service.negotiate("application/msgpack, application/json") == "msgpack"
+        assert (
+            wire_format_service.negotiate("application/x-msgpack;q=0.5, application/json") == "json"
+        )
+    else:
+        assert wire_format_service.negotiate("application/msgpack") == "json"
+
+
+def test_wire_format_send_result_offload():
+    """Test offloaded result is sent as the same message as the result encoded on the loop."""
+
+    class Connection:
+        def __init__(self) -> None:
+            self.messages = []
+
+        def send_result(self, msg_id: int, result: dict) -> None:
+            self.messages.append(message_to_json_bytes(result_message(msg_id, result)))
+
+        def send_message(self, message: bytes) -> None:
+            self.messages.append(message)
+
+    async def run() -> list:
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(
+            async_add_executor_job=lambda target, *args: loop.run_in_executor(None, target, *args),
+        )
+        connection = Connection()
+        result = {"entities": [{"entity_id": "light.kitchen", "s": "on"}], "version": 1}
+        for offload in (False, True):
+            await wire_format_service.async_send_result(
+                hass,
+                connection,
+                1,
+                result,
+                wire_format_service.FORMAT_JSON,
+                offload=offload,
+            )
+        return connection.messages
+
+    inline, offloaded = asyncio.run(run())
+    assert json.loads(inline) == json.loads(offloaded)